@@ -0,0 +1,81 @@
+"""
+Event-loop latency under many concurrent lookups: calling the blocking
+Author.find_by_id from coroutines vs. awaiting aio.Author.afind_by_id.
+
+A ticker coroutine asks to wake up every millisecond; how late it wakes up
+is the latency every other coroutine on the loop would see.
+
+    python -m benchmarks.bench_async --articles 100000 --lookups 20000 --concurrency 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_connection_pool import build_db
+from lib.db.connection import close_pools
+
+
+async def ticker(lags, stop):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append((time.perf_counter() - start - 0.001) * 1000)
+
+
+async def run_load(lookup, ids, concurrency):
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    queue = list(ids)
+
+    async def worker():
+        while queue:
+            await lookup(queue.pop())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick
+    return len(ids) / elapsed, lags
+
+
+def report(label, throughput, lags):
+    lags = sorted(lags) or [0.0]
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(f"{label:<12} {throughput:10.0f} lookups/s   loop lag p50 {statistics.median(lags):7.2f} ms"
+          f"  p99 {p99:7.2f} ms  max {lags[-1]:7.2f} ms  ({len(lags)} ticks)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        build_db(os.environ["DB_PATH"], args.articles)
+
+        from lib.models import aio
+        from lib.models.author import Author
+
+        rnd = random.Random(7)
+        ids = [rnd.randint(1, 1000) for _ in range(args.lookups)]
+
+        async def blocking(aid):
+            Author.find_by_id(aid)
+            await asyncio.sleep(0)
+
+        report("blocking", *asyncio.run(run_load(blocking, ids, args.concurrency)))
+        report("aio", *asyncio.run(run_load(aio.Author.afind_by_id, ids, args.concurrency)))
+        aio.executor.shutdown()
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Mixed readers and writers: rollback journal vs. WAL with the read/write
+connection split.
+
+With the rollback journal, readers are blocked while a write commits (and
+writers wait for readers). Under WAL they don't, so reads scale; writes
+then compete with the busy reader threads for the GIL rather than for
+SQLite locks.
+
+    python -m benchmarks.bench_concurrency --readers 8 --writers 2 --seconds 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from benchmarks.bench_connection_pool import build_db
+from lib.db.connection import DBConfig, configure, close_pools
+
+
+def run(label, config, args):
+    from lib.models.author import Author
+    from lib.models.magazine import Magazine
+
+    configure(config)
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(seed):
+        rnd = random.Random(seed)
+        while not stop.is_set():
+            try:
+                Author.find_by_id(rnd.randint(1, 1000))
+                Magazine.find_by_id(rnd.randint(1, 100)).contributing_authors()
+                bump("reads")
+            except sqlite3.OperationalError:
+                bump("errors")
+
+    def writer(seed):
+        rnd = random.Random(seed)
+        author = Author.find_by_id(rnd.randint(1, 1000))
+        while not stop.is_set():
+            try:
+                author.add_article(rnd.randint(1, 100), "Concurrent write")
+                bump("writes")
+            except sqlite3.OperationalError:
+                bump("errors")
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(100 + i,)) for i in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    print(f"{label:<10} reads/s {counts['reads'] / args.seconds:9.0f}   writes/s "
+          f"{counts['writes'] / args.seconds:8.0f}   errors {counts['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        configure(journal_mode="delete")
+        build_db(os.environ["DB_PATH"], args.articles)
+        pool_size = args.readers + args.writers
+        run("delete", DBConfig(journal_mode="delete", synchronous="full", read_only_readers=False,
+                               read_pool_size=pool_size), args)
+        run("wal", DBConfig(read_pool_size=pool_size), args)
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
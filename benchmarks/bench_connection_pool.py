@@ -0,0 +1,76 @@
+"""
+Lookups per second: connect-per-call vs. pooled connections.
+
+    python -m benchmarks.bench_connection_pool --articles 1000000 --lookups 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from lib.db.connection import PROJECT_ROOT, close_pools, get_connection
+
+
+def build_db(path, n_articles, n_authors=1000, n_magazines=100):
+    conn = get_connection()
+    try:
+        with open(os.path.join(PROJECT_ROOT, "lib", "db", "schema.sql")) as f:
+            conn.executescript(f.read())
+        conn.executemany("INSERT INTO authors (name) VALUES (?)",
+                         ((f"Author {i}",) for i in range(n_authors)))
+        conn.executemany("INSERT INTO magazines (name, category) VALUES (?, ?)",
+                         ((f"Magazine {i}", f"Category {i % 10}") for i in range(n_magazines)))
+        rnd = random.Random(42)
+        conn.executemany(
+            "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+            ((f"Article {i}", rnd.randint(1, n_authors), rnd.randint(1, n_magazines))
+             for i in range(n_articles)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def find_by_id_unpooled(aid):
+    # The pre-pool implementation of Article.find_by_id
+    conn = get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM articles WHERE id = ?", (aid,))
+        return cur.fetchone()
+    finally:
+        conn.close()
+
+
+def measure(fn, ids):
+    start = time.perf_counter()
+    for aid in ids:
+        fn(aid)
+    return len(ids) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        print(f"Building database with {args.articles} articles...")
+        build_db(os.environ["DB_PATH"], args.articles)
+
+        from lib.models.article import Article
+
+        rnd = random.Random(7)
+        ids = [rnd.randint(1, args.articles) for _ in range(args.lookups)]
+        before = measure(find_by_id_unpooled, ids)
+        after = measure(Article.find_by_id, ids)
+        print(f"connect-per-call: {before:10.0f} lookups/s")
+        print(f"pooled:           {after:10.0f} lookups/s  ({after / before:.1f}x)")
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
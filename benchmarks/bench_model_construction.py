@@ -0,0 +1,57 @@
+"""
+Memory and throughput of building Article objects from database rows:
+the old validating __init__ on a __dict__ class vs. the slotted from_row().
+
+    python -m benchmarks.bench_model_construction --rows 1000000
+"""
+import argparse
+import sqlite3
+import time
+import tracemalloc
+
+from lib.models.article import Article
+
+
+class LegacyArticle:
+    # Article as it was before __slots__/from_row, for comparison
+    def __init__(self, title, author_id, magazine_id, id=None):
+        if not title or not title.strip():
+            raise ValueError("Article title required")
+        self.id = id
+        self.title = title.strip()
+        self.author_id = author_id
+        self.magazine_id = magazine_id
+
+
+def make_rows(n):
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY, title TEXT, author_id INTEGER, magazine_id INTEGER)")
+    conn.executemany("INSERT INTO articles VALUES (?, ?, ?, ?)",
+                     ((i, f"Article {i}", i % 1000, i % 100) for i in range(1, n + 1)))
+    return conn.execute("SELECT * FROM articles").fetchall()
+
+
+def run(label, build, rows):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objs = [build(r) for r in rows]
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {len(rows) / elapsed:12.0f} objects/s  {peak / len(rows):7.1f} bytes/object")
+    return objs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rows = make_rows(args.rows)
+    run("legacy __init__", lambda r: LegacyArticle(r["title"], r["author_id"], r["magazine_id"], r["id"]), rows)
+    run("validated __init__", lambda r: Article(r["title"], r["author_id"], r["magazine_id"], r["id"]), rows)
+    run("Article.from_row", Article.from_row, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Report generation throughput by number of worker processes.
+
+    python -m benchmarks.bench_reports --size 1m --workers 1 2 4 8
+
+Writes every author and magazine report (lib/reports.py) to /dev/null and
+prints reports/s and the speed-up over the first worker count. Scaling is
+bounded by the number of cores, so compare against os.cpu_count().
+"""
+import argparse
+import os
+
+from benchmarks.datagen import SIZES, dataset
+from lib.db.connection import close_pools
+from lib.reports import ReportGenerator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    os.environ["DB_PATH"] = dataset(args.size)  # only read, so no copy needed
+    print(f"{os.cpu_count()} CPUs")
+    baseline = None
+    for workers in args.workers:
+        with open(os.devnull, "w") as out:
+            stats = ReportGenerator(workers=workers, progress=False).write(out)
+        seconds = sum(s.seconds for s in stats)
+        rate = sum(s.reports for s in stats) / seconds
+        baseline = baseline or rate
+        print(f"workers={workers:<3} {rate:10,.0f} reports/s  {seconds:7.2f}s  x{rate / baseline:.2f}")
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Title search: LIKE '%word%' table scan vs. Article.search() over FTS5.
+
+    python -m benchmarks.bench_search --articles 1000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from lib.db.connection import PROJECT_ROOT, close_pools, get_connection
+
+SYLLABLES = ("ka", "lo", "mi", "ra", "tu", "ne", "so", "vi", "de", "pa", "zu", "ge", "bo", "ri", "an", "el")
+# 4096 pseudo-words, so a keyword matches a realistic small fraction of titles
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+
+def build_db(n_articles):
+    rnd = random.Random(42)
+    conn = get_connection()
+    try:
+        with open(os.path.join(PROJECT_ROOT, "lib", "db", "schema.sql")) as f:
+            conn.executescript(f.read())
+        conn.execute("INSERT INTO authors (name) VALUES ('Bench Author')")
+        conn.execute("INSERT INTO magazines (name, category) VALUES ('Bench Mag', 'Bench')")
+        conn.executemany(
+            "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, 1, 1)",
+            ((" ".join(rnd.choice(WORDS) for _ in range(4)) + f" {i}",) for i in range(n_articles)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        print(f"Building database with {args.articles} articles...")
+        build_db(args.articles)
+
+        from lib.models.article import Article
+
+        rnd = random.Random(7)
+        queries = [f"{rnd.choice(WORDS)} {rnd.choice(WORDS)[:4]}" for _ in range(args.queries)]
+
+        def like(q):
+            first, prefix = q.split()
+            conn = get_connection()
+            try:
+                return conn.execute(
+                    "SELECT * FROM articles WHERE title LIKE ? AND title LIKE ? LIMIT 20",
+                    (f"%{first}%", f"%{prefix}%"),
+                ).fetchall()
+            finally:
+                conn.close()
+
+        print(f"LIKE scan:      {timed(like, queries):8.2f} ms/query")
+        print(f"Article.search: {timed(lambda q: Article.search(q, limit=20), queries):8.2f} ms/query")
+        close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+CLI startup cost: import time and wall-clock time of `articles-cli`.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 20 --target-ms 50
+
+Each command runs in a fresh interpreter. Import time is the cumulative
+figure `python -X importtime` reports for lib.cli plus every lib.* module
+the command pulls in; wall-clock time includes interpreter start-up. The
+commands run against a scratch database loaded with the demo seed.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMANDS = [
+    ["--help"],
+    ["top-authors", "-n", "5"],
+    ["author", "Alice Walker"],
+]
+
+
+def run(args, importtime=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-m", "lib.cli", *args]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, proc.stderr
+
+
+def import_ms(args):
+    """
+    Cumulative import time of the lib.* modules imported at top level (each
+    figure already includes everything that module imported), in ms.
+    lib.cli itself runs as __main__, so argparse is the only other cost.
+    """
+    _, stderr = run(args, importtime=True)
+    total = 0
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        if name.startswith(" lib") and not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CLI startup benchmark")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "startup.db")
+        run(["seed"])
+        report(args)
+
+
+def report(args):
+    print(f"{'command':<28} {'imports ms':>10} {'wall p50 ms':>12}")
+    for cmd in COMMANDS:
+        run(cmd)  # warm the OS page cache and __pycache__
+        walls = [run(cmd)[0] * 1000 for _ in range(args.repeat)]
+        imports = import_ms(cmd)
+        flag = "" if imports <= args.target_ms else "  over target"
+        print(f"{' '.join(cmd):<28} {imports:>10.1f} {statistics.median(walls):>12.1f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Prepared-statement reuse: find_by_id throughput by cached_statements size,
+and statement cache hit rates for the full benchmark workload.
+
+    python -m benchmarks.bench_statement_cache --size 1m --lookups 50000
+    python -m benchmarks.bench_statement_cache --hit-rate
+
+cached_statements=0 re-parses and re-plans every statement, so the first
+row is the cost of preparing per call. --hit-rate runs every case of
+benchmarks/run.py under the profiler (lib/db/profile.py) and reports how
+often statements came from the per-connection cache.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from benchmarks.datagen import SIZES, dataset
+from lib.db import profile
+from lib.db.connection import close_pools, configure, get_config
+
+CACHE_SIZES = (0, 16, 128, 512)
+
+
+def find_by_id_rate(ids):
+    from lib.models.author import Author
+
+    Author.find_by_id(ids[0])  # open the pooled connection outside the timing
+    start = time.perf_counter()
+    for aid in ids:
+        Author.find_by_id(aid)
+    return len(ids) / (time.perf_counter() - start)
+
+
+def hit_rate(cases):
+    with profile.profiling(slow_ms=float("inf")) as prof:
+        for _, fn in cases:
+            for _ in range(3):
+                fn()
+    return prof.statement_cache()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--lookups", type=int, default=50_000)
+    parser.add_argument("--hit-rate", action="store_true", help="report cache hit rates instead of throughput")
+    args = parser.parse_args()
+
+    size = SIZES[args.size]
+    original = get_config()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        shutil.copyfile(dataset(args.size), os.environ["DB_PATH"])
+        rnd = random.Random(7)
+        ids = [rnd.randint(1, size.authors) for _ in range(args.lookups)]
+        if args.hit_rate:
+            from benchmarks.run import build_cases
+            cases = build_cases(size)
+        try:
+            for n in CACHE_SIZES:
+                configure(cached_statements=n)
+                if args.hit_rate:
+                    stats = hit_rate(cases)
+                    print(f"cached_statements={n:<4} hit rate {stats['hit_rate']:6.1%} "
+                          f"({stats['hits']} hits, {stats['misses']} prepares)")
+                else:
+                    print(f"cached_statements={n:<4} {find_by_id_rate(ids):10.0f} find_by_id/s")
+        finally:
+            configure(original)
+            close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Deterministic, skewed synthetic datasets for the benchmark suite.
+
+    python -m benchmarks.datagen --size 1m            # -> benchmarks/.data/1m-s42.db
+
+Author and magazine popularity follow Zipf-like distributions (a few
+authors write a large share of the articles, most write a handful), and
+categories are skewed the same way. The same size and seed always produce
+the same database, so runs on different commits measure the same data.
+Generated databases are cached under benchmarks/.data.
+"""
+import argparse
+import bisect
+import itertools
+import os
+import random
+import sqlite3
+import time
+from typing import NamedTuple
+
+from lib.db.connection import PROJECT_ROOT
+from lib.db.seed import SCHEMA_PATH, drop_article_indexes, restore_article_indexes
+
+DATA_DIR = os.path.join(PROJECT_ROOT, "benchmarks", ".data")
+
+SYLLABLES = ("ka", "lo", "mi", "ra", "tu", "ne", "so", "vi", "de", "pa", "zu", "ge", "bo", "ri", "an", "el")
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+
+
+class Size(NamedTuple):
+    articles: int
+    authors: int
+    magazines: int
+    categories: int
+
+
+SIZES = {
+    "10k": Size(10_000, 500, 50, 10),
+    "1m": Size(1_000_000, 20_000, 1_000, 25),
+    "10m": Size(10_000_000, 100_000, 5_000, 50),
+}
+
+
+def zipf_weights(n: int, s: float):
+    """
+    Cumulative weights for ranks 1..n with P(rank k) proportional to 1/k^s.
+    """
+    return list(itertools.accumulate(1 / k ** s for k in range(1, n + 1)))
+
+
+def _sampler(rnd, n, s):
+    cum = zipf_weights(n, s)
+    total = cum[-1]
+    # bisect on the cumulative table; much cheaper than random.choices per call
+    return lambda: bisect.bisect(cum, rnd.random() * total) + 1
+
+
+def generate(path: str, size: Size, seed: int = 42, batch: int = 100_000):
+    """
+    Writes a fresh database at `path`. Author 1 is "Alice Walker" and is the
+    most prolific author, so scripts/run_queries.py has data to work on.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute("PRAGMA journal_mode = wal")
+        conn.execute("PRAGMA synchronous = off")
+        with open(SCHEMA_PATH) as f:
+            conn.executescript(f.read())
+        drop_article_indexes(conn)
+
+        conn.execute("BEGIN")
+        names = ["Alice Walker"] + [f"Author {i:07d}" for i in range(2, size.authors + 1)]
+        conn.executemany("INSERT INTO authors (name) VALUES (?)", ((n,) for n in names))
+        pick_category = _sampler(rnd, size.categories, 1.2)
+        conn.executemany(
+            "INSERT INTO magazines (name, category) VALUES (?, ?)",
+            ((f"Magazine {i:05d}", f"Category {pick_category():03d}") for i in range(1, size.magazines + 1)),
+        )
+        conn.commit()
+
+        pick_author = _sampler(rnd, size.authors, 1.1)
+        pick_magazine = _sampler(rnd, size.magazines, 1.0)
+        choice = rnd.choice
+        rows = ((f"{choice(WORDS)} {choice(WORDS)} {choice(WORDS)} {i}", pick_author(), pick_magazine())
+                for i in range(1, size.articles + 1))
+        while True:
+            chunk = list(itertools.islice(rows, batch))
+            if not chunk:
+                break
+            conn.execute("BEGIN")
+            conn.executemany("INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)", chunk)
+            conn.commit()
+
+        restore_article_indexes(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def dataset(size_name: str, seed: int = 42, rebuild: bool = False) -> str:
+    """
+    Path of the cached database for `size_name`, generating it if needed.
+    """
+    if size_name not in SIZES:
+        raise ValueError(f"Unknown dataset size {size_name!r}; choose from {', '.join(SIZES)}")
+    path = os.path.join(DATA_DIR, f"{size_name}-s{seed}.db")
+    if rebuild or not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        tmp = path + ".tmp"
+        generate(tmp, SIZES[size_name], seed)
+        os.replace(tmp, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a benchmark dataset.")
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rebuild", action="store_true")
+    args = parser.parse_args()
+    start = time.perf_counter()
+    path = dataset(args.size, args.seed, args.rebuild)
+    print(f"{path} ready in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
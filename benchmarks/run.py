@@ -0,0 +1,229 @@
+"""
+Benchmark runner covering every public model method and the
+scripts/run_queries.py workflow.
+
+    python -m benchmarks.run --size 10k
+    python -m benchmarks.run --size 1m --out before.json
+    python -m benchmarks.run --size 1m --compare before.json --filter Author.
+
+Each case is calibrated to about `--target` seconds per repeat and run
+`--repeat` times against a temporary copy of the generated dataset (see
+benchmarks/datagen.py), so write cases never change the cached data.
+Results are written as JSON: run metadata (commit, versions, dataset) and
+per-case min/median/mean milliseconds per call.
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.datagen import SIZES, dataset
+from lib.db.connection import PROJECT_ROOT, close_pools
+
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run_queries_workflow():
+    spec = importlib.util.spec_from_file_location("run_queries", os.path.join(PROJECT_ROOT, "scripts", "run_queries.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    def workflow():
+        with contextlib.redirect_stdout(io.StringIO()):
+            module.example()
+    return workflow
+
+
+def build_cases(size):
+    """
+    [(name, zero-argument callable)] for the dataset `size`. Arguments are
+    drawn from fixed seeds; "hot" rows are the heaviest ones under the skew.
+    """
+    from lib.models.article import Article
+    from lib.models.author import Author
+    from lib.models.magazine import Magazine
+
+    rnd = random.Random(1234)
+    author_ids = itertools.cycle([rnd.randint(1, size.authors) for _ in range(1000)])
+    magazine_ids = itertools.cycle([rnd.randint(1, size.magazines) for _ in range(1000)])
+    article_ids = itertools.cycle([rnd.randint(1, size.articles) for _ in range(1000)])
+    seq = itertools.count()
+
+    hot_author = Author.find_by_id(1)
+    typical_author = Author.find_by_id(max(1, size.authors // 10))
+    hot_magazine = Magazine.find_by_id(1)
+    typical_magazine = Magazine.find_by_id(max(1, size.magazines // 10))
+    category = hot_magazine.category
+    some_authors = [Author.find_by_id(i) for i in range(1, size.authors + 1, max(1, size.authors // 100))]
+    some_magazines = [Magazine.find_by_id(i) for i in range(1, size.magazines + 1, max(1, size.magazines // 50))]
+    some_title = Article.find_by_id(size.articles // 2).title
+    search_word = some_title.split()[0]
+    deep_cursor = Article.page(magazine_id=hot_magazine.id, limit=min(5000, size.articles // 100)).next_cursor
+
+    def drain(iterator):
+        for _ in iterator:
+            pass
+
+    def unique(prefix):
+        return f"{prefix} {next(seq)}"
+
+    cases = [
+        # Author
+        ("Author.find_by_id", lambda: Author.find_by_id(next(author_ids))),
+        ("Author.find_by_name", lambda: Author.find_by_name(f"Author {next(author_ids):07d}")),
+        ("Author.articles[hot]", lambda: Author(hot_author.name, hot_author.id).articles()),
+        ("Author.articles[typical]", lambda: Author(typical_author.name, typical_author.id).articles()),
+        ("Author.iter_articles[hot]", lambda: drain(hot_author.iter_articles())),
+        ("Author.magazines[hot]", lambda: Author(hot_author.name, hot_author.id).magazines()),
+        ("Author.topic_areas[hot]", lambda: hot_author.topic_areas()),
+        ("Author.prefetch", lambda: Author.prefetch([Author(a.name, a.id) for a in some_authors],
+                                                    "articles", "magazines")),
+        ("Author.leaderboard", lambda: Author.leaderboard(100)),
+        ("Author.leaderboard[category]", lambda: Author.leaderboard(100, category)),
+        ("Author.most_prolific", Author.most_prolific),
+        ("Author.save", lambda: Author(unique("Bench Author")).save()),
+        ("Author.add_article", lambda: typical_author.add_article(typical_magazine, unique("Bench Article"))),
+        ("Author.add_author_with_articles", lambda: Author.add_author_with_articles(
+            unique("Bench Author"), [{"title": f"Bench {i}", "magazine_id": typical_magazine.id} for i in range(10)])),
+        ("Author.bulk_create[1000]", lambda: Author.bulk_create(unique("Bulk Author") for _ in range(1000))),
+        # Magazine
+        ("Magazine.find_by_id", lambda: Magazine.find_by_id(next(magazine_ids))),
+        ("Magazine.find_by_name", lambda: Magazine.find_by_name(f"Magazine {next(magazine_ids):05d}")),
+        ("Magazine.find_by_category", lambda: Magazine.find_by_category(category)),
+        ("Magazine.articles[hot]", lambda: Magazine(hot_magazine.name, category, hot_magazine.id).articles()),
+        ("Magazine.iter_articles[hot]", lambda: drain(hot_magazine.iter_articles())),
+        ("Magazine.contributors[hot]", lambda: Magazine(hot_magazine.name, category, hot_magazine.id).contributors()),
+        ("Magazine.article_titles[hot]", lambda: hot_magazine.article_titles()),
+        ("Magazine.contributing_authors[hot]", lambda: hot_magazine.contributing_authors()),
+        ("Magazine.prefetch", lambda: Magazine.prefetch(
+            [Magazine(m.name, m.category, m.id) for m in some_magazines], "articles", "contributors")),
+        ("Magazine.load_with_contributors", lambda: Magazine.load_with_contributors([m.id for m in some_magazines])),
+        ("Magazine.leaderboard", lambda: Magazine.leaderboard(100)),
+        ("Magazine.top_publisher", Magazine.top_publisher),
+        ("Magazine.magazines_with_at_least_two_authors", Magazine.magazines_with_at_least_two_authors),
+        ("Magazine.save", lambda: Magazine(unique("Bench Magazine"), "Bench").save()),
+        ("Magazine.bulk_create[1000]", lambda: Magazine.bulk_create(
+            {"name": unique("Bulk Magazine"), "category": "Bench"} for _ in range(1000))),
+        # Article
+        ("Article.find_by_id", lambda: Article.find_by_id(next(article_ids))),
+        ("Article.find_by_title", lambda: Article.find_by_title(some_title)),
+        ("Article.search", lambda: Article.search(search_word)),
+        ("Article.search[prefix]", lambda: Article.search(search_word[:3])),
+        ("Article.find_by_author[hot]", lambda: Article.find_by_author(hot_author.id)),
+        ("Article.find_by_magazine[hot]", lambda: Article.find_by_magazine(hot_magazine.id)),
+        ("Article.iter_by_author[hot]", lambda: drain(Article.iter_by_author(hot_author.id))),
+        ("Article.iter_by_magazine[hot]", lambda: drain(Article.iter_by_magazine(hot_magazine.id))),
+        ("Article.page[first]", lambda: Article.page(magazine_id=hot_magazine.id)),
+        ("Article.page[deep]", lambda: Article.page(magazine_id=hot_magazine.id, after=deep_cursor)),
+        ("Article.save", lambda: Article(unique("Bench Article"), typical_author.id, typical_magazine.id).save()),
+        ("Article.bulk_create[1000]", lambda: Article.bulk_create(
+            (unique("Bulk Article"), typical_author.id, typical_magazine.id) for _ in range(1000))),
+        # Workflow
+        ("workflow.run_queries", _run_queries_workflow()),
+    ]
+    return cases
+
+
+def measure(fn, repeat: int, target: float):
+    start = time.perf_counter()
+    fn()  # warm-up (caches, leaderboards) and calibration
+    once = max(time.perf_counter() - start, 1e-7)
+    number = max(1, min(10_000, int(target / once)))
+    per_call = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - start) / number * 1000)
+    return {
+        "calls": number * repeat,
+        "min_ms": min(per_call),
+        "median_ms": statistics.median(per_call),
+        "mean_ms": statistics.fmean(per_call),
+        "stdev_ms": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+    }
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    print(f"\n{'case':<46} {'base ms':>10} {'now ms':>10} {'ratio':>7}")
+    for r in results:
+        base = baseline.get(r["name"])
+        if base:
+            ratio = r["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+            flag = "  slower" if ratio > 1.1 else ("  faster" if ratio < 0.9 else "")
+            print(f"{r['name']:<46} {base['median_ms']:>10.3f} {r['median_ms']:>10.3f} {ratio:>6.2f}x{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the model benchmark suite.")
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target", type=float, default=0.05, help="seconds per repeat")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--out", help="write JSON results to this file")
+    parser.add_argument("--compare", metavar="JSON", help="print ratios against an earlier --out file")
+    args = parser.parse_args(argv)
+
+    source = dataset(args.size, args.seed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = os.path.join(tmp, "bench.db")
+        shutil.copyfile(source, os.environ["DB_PATH"])
+        close_pools()
+        try:
+            for name, fn in build_cases(SIZES[args.size]):
+                if args.filter not in name:
+                    continue
+                result = {"name": name, **measure(fn, args.repeat, args.target)}
+                results.append(result)
+                print(f"{name:<46} {result['median_ms']:>10.3f} ms  (min {result['min_ms']:.3f}, "
+                      f"{result['calls']} calls)", file=sys.stderr)
+        finally:
+            close_pools()
+
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "dataset": {"size": args.size, "seed": args.seed, **SIZES[args.size]._asdict()},
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
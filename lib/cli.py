@@ -0,0 +1,175 @@
+"""
+articles-cli: command-line entry point.
+
+    articles-cli setup
+    articles-cli seed [--authors F --magazines F --articles F ...]
+    articles-cli maintenance check-counters
+    articles-cli migrate migrate [--to N]
+    articles-cli shards rebalance --shards 4
+    articles-cli author "Alice Walker"
+    articles-cli magazine "Tech Monthly"
+    articles-cli search "deep learn" -n 5
+    articles-cli top-authors -n 10 [--category Technology]
+    articles-cli top-magazines -n 10
+    articles-cli export out/graph [--parquet]
+    articles-cli report reports.jsonl --workers 8
+
+Only argparse is imported up front; each command imports the models and
+database modules it needs when it runs, so `--help` and cheap commands
+start fast (see benchmarks/bench_startup.py).
+"""
+import argparse
+import sys
+
+COMMANDS = {}
+
+
+def command(name, help):
+    def register(fn):
+        COMMANDS[name] = (fn, help)
+        return fn
+    return register
+
+
+@command("setup", "apply the schema and any pending migrations")
+def setup(args, rest):
+    from lib.db.seed import apply_schema
+
+    apply_schema()
+    print("Schema applied.")
+
+
+@command("seed", "import data (see: articles-cli seed --help)")
+def seed(args, rest):
+    from lib.db.seed import main
+
+    main(rest)
+
+
+@command("maintenance", "maintenance commands (see: articles-cli maintenance --help)")
+def maintenance(args, rest):
+    from lib.db.maintenance import main
+
+    main(rest)
+
+
+@command("report", "JSONL reports for every author and magazine (see: articles-cli report --help)")
+def report(args, rest):
+    from lib.reports import main
+
+    main(rest)
+
+
+@command("migrate", "schema migrations (see: articles-cli migrate --help)")
+def migrate(args, rest):
+    from lib.db.migrations import main
+
+    main(rest)
+
+
+@command("shards", "sharded article storage (see: articles-cli shards --help)")
+def shards(args, rest):
+    from lib.db.shards import main
+
+    main(rest)
+
+
+@command("author", "an author's articles, magazines and topics")
+def author(args, rest):
+    from lib.models.author import Author
+
+    found = Author.find_by_name(args.name)
+    if found is None:
+        sys.exit(f"No author named {args.name!r}")
+    print(f"{found.name} (id {found.id})")
+    print("Articles:")
+    for a in found.articles():
+        print(f"  - {a['title']}")
+    print("Magazines:")
+    for m in found.magazines():
+        print(f"  - {m['name']} ({m['category']})")
+    print("Topic areas:", ", ".join(found.topic_areas()))
+
+
+@command("magazine", "a magazine's contributors and article titles")
+def magazine(args, rest):
+    from lib.models.magazine import Magazine
+
+    found = Magazine.find_by_name(args.name)
+    if found is None:
+        sys.exit(f"No magazine named {args.name!r}")
+    print(f"{found.name} [{found.category}] (id {found.id})")
+    print("Contributors:")
+    for a in found.contributors():
+        print(f"  - {a['name']}")
+    print("Articles:")
+    for title in found.article_titles():
+        print(f"  - {title}")
+
+
+@command("search", "full-text search over article titles")
+def search(args, rest):
+    from lib.models.article import Article
+
+    for a in Article.search(args.query, limit=args.n):
+        print(f"{a.id}\t{a.title}")
+
+
+@command("top-authors", "authors with the most articles")
+def top_authors(args, rest):
+    from lib.models.author import Author
+
+    for a, count in Author.leaderboard(args.n, args.category):
+        print(f"{count}\t{a.name}")
+
+
+@command("top-magazines", "magazines with the most articles")
+def top_magazines(args, rest):
+    from lib.models.magazine import Magazine
+
+    for m, count in Magazine.leaderboard(args.n):
+        print(f"{count}\t{m.name}")
+
+
+@command("export", "write a columnar snapshot (numpy; --parquet needs pyarrow)")
+def export(args, rest):
+    from lib.db.columnar import snapshot
+
+    snap = snapshot()
+    if args.parquet:
+        snap.write_parquet(args.directory)
+    else:
+        snap.save(args.directory)
+    print(f"{snap!r} written to {args.directory}")
+
+
+DELEGATED = ("seed", "maintenance", "migrate", "report", "shards")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="articles-cli", description="Articles database CLI")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+    parsers = {name: sub.add_parser(name, help=help, add_help=name not in DELEGATED)
+               for name, (_, help) in COMMANDS.items()}
+    parsers["author"].add_argument("name")
+    parsers["magazine"].add_argument("name")
+    parsers["search"].add_argument("query")
+    parsers["search"].add_argument("-n", type=int, default=20)
+    parsers["top-authors"].add_argument("-n", type=int, default=10)
+    parsers["top-authors"].add_argument("--category")
+    parsers["top-magazines"].add_argument("-n", type=int, default=10)
+    parsers["export"].add_argument("directory")
+    parsers["export"].add_argument("--parquet", action="store_true", help="write Parquet instead of .npy files")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if rest and args.command not in DELEGATED:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    COMMANDS[args.command][0](args, rest)
+
+
+if __name__ == "__main__":
+    main()
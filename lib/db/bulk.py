@@ -0,0 +1,65 @@
+import itertools
+import os
+
+from lib.db.connection import write_connection
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("DB_BULK_CHUNK_SIZE", "5000"))
+
+
+def chunked(iterable, size: int):
+    """
+    Yields lists of at most `size` items without materialising the input.
+    """
+    if size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_insert(sql: str, items, to_params, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                return_ids: bool = False, on_insert=None):
+    """
+    Streams `items` through `executemany(sql, ...)` in chunks, all inside one
+    write transaction (rolled back as a whole on error).
+
+    to_params: converts one item into the parameter tuple for `sql`.
+    return_ids: return the new row ids (in input order) instead of a count.
+      Ids are derived from last_insert_rowid() per chunk, which is exact
+      because the write lock is held for the whole transaction (BEGIN
+      IMMEDIATE) and every table uses AUTOINCREMENT. Not valid for
+      INSERT OR IGNORE statements, where skipped rows consume no id.
+    on_insert: optional callback(item, new_id), e.g. to set ids on models.
+      Called only once the transaction has committed, so a failing chunk
+      leaves no item with the id of a rolled-back row.
+    """
+    if (return_ids or on_insert) and " OR IGNORE " in sql.upper():
+        raise ValueError("Row ids cannot be returned for INSERT OR IGNORE")
+    want_ids = return_ids or on_insert is not None
+    ids = []
+    inserted = []  # (item, new_id) for on_insert, after the commit
+    count = 0
+    with write_connection() as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cur = conn.cursor()
+            for chunk in chunked(items, chunk_size):
+                cur.executemany(sql, [to_params(item) for item in chunk])
+                count += len(chunk)
+                if want_ids:
+                    last = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                    chunk_ids = range(last - len(chunk) + 1, last + 1)
+                    if on_insert:
+                        inserted.extend(zip(chunk, chunk_ids))
+                    if return_ids:
+                        ids.extend(chunk_ids)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    for item, new_id in inserted:
+        on_insert(item, new_id)
+    return ids if return_ids else count
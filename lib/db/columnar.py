@@ -0,0 +1,277 @@
+"""
+Columnar snapshot of the articles graph for analytics.
+
+    snap = columnar.snapshot()              # needs numpy
+    snap.most_prolific(), snap.top_publisher()
+    snap.authors_per_magazine()             # aligned with snap.magazine_id
+    snap.save("out/graph")                  # one .npy per column
+    snap = columnar.Snapshot.load("out/graph")          # memory-mapped
+    snap.write_parquet("out/pq")                        # needs pyarrow
+
+The three tables are read in one read transaction, in batches, straight
+into integer arrays: ids are int32 (int64 if they outgrow it) and magazine
+categories are dictionary-encoded as codes into `categories`. Aggregates
+are computed with bincount/unique over those arrays instead of per-row
+Python loops, and answer with ids; use find_many() to load the models.
+"""
+import os
+from functools import cached_property
+
+try:
+    import numpy as np
+except ImportError:  # optional: pip install "articles-cli[analytics]"
+    np = None
+
+from lib.db import shards
+from lib.db.connection import read_connection
+
+BATCH_SIZE = int(os.getenv("DB_EXPORT_BATCH_SIZE", "65536"))
+
+COLUMNS = (
+    "article_id", "article_author", "article_magazine",
+    "author_id", "author_name",
+    "magazine_id", "magazine_name", "magazine_category", "categories",
+)
+
+
+def _require(module, name, extra):
+    if module is None:
+        raise ImportError(f"{name} is required for this: pip install \"articles-cli[{extra}]\"")
+    return module
+
+
+def _id_dtype(max_id):
+    return np.int32 if max_id < 2 ** 31 else np.int64
+
+
+def _read_ints(conn, sql, width):
+    """
+    (n, width) array of the integer columns `sql` selects, read `BATCH_SIZE`
+    rows at a time.
+    """
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(sql)
+    batches = []
+    while True:
+        rows = cur.fetchmany(BATCH_SIZE)
+        if not rows:
+            break
+        batches.append(np.array(rows, dtype=np.int64))
+    if not batches:
+        return np.empty((0, width), dtype=np.int32)
+    ints = np.concatenate(batches)
+    return ints.astype(_id_dtype(ints.max(initial=0)))
+
+
+def _read_strings(conn, sql):
+    """
+    The id column of `sql` as an array, followed by one fixed-width string
+    array per remaining column.
+    """
+    cur = conn.cursor()
+    cur.row_factory = None
+    columns = list(zip(*cur.execute(sql).fetchall())) or [(), *([()] * (len(cur.description) - 1))]
+    ids = np.array(columns[0], dtype=np.int64)
+    return (ids.astype(_id_dtype(ids.max(initial=0))), *(np.array(c, dtype=str) for c in columns[1:]))
+
+
+def snapshot():
+    """
+    Reads authors, magazines and articles into a Snapshot. All three come
+    from the same read transaction, so the arrays are mutually consistent.
+    """
+    _require(np, "numpy", "analytics")
+    shards.require_unsharded("The columnar snapshot")
+    with read_connection() as conn:
+        conn.execute("BEGIN")
+        try:
+            articles = _read_ints(conn, "SELECT id, author_id, magazine_id FROM articles ORDER BY id", 3)
+            author_id, author_name = _read_strings(conn, "SELECT id, name FROM authors ORDER BY id")
+            magazine_id, magazine_name, category = _read_strings(
+                conn, "SELECT id, name, category FROM magazines ORDER BY id")
+        finally:
+            conn.rollback()
+    categories, codes = np.unique(category, return_inverse=True)
+    return Snapshot(
+        article_id=articles[:, 0].copy(), article_author=articles[:, 1].copy(),
+        article_magazine=articles[:, 2].copy(),
+        author_id=author_id, author_name=author_name,
+        magazine_id=magazine_id, magazine_name=magazine_name,
+        magazine_category=codes.astype(np.int32), categories=categories,
+    )
+
+
+class Snapshot:
+    """
+    Column arrays (see COLUMNS); id columns are sorted ascending.
+    """
+
+    def __init__(self, **columns):
+        missing = set(COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}")
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __repr__(self):
+        return (f"<Snapshot {len(self.article_id)} articles, {len(self.author_id)} authors, "
+                f"{len(self.magazine_id)} magazines>")
+
+    # -- positions -----------------------------------------------------------
+
+    @cached_property
+    def _author_pos(self):
+        # position of each article's author in author_id
+        return np.searchsorted(self.author_id, self.article_author)
+
+    @cached_property
+    def _magazine_pos(self):
+        return np.searchsorted(self.magazine_id, self.article_magazine)
+
+    @cached_property
+    def _pairs(self):
+        """
+        Distinct (magazine position, author position) pairs with their
+        article counts, sorted by magazine then author.
+        """
+        key = self._magazine_pos.astype(np.int64) * len(self.author_id) + self._author_pos
+        pairs, counts = np.unique(key, return_counts=True)
+        return pairs // len(self.author_id), pairs % len(self.author_id), counts
+
+    # -- aggregates ----------------------------------------------------------
+
+    def articles_per_author(self):
+        """
+        Article count for each author, aligned with author_id.
+        """
+        return np.bincount(self._author_pos, minlength=len(self.author_id))
+
+    def articles_per_magazine(self):
+        return np.bincount(self._magazine_pos, minlength=len(self.magazine_id))
+
+    def authors_per_magazine(self):
+        """
+        Distinct contributors for each magazine, aligned with magazine_id.
+        """
+        mags, _, _ = self._pairs
+        return np.bincount(mags, minlength=len(self.magazine_id))
+
+    def articles_per_category(self) -> dict:
+        per_category = np.bincount(self.magazine_category[self._magazine_pos],
+                                   minlength=len(self.categories))
+        return dict(zip(self.categories.tolist(), per_category.tolist()))
+
+    def most_prolific(self):
+        """
+        Id of the author with the most articles (lowest id on ties), or None.
+        """
+        if not len(self.author_id):
+            return None
+        return int(self.author_id[np.argmax(self.articles_per_author())])
+
+    def top_publisher(self):
+        """
+        Id of the magazine with the most articles (lowest id on ties), or None.
+        """
+        if not len(self.magazine_id):
+            return None
+        return int(self.magazine_id[np.argmax(self.articles_per_magazine())])
+
+    def magazines_with_at_least_two_authors(self):
+        return self.magazine_id[self.authors_per_magazine() >= 2]
+
+    def contributing_pairs(self, threshold: int = 2):
+        """
+        (magazine_ids, author_ids, counts) for every author with more than
+        `threshold` articles in a magazine; contributing_authors for all
+        magazines at once.
+        """
+        mags, authors, counts = self._pairs
+        keep = counts > threshold
+        return self.magazine_id[mags[keep]], self.author_id[authors[keep]], counts[keep]
+
+    def contributing_authors(self, magazine_id: int, threshold: int = 2):
+        """
+        (author_ids, counts) of authors with more than `threshold` articles
+        in the magazine.
+        """
+        mags, authors, counts = self._pairs
+        pos = np.searchsorted(self.magazine_id, magazine_id)
+        if pos == len(self.magazine_id) or self.magazine_id[pos] != magazine_id:
+            return self.author_id[:0], counts[:0]
+        lo, hi = np.searchsorted(mags, [pos, pos + 1])
+        keep = counts[lo:hi] > threshold
+        return self.author_id[authors[lo:hi][keep]], counts[lo:hi][keep]
+
+    # -- snapshots -----------------------------------------------------------
+
+    def save(self, directory: str):
+        """
+        Writes one .npy file per column. Unlike an .npz archive these can be
+        memory-mapped on load.
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in COLUMNS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True):
+        """
+        Reads a snapshot written by save(). With `mmap` the arrays are
+        read-only views of the files and pages are loaded on first access.
+        """
+        _require(np, "numpy", "analytics")
+        mode = "r" if mmap else None
+        return cls(**{name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+                      for name in COLUMNS})
+
+    def write_parquet(self, directory: str):
+        """
+        Writes articles.parquet, authors.parquet and magazines.parquet, with
+        the magazine category as a dictionary column.
+        """
+        pa, pq = _pyarrow()
+        os.makedirs(directory, exist_ok=True)
+        pq.write_table(pa.table({
+            "id": self.article_id, "author_id": self.article_author, "magazine_id": self.article_magazine,
+        }), os.path.join(directory, "articles.parquet"))
+        pq.write_table(pa.table({"id": self.author_id, "name": self.author_name}),
+                       os.path.join(directory, "authors.parquet"))
+        category = pa.DictionaryArray.from_arrays(
+            pa.array(self.magazine_category, type=pa.int32()), pa.array(self.categories))
+        pq.write_table(pa.table({"id": self.magazine_id, "name": self.magazine_name, "category": category}),
+                       os.path.join(directory, "magazines.parquet"))
+
+    @classmethod
+    def read_parquet(cls, directory: str):
+        pa, pq = _pyarrow()
+
+        def read(name, **kwargs):
+            table = pq.read_table(os.path.join(directory, f"{name}.parquet"), memory_map=True, **kwargs)
+            return {col: table.column(col).combine_chunks() for col in table.column_names}
+
+        articles, authors = read("articles"), read("authors")
+        magazines = read("magazines", read_dictionary=["category"])
+        category = magazines["category"]
+        return cls(
+            article_id=articles["id"].to_numpy(), article_author=articles["author_id"].to_numpy(),
+            article_magazine=articles["magazine_id"].to_numpy(),
+            author_id=authors["id"].to_numpy(),
+            author_name=np.array(authors["name"].to_pylist(), dtype=str),
+            magazine_id=magazines["id"].to_numpy(),
+            magazine_name=np.array(magazines["name"].to_pylist(), dtype=str),
+            magazine_category=category.indices.to_numpy().astype(np.int32),
+            categories=np.array(category.dictionary.to_pylist(), dtype=str),
+        )
+
+
+def _pyarrow():
+    _require(np, "numpy", "analytics")
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        pa = None
+    _require(pa, "pyarrow", "parquet")
+    return pa, pq
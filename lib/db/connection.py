@@ -1,12 +1,364 @@
-# lib/db/connection.py
 import os
 import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple
+
+from lib.db import profile, querycount
 
 # Project root (two levels up from this file: lib/db -> lib -> project root)
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 DB_PATH = os.getenv("DB_PATH", os.path.join(PROJECT_ROOT, "articles.db"))
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ("1", "true", "yes", "on")
+
+
+class DBConfig(NamedTuple):
+    """
+    Per-connection SQLite settings. Defaults can be overridden with the
+    DB_* environment variables next to DB_PATH, or with configure().
+    (A NamedTuple rather than a dataclass: it is immutable as well and
+    keeps `dataclasses`/`inspect` out of CLI startup.)
+    """
+    journal_mode: str = "wal"
+    synchronous: str = "normal"
+    cache_size: int = -64000        # negative = KiB, so ~64 MB of page cache
+    mmap_size: int = 256 * 1024 * 1024
+    busy_timeout: int = 5000        # ms
+    foreign_keys: bool = True
+    read_pool_size: int = POOL_SIZE
+    read_only_readers: bool = True  # open readers with mode=ro
+    cached_statements: int = 512    # prepared statements kept per connection (sqlite3 default: 128)
+    shards: int = 0                 # >0: articles live in this many shard files (lib/db/shards.py)
+
+    @classmethod
+    def from_env(cls):
+        default = cls()
+        return cls(
+            journal_mode=os.getenv("DB_JOURNAL_MODE", default.journal_mode),
+            synchronous=os.getenv("DB_SYNCHRONOUS", default.synchronous),
+            cache_size=int(os.getenv("DB_CACHE_SIZE", default.cache_size)),
+            mmap_size=int(os.getenv("DB_MMAP_SIZE", default.mmap_size)),
+            busy_timeout=int(os.getenv("DB_BUSY_TIMEOUT", default.busy_timeout)),
+            foreign_keys=_env_bool("DB_FOREIGN_KEYS", default.foreign_keys),
+            read_pool_size=int(os.getenv("DB_READ_POOL_SIZE", default.read_pool_size)),
+            read_only_readers=_env_bool("DB_READ_ONLY_READERS", default.read_only_readers),
+            cached_statements=int(os.getenv("DB_CACHED_STATEMENTS", default.cached_statements)),
+            shards=int(os.getenv("DB_SHARDS", default.shards)),
+        )
+
+
+_config = DBConfig.from_env()
+
+
+def get_config() -> DBConfig:
+    return _config
+
+
+def configure(config: DBConfig = None, **changes) -> DBConfig:
+    """
+    Replaces the connection settings (or just some fields of them) and
+    closes existing pools so new connections pick them up.
+    """
+    global _config
+    _config = (config or _config)._replace(**changes)
+    close_pools()
+    return _config
+
+
+def current_db_path():
+    """
+    DB_PATH is re-read from the environment so that tests (and scripts) that
+    set it after import still get the database they asked for.
+    """
+    return os.getenv("DB_PATH", DB_PATH)
+
+
+def shard_path(shard: int, catalog: str = None) -> str:
+    """
+    File of shard number `shard`, next to the catalog database (DB_PATH):
+    articles.db -> articles.shard0.db, articles.shard1.db, ...
+    """
+    root, ext = os.path.splitext(catalog or current_db_path())
+    return f"{root}.shard{shard}{ext or '.db'}"
+
+
+def _uri_path(path):
+    # The characters that are special in the path part of an SQLite URI.
+    return path.replace("%", "%25").replace("?", "%3f").replace("#", "%23")
+
+
+def _connect(path, config: DBConfig = None, readonly: bool = False, attach=None):
+    """
+    attach: optional {alias: path} of databases to ATTACH, always read-only:
+    BEGIN IMMEDIATE takes the write lock of every attached database that
+    can be written, and the attached ones have writers of their own.
+    """
+    config = config or _config
+    # Pooled connections are handed between threads, but only ever used by
+    # one thread at a time (the pool guarantees that).
+    options = dict(check_same_thread=False, cached_statements=config.cached_statements,
+                   factory=profile.connection_factory())
+    if readonly:
+        conn = sqlite3.connect(f"file:{_uri_path(path)}?mode=ro", uri=True, **options)
+    elif attach:
+        # URI filenames in ATTACH only work on a connection opened as a URI
+        conn = sqlite3.connect(f"file:{_uri_path(path)}", uri=True, **options)
+    else:
+        conn = sqlite3.connect(path, **options)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA busy_timeout = {int(config.busy_timeout)}")
+    conn.execute(f"PRAGMA foreign_keys = {'ON' if config.foreign_keys else 'OFF'}")
+    conn.execute(f"PRAGMA cache_size = {int(config.cache_size)}")
+    conn.execute(f"PRAGMA mmap_size = {int(config.mmap_size)}")
+    if not readonly:
+        # journal_mode is stored in the database file; readers inherit it
+        conn.execute(f"PRAGMA journal_mode = {config.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {config.synchronous}")
+    for alias, other in (attach or {}).items():
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (f"file:{_uri_path(other)}?mode=ro",))
     return conn
+
+
+def get_connection():
+    """
+    Opens a new, unpooled connection. The caller is responsible for closing it.
+    Kept for scripts and old callers; model code should use `read_connection()`
+    or `write_connection()`.
+    """
+    return _connect(current_db_path())
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+_CREATE = object()  # handed to a waiter instead of a connection: open a new one
+
+
+class _Waiter:
+    __slots__ = ("ready", "conn")
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.conn = None
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections to a single database file (plus the
+    databases in `attach`, see _connect).
+
+    Connections are created lazily up to `max_size`. A connection is checked
+    with a cheap `SELECT 1` before it is handed out and replaced if it is
+    broken. Any transaction left open by a caller is rolled back on release.
+    readonly: open connections with the `mode=ro` URI.
+    """
+
+    def __init__(self, path: str, max_size: int = POOL_SIZE, timeout: float = POOL_TIMEOUT,
+                 readonly: bool = False, config: DBConfig = None, attach=None):
+        if max_size < 1:
+            raise ValueError("Pool max_size must be at least 1")
+        self.path = path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.readonly = readonly
+        self.config = config or _config
+        self.attach = attach
+        self._idle = []
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def __repr__(self):
+        mode = " ro" if self.readonly else ""
+        return f"<ConnectionPool {self.path}{mode} ({self._created}/{self.max_size})>"
+
+    def _new_connection(self):
+        return _connect(self.path, self.config, self.readonly, self.attach)
+
+    @staticmethod
+    def _healthy(conn) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self, blocking: bool = True):
+        """
+        blocking=False: return None instead of waiting when every
+        connection is checked out.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        waiter = None
+        with self._lock:
+            if self._idle and not self._waiters:
+                conn = self._idle.pop()
+            elif self._created < self.max_size:
+                self._created += 1
+                conn = _CREATE
+            elif not blocking:
+                return None
+            else:
+                waiter = _Waiter()
+                self._waiters.append(waiter)
+        if waiter is not None:
+            conn = self._wait(waiter)
+        if conn is _CREATE:
+            try:
+                conn = self._new_connection()
+            except Exception:
+                self._forget_one()
+                raise
+        elif not self._healthy(conn):
+            self._discard(conn)
+            return self.acquire(blocking)
+        conn.set_trace_callback(querycount.trace_callback())
+        return conn
+
+    def _wait(self, waiter):
+        # Released connections are handed to waiters in FIFO order, so a
+        # thread that keeps re-acquiring can't starve the ones queued behind it.
+        if not waiter.ready.wait(self.timeout):
+            with self._lock:
+                if waiter.conn is None:
+                    self._waiters.remove(waiter)
+                    raise PoolTimeout(f"No connection available after {self.timeout}s")
+        return waiter.conn
+
+    def _hand_over(self, conn):
+        # caller holds self._lock
+        if self._waiters:
+            waiter = self._waiters.popleft()
+            waiter.conn = conn
+            waiter.ready.set()
+            return True
+        return False
+
+    def release(self, conn):
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.set_trace_callback(None)
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        with self._lock:
+            if not self._hand_over(conn):
+                self._idle.append(conn)
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._forget_one()
+
+    def _forget_one(self):
+        # A slot was freed; let the next waiter open a fresh connection.
+        with self._lock:
+            if self._closed or not self._hand_over(_CREATE):
+                self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """
+        Closes idle connections. Connections still checked out are closed when
+        they are released.
+        """
+        self._closed = True
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str = None, readonly: bool = False, shard: int = None) -> ConnectionPool:
+    """
+    Returns the process-wide pool for `path` (defaults to the current DB_PATH),
+    or for shard number `shard` of it, whose connections have the catalog
+    (DB_PATH) attached read-only as `catalog`.
+
+    There is one writer pool per database holding a single connection, so
+    writers queue in-process instead of fighting over SQLite's write lock,
+    and a pool of `read_pool_size` reader connections (read-only unless
+    read_only_readers is off). With WAL, readers never wait for the writer.
+    """
+    attach = None
+    if shard is not None:
+        attach = {"catalog": path or current_db_path()}
+        path = shard_path(shard, attach["catalog"])
+    path = path or current_db_path()
+    key = (path, readonly)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                config = _config
+                if readonly:
+                    pool = ConnectionPool(path, max_size=config.read_pool_size,
+                                          readonly=config.read_only_readers, config=config, attach=attach)
+                else:
+                    pool = ConnectionPool(path, max_size=1, config=config, attach=attach)
+                _pools[key] = pool
+    return pool
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+@contextmanager
+def read_connection(shard: int = None):
+    """
+    Borrow a pooled reader connection for the current DB_PATH (or for one
+    of its shards):
+
+        with read_connection() as conn:
+            conn.execute("SELECT ...")
+    """
+    with get_pool(readonly=True, shard=shard).connection() as conn:
+        yield conn
+
+
+@contextmanager
+def write_connection(shard: int = None):
+    """
+    Borrow the writer connection for the current DB_PATH (or for one of its
+    shards). Only one thread holds it at a time; do not request another
+    connection for writing to the same database while holding it.
+    """
+    with get_pool(shard=shard).connection() as conn:
+        yield conn
+
+
+# Before the read/write split every caller used connection(); it hands out
+# the writer so existing read-modify-write code keeps working.
+connection = write_connection
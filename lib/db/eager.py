@@ -0,0 +1,65 @@
+import json
+from collections import defaultdict
+from typing import NamedTuple
+
+from lib.db import session
+from lib.db.connection import read_connection
+
+# Id lists are bound as a single JSON parameter, so a batch of any size is
+# one statement and never hits SQLite's bound-variable limit.
+IN_IDS = "IN (SELECT value FROM json_each(?))"
+
+
+def fetch_in(conn, sql: str, ids):
+    """
+    Runs `sql` (which must contain one IN_IDS placeholder) for a list of ids.
+    """
+    return conn.execute(sql, (json.dumps(list(ids)),)).fetchall()
+
+
+def group_by(rows, column: str) -> dict:
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row[column]].append(row)
+    return groups
+
+
+def check_relations(relations, allowed):
+    unknown = set(relations) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown relation(s): {', '.join(sorted(unknown))}")
+
+
+class Found(NamedTuple):
+    """
+    Result of a multi-get: `items` in the order the keys were given (one per
+    key, repeated for repeated keys), and the keys that matched nothing.
+    """
+    items: list
+    missing: list
+
+
+def collect(keys, index: dict) -> Found:
+    items = [index[k] for k in keys if k in index]
+    missing = list(dict.fromkeys(k for k in keys if k not in index))
+    return Found(items, missing)
+
+
+def load_many(cls, sql: str, ids) -> Found:
+    """
+    cls.find_by_id for many ids: instances already in the session/shared
+    cache are reused and the rest are read with one IN_IDS query, so the
+    cost is at most one query for any number of ids.
+    """
+    ids = list(ids)
+    index = {}
+    for i in ids:
+        obj = session.lookup(cls, i)
+        if obj is not None:
+            index[i] = obj
+    todo = [i for i in dict.fromkeys(ids) if i not in index]
+    if todo:
+        with read_connection() as conn:
+            for row in fetch_in(conn, sql, todo):
+                index[row["id"]] = session.remember(cls.from_row(row))
+    return collect(ids, index)
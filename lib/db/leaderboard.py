@@ -0,0 +1,276 @@
+"""
+In-memory top-N rankings of authors and magazines by article count.
+
+The rankings are loaded once from the counter tables (see schema.sql) and
+then updated incrementally by the model write paths in this process, so a
+top-N read is a slice of an already sorted list.
+
+A write path brackets its transaction and its record_articles() call with
+writing() (or submit() for a WriteQueue). A load waits until no bracketed
+write is in flight and keeps new ones out while it reads, so a delta is
+never applied on top of a snapshot that already contains it.
+
+Writes made by other processes (or connections outside the pool) are
+noticed through `PRAGMA data_version` on the pool's writer connection,
+checked at most every `check_interval` seconds: unlike on any other
+connection, it only moves for commits made elsewhere. A change reloads.
+`max_age` additionally reloads every that many seconds, if set.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from lib.db.connection import get_pool, read_connection
+
+MAX_AGE = float(os.getenv("LEADERBOARD_MAX_AGE", "0")) or None
+CHECK_INTERVAL = float(os.getenv("LEADERBOARD_CHECK_INTERVAL", "1.0"))
+
+
+class Ranking:
+    """
+    Keys ordered by score (descending), then key (ascending).
+    Updates are O(log n) searches plus a list insert/delete.
+    """
+
+    def __init__(self, scores=None):
+        self._scores = dict(scores or {})
+        self._order = sorted((-score, key) for key, score in self._scores.items())
+
+    def __len__(self):
+        return len(self._scores)
+
+    def score(self, key):
+        return self._scores.get(key)
+
+    def set(self, key, score):
+        old = self._scores.get(key)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (-old, key))]
+        self._scores[key] = score
+        bisect.insort(self._order, (-score, key))
+
+    def add(self, key, delta=1):
+        self.set(key, self._scores.get(key, 0) + delta)
+
+    def top(self, n: int):
+        """
+        The first n (key, score) pairs plus any further keys tied with the
+        n-th score, unless that score is 0: every author or magazine without
+        articles would tie. Cost is proportional to the number of pairs
+        returned.
+        """
+        if n < 1:
+            return []
+        result = [(key, -neg) for neg, key in self._order[:n]]
+        if len(result) == n and result[-1][1] > 0:
+            cutoff = -result[-1][1]
+            for neg, key in self._order[n:]:
+                if neg != cutoff:
+                    break
+                result.append((key, -neg))
+        return result
+
+
+class Leaderboards:
+    def __init__(self, max_age: float = MAX_AGE, check_interval: float = CHECK_INTERVAL):
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._in_flight = 0     # bracketed writes between begin and end
+        self._loading = False
+        self._loaded_at = None
+        self._checked_at = None
+        self._version = None    # (writer connection, its data_version)
+        self.data_version_changes = 0
+        self.authors = None
+        self.magazines = None
+        self.authors_by_category = None
+        self._magazine_category = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    # -- write brackets -----------------------------------------------------
+
+    def begin_write(self):
+        with self._lock:
+            while self._loading:
+                self._idle.wait()
+            self._in_flight += 1
+
+    def end_write(self):
+        with self._lock:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.notify_all()
+
+    # -- loading ------------------------------------------------------------
+
+    def load(self):
+        """
+        Reloads the rankings once no bracketed write is in flight, blocking
+        new ones until it is done.
+        """
+        with self._lock:
+            self._loading = True
+            try:
+                while self._in_flight:
+                    self._idle.wait()
+                self._read()
+            finally:
+                self._loading = False
+                self._idle.notify_all()
+
+    def _read(self):
+        with read_connection() as conn:
+            authors = {r[0]: r[1] for r in conn.execute("SELECT author_id, article_count FROM author_stats")}
+            magazines = {r[0]: r[1] for r in conn.execute("SELECT magazine_id, article_count FROM magazine_stats")}
+            categories = {r[0]: r[1] for r in conn.execute("SELECT id, category FROM magazines")}
+            by_category = {}
+            for r in conn.execute("""
+                SELECT m.category, s.author_id, SUM(s.article_count)
+                FROM author_magazine_stats s
+                JOIN magazines m ON m.id = s.magazine_id
+                GROUP BY m.category, s.author_id
+            """):
+                by_category.setdefault(r[0], {})[r[1]] = r[2]
+        with self._lock:
+            self.authors = Ranking(authors)
+            self.magazines = Ranking(magazines)
+            self.authors_by_category = {cat: Ranking(scores) for cat, scores in by_category.items()}
+            self._magazine_category = categories
+            self._loaded_at = time.monotonic()
+
+    def _changed_elsewhere(self) -> bool:
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return False
+        pool = get_pool()
+        conn = pool.acquire(blocking=False)
+        if conn is None:
+            return False  # this process is writing; check next time
+        try:
+            version = (conn, conn.execute("PRAGMA data_version").fetchone()[0])
+        finally:
+            pool.release(conn)
+        self._checked_at = now
+        # a new writer connection (pools closed, DB_PATH changed) has its own count
+        changed = self._version is not None and (
+            version[0] is not self._version[0] or version[1] != self._version[1])
+        self._version = version
+        if changed:
+            self.data_version_changes += 1
+        return changed
+
+    def _ensure_loaded(self):
+        changed = self._changed_elsewhere()
+        if changed or self._loaded_at is None or (
+            self.max_age is not None and time.monotonic() - self._loaded_at > self.max_age
+        ):
+            self.load()
+
+    def top_authors(self, n: int, category: str = None):
+        with self._lock:
+            self._ensure_loaded()
+            if category is None:
+                return self.authors.top(n)
+            ranking = self.authors_by_category.get(category)
+            return ranking.top(n) if ranking else []
+
+    def top_magazines(self, n: int):
+        with self._lock:
+            self._ensure_loaded()
+            return self.magazines.top(n)
+
+    # -- write hooks, called by the models after a successful commit --------
+
+    def record_articles(self, deltas):
+        """
+        deltas: mapping {(author_id, magazine_id): change in article count};
+        negative for articles moved away from that pair.
+        """
+        with self._lock:
+            if not self.loaded:
+                return
+            for (author_id, magazine_id), n in deltas.items():
+                category = self._magazine_category.get(magazine_id)
+                if category is None:
+                    # magazine created elsewhere; reload rather than guess
+                    self._loaded_at = None
+                    return
+                self.authors.add(author_id, n)
+                self.magazines.add(magazine_id, n)
+                self.authors_by_category.setdefault(category, Ranking()).add(author_id, n)
+
+    def author_added(self, author_id):
+        with self._lock:
+            if self.loaded and self.authors.score(author_id) is None:
+                self.authors.set(author_id, 0)
+
+    def magazine_added(self, magazine_id, category):
+        with self._lock:
+            if self.loaded and self.magazines.score(magazine_id) is None:
+                self.magazines.set(magazine_id, 0)
+                self._magazine_category[magazine_id] = category
+
+
+boards = Leaderboards()
+
+
+@contextmanager
+def writing():
+    """
+    Brackets a write transaction and the record_articles() call after it:
+
+        with leaderboard.writing():
+            ...commit...
+            leaderboard.record_articles(deltas)
+    """
+    boards.begin_write()
+    try:
+        yield
+    finally:
+        boards.end_write()
+
+
+def submit(writer, work, on_commit=None):
+    """
+    writer.submit() (lib.db.writer.WriteQueue) bracketed like writing(),
+    until the returned future is done.
+    """
+    boards.begin_write()
+    try:
+        future = writer.submit(work, on_commit=on_commit)
+    except BaseException:
+        boards.end_write()
+        raise
+    future.add_done_callback(lambda f: boards.end_write())
+    return future
+
+
+def article_added(author_id, magazine_id, n: int = 1):
+    boards.record_articles({(author_id, magazine_id): n})
+
+
+def record_articles(deltas):
+    boards.record_articles(deltas)
+
+
+def author_added(author_id):
+    boards.author_added(author_id)
+
+
+def magazine_added(magazine_id, category):
+    boards.magazine_added(magazine_id, category)
+
+
+def invalidate():
+    boards.invalidate()
@@ -0,0 +1,147 @@
+"""
+Maintenance commands for derived data kept alongside the core tables.
+
+    python -m lib.db.maintenance rebuild-counters
+    python -m lib.db.maintenance rebuild-search
+    python -m lib.db.maintenance check-counters
+"""
+import argparse
+import sys
+import time
+
+from lib.db import leaderboard, resultcache
+from lib.db.connection import read_connection, write_connection
+
+REBUILD_COUNTERS = [
+    "DELETE FROM author_magazine_stats",
+    "DELETE FROM author_stats",
+    "DELETE FROM magazine_stats",
+    """
+    INSERT INTO author_magazine_stats (author_id, magazine_id, article_count)
+    SELECT author_id, magazine_id, COUNT(*) FROM articles
+    GROUP BY author_id, magazine_id
+    """,
+    """
+    INSERT INTO author_stats (author_id, article_count)
+    SELECT au.id, COALESCE(SUM(s.article_count), 0)
+    FROM authors au
+    LEFT JOIN author_magazine_stats s ON s.author_id = au.id
+    GROUP BY au.id
+    """,
+    """
+    INSERT INTO magazine_stats (magazine_id, article_count, author_count)
+    SELECT m.id, COALESCE(SUM(s.article_count), 0), COUNT(s.author_id)
+    FROM magazines m
+    LEFT JOIN author_magazine_stats s ON s.magazine_id = m.id
+    GROUP BY m.id
+    """,
+]
+
+
+def rebuild_counters():
+    """
+    Recomputes author_stats, magazine_stats and author_magazine_stats from
+    `articles` in one transaction. Needed once for databases created before
+    the counter triggers existed.
+    """
+    with write_connection() as conn:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for sql in REBUILD_COUNTERS:
+                conn.execute(sql)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    resultcache.invalidate()
+    leaderboard.invalidate()
+
+
+# Each query returns the rows whose stored counters disagree with `articles`
+# as (table, key, expected, stored).
+CHECK_COUNTERS = [
+    """
+    SELECT 'author_magazine_stats', author_id || ':' || magazine_id, expected, stored
+    FROM (
+        SELECT author_id, magazine_id, SUM(expected) AS expected, SUM(stored) AS stored
+        FROM (
+            SELECT author_id, magazine_id, 1 AS expected, NULL AS stored FROM articles
+            UNION ALL
+            SELECT author_id, magazine_id, 0, article_count FROM author_magazine_stats
+        )
+        GROUP BY author_id, magazine_id
+    )
+    WHERE stored IS NOT expected
+    """,
+    """
+    WITH actual AS MATERIALIZED (
+        SELECT author_id, COUNT(*) AS n FROM articles GROUP BY author_id
+    )
+    SELECT 'author_stats', au.id, COALESCE(a.n, 0), s.article_count
+    FROM authors au
+    LEFT JOIN actual a ON a.author_id = au.id
+    LEFT JOIN author_stats s ON s.author_id = au.id
+    WHERE s.article_count IS NOT COALESCE(a.n, 0)
+    """,
+    """
+    WITH actual AS MATERIALIZED (
+        SELECT magazine_id, COUNT(*) AS n, COUNT(DISTINCT author_id) AS authors
+        FROM articles GROUP BY magazine_id
+    )
+    SELECT 'magazine_stats', m.id,
+           COALESCE(a.n, 0) || '/' || COALESCE(a.authors, 0),
+           s.article_count || '/' || s.author_count
+    FROM magazines m
+    LEFT JOIN actual a ON a.magazine_id = m.id
+    LEFT JOIN magazine_stats s ON s.magazine_id = m.id
+    WHERE s.magazine_id IS NULL
+       OR s.article_count IS NOT COALESCE(a.n, 0)
+       OR s.author_count IS NOT COALESCE(a.authors, 0)
+    """,
+]
+
+
+
+def check_counters():
+    """
+    Verifies the counter tables, including the author_magazine_stats edge
+    table, against `articles`. Returns the mismatches as (table, key,
+    expected, stored); an empty list means they are consistent.
+    """
+    with read_connection() as conn:
+        return [tuple(r) for sql in CHECK_COUNTERS for r in conn.execute(sql)]
+
+
+def rebuild_search():
+    """
+    Re-indexes every article title into articles_fts. Needed once for
+    databases created before the full-text index existed.
+    """
+    with write_connection() as conn:
+        conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+        conn.commit()
+
+
+COMMANDS = {
+    "rebuild-counters": rebuild_counters,
+    "rebuild-search": rebuild_search,
+    "check-counters": check_counters,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Database maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    problems = COMMANDS[args.command]()
+    for table, key, expected, stored in problems or ():
+        print(f"{table} {key}: expected {expected}, stored {stored}")
+    print(f"{args.command} done in {time.perf_counter() - start:.2f}s")
+    if problems:
+        print(f"{len(problems)} inconsistent counter rows; fix with rebuild-counters")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Versioned schema migrations.
+
+    python -m lib.db.migrations status
+    python -m lib.db.migrations migrate [--to VERSION] [--no-explain]
+
+Applied versions are recorded in `schema_migrations`. Version 1 is
+schema.sql itself (idempotent, so it also adopts databases created before
+migrations existed); later versions add indexes or tables, or backfill
+derived tables once.
+
+Index migrations are built for a live database. SQLite cannot build an
+index incrementally: CREATE INDEX is one statement that holds the write lock
+until the whole index exists (readers are not blocked under WAL). What can
+be shortened is the time it holds that lock, so the table is first read in
+keyset batches of `prewarm_rows` through the writer connection, without
+taking the write lock and releasing the connection between batches so
+other writes interleave. The build then sorts from the page cache and the
+OS cache instead of from disk. The index is created and the version
+recorded in one short transaction. EXPLAIN QUERY PLAN for the statements
+the index is meant for is printed before and after.
+
+Script migrations are not built that way. On a database that already has
+articles, version 1 (schema.sql) builds its article indexes and version 6
+recomputes every counter and the whole search index, and writers wait
+while they run: version 1 holds the write lock for each CREATE statement,
+version 6 for its whole transaction. Readers are not blocked under WAL.
+Upgrade a large database at a quiet time; apply() prints how long each
+script ran.
+"""
+import argparse
+import datetime
+import os
+import time
+from typing import NamedTuple
+
+from lib.db import leaderboard, queries, resultcache
+from lib.db.connection import write_connection
+from lib.db.maintenance import CHECK_COUNTERS, REBUILD_COUNTERS
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema.sql")
+PREWARM_ROWS = int(os.getenv("DB_MIGRATE_PREWARM_ROWS", "100000"))
+
+
+class Index(NamedTuple):
+    name: str
+    table: str
+    columns: tuple
+
+    @property
+    def sql(self) -> str:
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table}({', '.join(self.columns)})"
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    index: Index = None
+    # (label, sql, params) of the statements whose plans the index changes
+    explain: tuple = ()
+    # SQL to run instead of schema.sql when there is no index
+    script: str = None
+
+    def run(self, conn):
+        if self.index is not None:
+            conn.execute(self.index.sql)
+        elif self.script is not None:
+            conn.executescript(self.script)
+        else:
+            with open(SCHEMA_PATH) as f:
+                conn.executescript(f.read())
+
+
+# Catalog side of lib/db/shards.py: which shard holds each magazine's
+# articles, and the article id sequence shared by all shards.
+SHARD_CATALOG = """
+CREATE TABLE IF NOT EXISTS magazine_shards (
+    magazine_id INTEGER PRIMARY KEY,
+    shard INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_magazine_shards_shard ON magazine_shards(shard, magazine_id);
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name TEXT PRIMARY KEY,
+    next INTEGER NOT NULL
+);
+"""
+
+# The counter tables and the search index are new for databases created
+# before their triggers existed; fill them from `articles` once, in one
+# transaction (so writers wait for all of it, see the module docstring).
+# The triggers keep them current from then on.
+BACKFILL = "BEGIN IMMEDIATE;\n{};\nINSERT INTO articles_fts (articles_fts) VALUES ('rebuild');\nCOMMIT;\n".format(
+    ";\n".join(sql.strip() for sql in REBUILD_COUNTERS))
+
+
+MIGRATIONS = [
+    Migration(1, "baseline schema.sql"),
+    Migration(2, "articles(title) index",
+              Index("idx_articles_title", "articles", ("title",)),
+              explain=(("Article.find_by_title", queries.ARTICLES_BY_TITLE, ("",)),
+                       ("Article.find_many_by_title", queries.ARTICLES_BY_TITLES, ("[]",)))),
+    Migration(3, "articles(magazine_id, author_id) index",
+              Index("idx_articles_magazine_author", "articles", ("magazine_id", "author_id")),
+              explain=(("check_counters (magazine_stats)", CHECK_COUNTERS[2], ()),)),
+    Migration(4, "magazines(category) index",
+              Index("idx_magazines_category", "magazines", ("category",)),
+              explain=(("Magazine.find_by_category", queries.MAGAZINES_BY_CATEGORY, ("",)),)),
+    Migration(5, "shard directory tables", script=SHARD_CATALOG),
+    Migration(6, "backfill counters and search index", script=BACKFILL),
+]
+
+LATEST = MIGRATIONS[-1].version
+
+
+def applied_versions(conn) -> set:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'"
+    ).fetchone()
+    if not exists:
+        return set()
+    return {r[0] for r in conn.execute("SELECT version FROM schema_migrations")}
+
+
+def pending(target: int = None):
+    with write_connection() as conn:
+        done = applied_versions(conn)
+    return [m for m in MIGRATIONS if m.version not in done and (target is None or m.version <= target)]
+
+
+def prewarm(index: Index, batch_rows: int = PREWARM_ROWS):
+    """
+    Reads the indexed columns of the whole table in rowid batches. Each batch
+    is its own short read on the writer connection, which is released in
+    between.
+    """
+    sql = (f"SELECT rowid, {', '.join(index.columns)} FROM {index.table} "
+           f"WHERE rowid > ? ORDER BY rowid LIMIT ?")
+    last = rows = 0
+    while True:
+        with write_connection() as conn:
+            batch = conn.execute(sql, (last, batch_rows)).fetchall()
+        if not batch:
+            return rows
+        rows += len(batch)
+        last = batch[-1][0]
+
+
+def _record(conn, migration, seconds):
+    conn.execute(
+        "INSERT INTO schema_migrations (version, name, applied_at, seconds) VALUES (?, ?, ?, ?)",
+        (migration.version, migration.name,
+         datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"), seconds),
+    )
+
+
+def query_plan(sql: str, params=()):
+    """
+    EXPLAIN QUERY PLAN detail lines, from the writer connection: it ran the
+    DDL, whereas a pooled reader's cached EXPLAIN statement does not start a
+    transaction and so would not notice the new index.
+    """
+    with write_connection() as conn:
+        return [r["detail"] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def _print_plans(migration, when, out):
+    for label, sql, params in migration.explain:
+        out(f"  {when:<6} {label}:")
+        for detail in query_plan(sql, params):
+            out(f"           {detail}")
+
+
+def apply(migration: Migration, show_plans: bool = True, prewarm_rows: int = PREWARM_ROWS, out=print):
+    out(f"[{migration.version}] {migration.name}")
+    if show_plans:
+        _print_plans(migration, "before", out)
+    if migration.index is None:
+        with write_connection() as conn:
+            start = time.perf_counter()
+            try:
+                migration.run(conn)
+            except Exception:
+                if conn.in_transaction:  # a script stopped between its BEGIN and COMMIT
+                    conn.rollback()
+                raise
+            conn.execute("BEGIN IMMEDIATE")
+            seconds = time.perf_counter() - start
+            _record(conn, migration, seconds)
+            conn.commit()
+        out(f"  ran in {seconds:.2f}s, blocking writers")
+    else:
+        start = time.perf_counter()
+        rows = prewarm(migration.index, prewarm_rows)
+        out(f"  pre-warmed {rows} rows in {time.perf_counter() - start:.2f}s")
+        with write_connection() as conn:
+            locked = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                migration.run(conn)
+                _record(conn, migration, time.perf_counter() - start)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            out(f"  built {migration.index.name}, write lock held {time.perf_counter() - locked:.2f}s")
+    if show_plans:
+        _print_plans(migration, "after", out)
+
+
+def migrate(target: int = None, show_plans: bool = True, prewarm_rows: int = PREWARM_ROWS, out=print):
+    """
+    Applies the pending migrations up to `target` (default: all) in version
+    order. Returns the versions applied.
+    """
+    todo = pending(target)
+    for migration in todo:
+        apply(migration, show_plans, prewarm_rows, out)
+    if todo:
+        resultcache.invalidate()
+        leaderboard.invalidate()
+    return [m.version for m in todo]
+
+
+def restore_indexes(conn):
+    """
+    Re-creates the indexes of applied migrations, e.g. after
+    lib.db.seed.drop_article_indexes().
+    """
+    done = applied_versions(conn)
+    for m in MIGRATIONS:
+        if m.index is not None and m.version in done:
+            conn.execute(m.index.sql)
+
+
+def status():
+    done = {}
+    with write_connection() as conn:
+        if applied_versions(conn):
+            done = {r["version"]: r for r in conn.execute("SELECT * FROM schema_migrations")}
+    for m in MIGRATIONS:
+        row = done.get(m.version)
+        state = f"applied {row['applied_at']} ({row['seconds']:.2f}s)" if row else "pending"
+        print(f"{m.version:>3}  {m.name:<42} {state}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Schema migrations")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="list migrations and whether they are applied")
+    run = sub.add_parser("migrate", help="apply pending migrations")
+    run.add_argument("--to", type=int, default=None, metavar="VERSION")
+    run.add_argument("--no-explain", action="store_true", help="do not print query plans")
+    run.add_argument("--prewarm-rows", type=int, default=PREWARM_ROWS)
+    args = parser.parse_args(argv)
+    if args.command == "status":
+        status()
+        return
+    applied = migrate(args.to, show_plans=not args.no_explain, prewarm_rows=args.prewarm_rows)
+    print(f"{len(applied)} migration(s) applied" if applied else "Up to date.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Per-statement query profiling for pooled connections.
+
+    from lib.db import profile
+
+    with profile.profiling(slow_ms=50) as prof:
+        run_queries()
+    print(prof.format_report())
+    for entry, plan in prof.explain_slow():
+        ...
+
+or set DB_PROFILE=1 (and DB_SLOW_QUERY_MS) for the whole process.
+prof.statement_cache() reports how often statements were found in the
+per-connection prepared-statement cache.
+
+While enabled, new connections are opened with an instrumented connection
+class that times every execute/executemany plus the fetches that follow it,
+and counts the rows returned. Statistics are kept per (caller, statement),
+where the caller is the first function outside lib/db on the stack, e.g.
+`lib.models.author:Author.articles`. Statements slower than the threshold are
+logged to the `lib.db.profile` logger and kept so their query plans can be
+dumped later. When disabled, connections are plain sqlite3.Connection
+objects and nothing is measured.
+"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+
+from lib.db.querycount import _QUERY_VERBS
+
+SLOW_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+SAMPLES = 1000      # latency samples kept per statement for percentiles
+SLOW_LOG_SIZE = 100
+
+_SKIP_MODULES = ("lib.db.", "contextlib")
+_INTERNAL = "lib.db.connection"  # pragmas, health checks: not the caller's work
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _caller():
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module == _INTERNAL:
+            return None
+        if not module.startswith(_SKIP_MODULES):
+            return f"{module}:{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "?"
+
+
+def _percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _Sample:
+    """
+    One execution; fetches after the execute add to `elapsed`.
+    """
+    __slots__ = ("stats", "elapsed", "params", "flagged")
+
+    def __init__(self, stats, elapsed, params):
+        self.stats = stats
+        self.elapsed = elapsed
+        self.params = params
+        self.flagged = False
+
+
+class StatementStats:
+    __slots__ = ("caller", "sql", "count", "total", "rows", "samples")
+
+    def __init__(self, caller, sql):
+        self.caller = caller
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLES)
+
+    def as_dict(self):
+        ordered = sorted(s.elapsed for s in self.samples)
+        return {
+            "caller": self.caller,
+            "sql": self.sql,
+            "count": self.count,
+            "rows": self.rows,
+            "total_ms": self.total * 1000,
+            "p50_ms": _percentile(ordered, 0.50) * 1000,
+            "p99_ms": _percentile(ordered, 0.99) * 1000,
+        }
+
+
+class SlowQuery:
+    __slots__ = ("caller", "sql", "params", "elapsed")
+
+    def __init__(self, caller, sql, params, elapsed):
+        self.caller = caller
+        self.sql = sql
+        self.params = params
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"<SlowQuery {self.elapsed * 1000:.1f}ms {self.caller}: {self.sql[:60]}>"
+
+
+class Profiler:
+    def __init__(self, slow_ms: float = SLOW_MS):
+        self.slow = slow_ms / 1000
+        self.stats = {}
+        self.slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+        self.statement_hits = 0
+        self.statement_misses = Counter()
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.slow_queries.clear()
+            self.statement_hits = 0
+            self.statement_misses.clear()
+
+    def statement_used(self, hit: bool, sql: str):
+        with self._lock:
+            if hit:
+                self.statement_hits += 1
+            else:
+                self.statement_misses[sql] += 1
+
+    def statement_cache(self):
+        """
+        Prepared-statement cache hits/misses over all connections, plus the
+        statements that had to be prepared most often.
+        """
+        with self._lock:
+            misses = sum(self.statement_misses.values())
+            total = self.statement_hits + misses
+            return {
+                "hits": self.statement_hits,
+                "misses": misses,
+                "hit_rate": self.statement_hits / total if total else 0.0,
+                "most_prepared": [(_WHITESPACE.sub(" ", sql).strip(), n)
+                                  for sql, n in self.statement_misses.most_common(10)],
+            }
+
+    def record(self, sql, params, elapsed, rows=0):
+        """
+        Returns the new sample, or None for statements that aren't profiled
+        (transaction control, pragmas, pool internals).
+        """
+        if not sql.lstrip()[:7].upper().startswith(_QUERY_VERBS):
+            return None
+        caller = _caller()
+        if caller is None:
+            return None
+        key = (caller, sql)
+        stats = self.stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self.stats.setdefault(key, StatementStats(key[0], _WHITESPACE.sub(" ", sql).strip()))
+        sample = _Sample(stats, elapsed, params)
+        with self._lock:
+            stats.count += 1
+            stats.total += elapsed
+            stats.rows += rows
+            stats.samples.append(sample)
+        self._check_slow(sample)
+        return sample
+
+    def add_fetch(self, sample, elapsed, rows):
+        stats = sample.stats
+        with self._lock:
+            sample.elapsed += elapsed
+            stats.total += elapsed
+            stats.rows += rows
+        self._check_slow(sample)
+
+    def _check_slow(self, sample):
+        if sample.flagged or sample.elapsed < self.slow:
+            return
+        sample.flagged = True
+        stats = sample.stats
+        self.slow_queries.append(SlowQuery(stats.caller, stats.sql, sample.params, sample.elapsed))
+        import logging  # only on the slow path; keeps logging out of startup
+
+        logging.getLogger(__name__).warning("slow query (%.1f ms) from %s: %s", sample.elapsed * 1000, stats.caller, stats.sql)
+
+    def report(self):
+        """
+        Statement statistics as dicts, most total time first.
+        """
+        with self._lock:
+            rows = [s.as_dict() for s in self.stats.values()]
+        return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+    def by_caller(self):
+        """
+        {caller: {"count", "rows", "total_ms"}} summed over its statements.
+        """
+        totals = {}
+        for r in self.report():
+            t = totals.setdefault(r["caller"], {"count": 0, "rows": 0, "total_ms": 0.0})
+            t["count"] += r["count"]
+            t["rows"] += r["rows"]
+            t["total_ms"] += r["total_ms"]
+        return totals
+
+    def format_report(self, limit: int = 20) -> str:
+        lines = [f"{'calls':>7} {'rows':>8} {'total ms':>10} {'p50 ms':>8} {'p99 ms':>8}  caller / statement"]
+        for r in self.report()[:limit]:
+            lines.append(
+                f"{r['count']:>7} {r['rows']:>8} {r['total_ms']:>10.2f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f}"
+                f"  {r['caller']}\n{'':>45}{r['sql'][:100]}"
+            )
+        return "\n".join(lines)
+
+    def explain_slow(self):
+        """
+        [(SlowQuery, EXPLAIN QUERY PLAN detail lines)] for the logged slow
+        statements, distinct by SQL text.
+        """
+        seen = {}
+        for entry in list(self.slow_queries):
+            if entry.sql not in seen:
+                seen[entry.sql] = (entry, explain(entry.sql, entry.params))
+        return list(seen.values())
+
+
+def explain(sql: str, params=()):
+    """
+    EXPLAIN QUERY PLAN detail lines for `sql`, run on a reader connection.
+    """
+    from lib.db.connection import read_connection
+
+    with read_connection() as conn:
+        try:
+            return [r["detail"] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())]
+        except sqlite3.Error as e:
+            return [f"(cannot explain: {e})"]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    _sample = None
+
+    def execute(self, sql, params=()):
+        self.connection._statement_used(sql)
+        start = time.perf_counter()
+        super().execute(sql, params)
+        elapsed = time.perf_counter() - start
+        rows = self.rowcount if self.rowcount > 0 else 0
+        self._sample = _profiler.record(sql, params, elapsed, rows) if _profiler else None
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self.connection._statement_used(sql)
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_params)
+        elapsed = time.perf_counter() - start
+        if _profiler:
+            _profiler.record(sql, None, elapsed, max(self.rowcount, 0))
+        self._sample = None
+        return self
+
+    def _fetched(self, start, rows):
+        if self._sample is not None and _profiler:
+            _profiler.add_fetch(self._sample, time.perf_counter() - start, rows)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0)
+            raise
+        self._fetched(start, 1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Connection.execute() doesn't go through an overridden cursor(), so the
+    # shortcuts are routed explicitly.
+
+    def __init__(self, *args, cached_statements=128, **kwargs):
+        super().__init__(*args, cached_statements=cached_statements, **kwargs)
+        # sqlite3 doesn't expose its statement cache, so it is mirrored here:
+        # an LRU keyed by SQL text with the same capacity.
+        self._statements = OrderedDict()
+        self._statement_capacity = cached_statements
+
+    def _statement_used(self, sql):
+        statements = self._statements
+        hit = sql in statements
+        if hit:
+            statements.move_to_end(sql)
+        elif self._statement_capacity > 0:
+            statements[sql] = None
+            if len(statements) > self._statement_capacity:
+                statements.popitem(last=False)
+        if _profiler:
+            _profiler.statement_used(hit, sql)
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+_profiler = None
+
+
+def connection_factory():
+    """
+    The class _connect() opens connections with: instrumented only while
+    profiling is enabled.
+    """
+    return InstrumentedConnection if _profiler else sqlite3.Connection
+
+
+def current_profiler():
+    return _profiler
+
+
+def enable(slow_ms: float = SLOW_MS) -> Profiler:
+    """
+    Starts profiling; pools are closed so every connection from now on is
+    instrumented.
+    """
+    global _profiler
+    from lib.db.connection import close_pools
+
+    _profiler = Profiler(slow_ms)
+    close_pools()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    from lib.db.connection import close_pools
+
+    _profiler = None
+    close_pools()
+
+
+@contextmanager
+def profiling(slow_ms: float = SLOW_MS):
+    prof = enable(slow_ms)
+    try:
+        yield prof
+    finally:
+        disable()
+
+
+if os.getenv("DB_PROFILE", "").strip().lower() in ("1", "true", "yes", "on"):
+    _profiler = Profiler()
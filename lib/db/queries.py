@@ -0,0 +1,191 @@
+"""
+Every SQL statement the models run, in one place.
+
+The sqlite3 module keeps a per-connection LRU cache of prepared statements
+keyed by the exact SQL text (see DBConfig.cached_statements). Pooled
+connections live for the whole process, so a statement is parsed and planned
+once per connection as long as its text never varies. Queries are therefore
+defined here as constants, and the few dynamic ones are built through cached
+helpers that always return the same string for the same shape.
+
+Relationship queries (an author's magazines, a magazine's contributors)
+read the author_magazine_stats edge table, which the schema triggers keep in
+step with `articles`, instead of a DISTINCT over `articles`.
+"""
+from functools import lru_cache
+
+from lib.db.eager import IN_IDS
+
+# -- authors -----------------------------------------------------------------
+
+AUTHOR_BY_ID = "SELECT * FROM authors WHERE id = ?"
+AUTHOR_BY_NAME = "SELECT * FROM authors WHERE name = ?"
+AUTHORS_BY_IDS = f"SELECT * FROM authors WHERE id {IN_IDS}"
+AUTHORS_BY_IDS_ORDERED = f"SELECT * FROM authors WHERE id {IN_IDS} ORDER BY id"
+AUTHORS_BY_NAMES = f"SELECT * FROM authors WHERE name {IN_IDS}"
+AUTHORS_BY_ID_RANGE = "SELECT * FROM authors WHERE id BETWEEN ? AND ? ORDER BY id"
+AUTHOR_IDS_WEIGHTED = """
+    SELECT au.id, COALESCE(s.article_count, 0) FROM authors au
+    LEFT JOIN author_stats s ON s.author_id = au.id
+    ORDER BY au.id
+"""
+AUTHOR_INSERT = "INSERT INTO authors (name) VALUES (?)"
+AUTHOR_INSERT_OR_IGNORE = "INSERT OR IGNORE INTO authors (name) VALUES (?)"
+AUTHOR_UPDATE = "UPDATE authors SET name = ? WHERE id = ?"
+AUTHOR_MAGAZINES = """
+    SELECT m.* FROM author_magazine_stats s
+    JOIN magazines m ON m.id = s.magazine_id
+    WHERE s.author_id = ?
+    ORDER BY m.id
+"""
+AUTHOR_TOPIC_AREAS = """
+    SELECT DISTINCT m.category FROM author_magazine_stats s
+    JOIN magazines m ON m.id = s.magazine_id
+    WHERE s.author_id = ?
+"""
+AUTHORS_MAGAZINE_PAIRS = f"""
+    SELECT author_id, magazine_id FROM author_magazine_stats
+    WHERE author_id {IN_IDS}
+"""
+AUTHOR_MOST_PROLIFIC = """
+    SELECT au.* FROM author_stats s
+    JOIN authors au ON au.id = s.author_id
+    ORDER BY s.article_count DESC
+    LIMIT 1
+"""
+
+# -- magazines ---------------------------------------------------------------
+
+MAGAZINE_BY_ID = "SELECT * FROM magazines WHERE id = ?"
+MAGAZINE_BY_NAME = "SELECT * FROM magazines WHERE name = ?"
+MAGAZINES_BY_CATEGORY = "SELECT * FROM magazines WHERE category = ?"
+MAGAZINES_BY_IDS = f"SELECT * FROM magazines WHERE id {IN_IDS}"
+MAGAZINES_BY_IDS_ORDERED = f"SELECT * FROM magazines WHERE id {IN_IDS} ORDER BY id"
+MAGAZINES_BY_NAMES = f"SELECT * FROM magazines WHERE name {IN_IDS} ORDER BY id"
+MAGAZINES_BY_ID_RANGE = "SELECT * FROM magazines WHERE id BETWEEN ? AND ? ORDER BY id"
+MAGAZINE_IDS_WEIGHTED = """
+    SELECT m.id, COALESCE(s.article_count, 0) FROM magazines m
+    LEFT JOIN magazine_stats s ON s.magazine_id = m.id
+    ORDER BY m.id
+"""
+MAGAZINE_INSERT = "INSERT INTO magazines (name, category) VALUES (?, ?)"
+MAGAZINE_INSERT_OR_IGNORE = "INSERT OR IGNORE INTO magazines (name, category) VALUES (?, ?)"
+MAGAZINE_UPDATE = "UPDATE magazines SET name = ?, category = ? WHERE id = ?"
+MAGAZINE_CONTRIBUTORS = """
+    SELECT au.* FROM author_magazine_stats s
+    JOIN authors au ON au.id = s.author_id
+    WHERE s.magazine_id = ?
+    ORDER BY au.id
+"""
+MAGAZINES_AUTHOR_PAIRS = f"""
+    SELECT magazine_id, author_id FROM author_magazine_stats
+    WHERE magazine_id {IN_IDS}
+"""
+MAGAZINE_ARTICLE_TITLES = "SELECT title FROM articles WHERE magazine_id = ?"
+MAGAZINE_CONTRIBUTING_AUTHORS = """
+    SELECT au.*, s.article_count as cnt
+    FROM author_magazine_stats s
+    JOIN authors au ON au.id = s.author_id
+    WHERE s.magazine_id = ? AND s.article_count > ?
+"""
+MAGAZINE_TOP_PUBLISHER = """
+    SELECT m.* FROM magazine_stats s
+    JOIN magazines m ON m.id = s.magazine_id
+    ORDER BY s.article_count DESC
+    LIMIT 1
+"""
+MAGAZINES_WITH_TWO_AUTHORS = """
+    SELECT m.* FROM magazine_stats s
+    JOIN magazines m ON m.id = s.magazine_id
+    WHERE s.author_count >= 2
+"""
+
+# -- articles ----------------------------------------------------------------
+
+ARTICLE_BY_ID = "SELECT * FROM articles WHERE id = ?"
+ARTICLES_BY_IDS = f"SELECT * FROM articles WHERE id {IN_IDS}"
+ARTICLES_BY_TITLES = f"SELECT * FROM articles WHERE title {IN_IDS} ORDER BY id"
+ARTICLE_FKS_BY_ID = "SELECT author_id, magazine_id FROM articles WHERE id = ?"
+ARTICLES_BY_TITLE = "SELECT * FROM articles WHERE title = ?"
+ARTICLES_BY_AUTHOR = "SELECT * FROM articles WHERE author_id = ?"
+ARTICLES_BY_MAGAZINE = "SELECT * FROM articles WHERE magazine_id = ?"
+ARTICLES_BY_AUTHORS = f"SELECT * FROM articles WHERE author_id {IN_IDS} ORDER BY id"
+ARTICLES_BY_MAGAZINES = f"SELECT * FROM articles WHERE magazine_id {IN_IDS} ORDER BY id"
+ARTICLE_INSERT = "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)"
+ARTICLE_UPDATE = "UPDATE articles SET title = ?, author_id = ?, magazine_id = ? WHERE id = ?"
+ARTICLE_INSERT_WITH_ID = "INSERT INTO articles (id, title, author_id, magazine_id) VALUES (?, ?, ?, ?)"
+ARTICLE_DELETE = "DELETE FROM articles WHERE id = ?"
+
+
+@lru_cache(maxsize=None)
+def article_search(by_magazine: bool) -> str:
+    return f"""
+        SELECT a.* FROM articles_fts f
+        JOIN articles a ON a.id = f.rowid
+        WHERE articles_fts MATCH ?{" AND a.magazine_id = ?" if by_magazine else ""}
+        ORDER BY f.rank LIMIT ?
+    """
+
+
+@lru_cache(maxsize=None)
+def article_filter(by_magazine: bool, by_author: bool) -> str:
+    """
+    Base SELECT for Article.page(); one of four fixed strings.
+    """
+    clauses = ["1"]
+    if by_magazine:
+        clauses.append("magazine_id = ?")
+    if by_author:
+        clauses.append("author_id = ?")
+    return f"SELECT * FROM articles WHERE {' AND '.join(clauses)}"
+
+
+@lru_cache(maxsize=256)
+def keyset(sql: str) -> str:
+    """
+    `sql` extended to one keyset batch (see lib.db.streaming.fetch_after).
+    """
+    return f"{sql} AND id > ? ORDER BY id LIMIT ?"
+
+
+# -- shards (lib/db/shards.py) ----------------------------------------------
+# Run on shard connections, with the catalog attached. Scatter queries only
+# count the rows of magazines the directory assigns to the shard being read,
+# so rows left behind (or copied ahead) by a magazine move are never counted
+# twice.
+
+MAGAZINE_SHARD = "SELECT shard FROM catalog.magazine_shards WHERE magazine_id = ?"
+SHARD_ARTICLES_BY_AUTHOR = """
+    SELECT a.* FROM articles a
+    JOIN catalog.magazine_shards d ON d.magazine_id = a.magazine_id AND d.shard = ?
+    WHERE a.author_id = ?
+    ORDER BY a.id
+"""
+SHARD_ARTICLE_BY_ID = """
+    SELECT a.* FROM articles a
+    JOIN catalog.magazine_shards d ON d.magazine_id = a.magazine_id AND d.shard = ?
+    WHERE a.id = ?
+"""
+SHARD_AUTHOR_COUNTS = """
+    SELECT s.author_id, SUM(s.article_count) FROM author_magazine_stats s
+    JOIN catalog.magazine_shards d ON d.magazine_id = s.magazine_id AND d.shard = ?
+    GROUP BY s.author_id
+"""
+SHARD_MAGAZINE_COUNTS = """
+    SELECT s.magazine_id, s.article_count FROM magazine_stats s
+    JOIN catalog.magazine_shards d ON d.magazine_id = s.magazine_id AND d.shard = ?
+"""
+SHARD_AUTHOR_MAGAZINES = """
+    SELECT m.* FROM author_magazine_stats s
+    JOIN catalog.magazine_shards d ON d.magazine_id = s.magazine_id AND d.shard = ?
+    JOIN magazines m ON m.id = s.magazine_id
+    WHERE s.author_id = ?
+    ORDER BY m.id
+"""
+SHARD_MAGAZINES_WITH_TWO_AUTHORS = """
+    SELECT m.* FROM magazine_stats s
+    JOIN catalog.magazine_shards d ON d.magazine_id = s.magazine_id AND d.shard = ?
+    JOIN magazines m ON m.id = s.magazine_id
+    WHERE s.author_count >= 2
+    ORDER BY m.id
+"""
@@ -0,0 +1,57 @@
+from contextlib import contextmanager
+
+_QUERY_VERBS = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+_active = []
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __repr__(self):
+        return f"<QueryCounter {self.count} queries>"
+
+
+def _trace(sql: str):
+    if sql.lstrip()[:7].upper().startswith(_QUERY_VERBS):
+        for counter in _active:
+            counter.statements.append(sql)
+
+
+def trace_callback():
+    """
+    The callback pooled connections install on checkout; None (no tracing
+    overhead) unless a counter is active.
+    """
+    return _trace if _active else None
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts SQL queries (not BEGIN/COMMIT/PRAGMA) run on pooled connections
+    checked out inside the block:
+
+        with count_queries() as counter:
+            Author.prefetch(authors, "articles")
+        assert counter.count == 1
+    """
+    counter = QueryCounter()
+    _active.append(counter)
+    try:
+        yield counter
+    finally:
+        _active.remove(counter)
+
+
+@contextmanager
+def assert_num_queries(expected: int):
+    with count_queries() as counter:
+        yield counter
+    if counter.count != expected:
+        listing = "\n".join(f"  {sql}" for sql in counter.statements)
+        raise AssertionError(f"Expected {expected} queries, got {counter.count}:\n{listing}")
@@ -0,0 +1,167 @@
+"""
+Read-through cache for the results of aggregate model queries.
+
+    resultcache.configure(maxsize=4096)
+    Magazine.top_publisher()        # query
+    Magazine.top_publisher()        # served from memory until a write
+
+Methods opt in with @cached(*tables), naming the tables their answer
+depends on. Entries are keyed by method, owner (class, or instance id) and
+arguments, plus the current generation of each of those tables. Every model
+write path calls bump() for the tables it changed after committing, so a
+write makes the affected keys unreachable at once; dead entries age out of
+the LRU.
+
+Writes made by other processes (or by connections outside the pool) are
+noticed through `PRAGMA data_version` on a dedicated connection, checked at
+most every `check_interval` seconds. data_version does not say which tables
+changed, and it moves for this process's own commits as well, so a change
+invalidates everything. The cache is off unless configure() is called or
+DB_RESULT_CACHE_SIZE is set.
+"""
+import os
+import threading
+import time
+from functools import wraps
+
+from lib.db.connection import _connect, current_db_path
+from lib.db.session import LRUCache
+
+CACHE_SIZE = int(os.getenv("DB_RESULT_CACHE_SIZE", "0"))
+CHECK_INTERVAL = float(os.getenv("DB_RESULT_CACHE_CHECK_INTERVAL", "1.0"))
+
+TABLES = ("authors", "magazines", "articles")
+
+_generations = dict.fromkeys(TABLES, 0)
+_generations_lock = threading.Lock()
+_MISSING = object()
+
+
+def bump(*tables):
+    """
+    Called by write paths after a successful commit.
+    """
+    with _generations_lock:
+        for table in tables:
+            _generations[table] += 1
+
+
+def invalidate():
+    """
+    For writes that may have touched any table (raw SQL, rebuilds, imports).
+    """
+    bump(*TABLES)
+    if _cache is not None:
+        _cache.entries.clear()
+
+
+class ResultCache:
+    def __init__(self, maxsize: int = 1024, check_interval: float = CHECK_INTERVAL,
+                 clock=time.monotonic):
+        self.entries = LRUCache(maxsize=maxsize)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._monitor_path = None
+        self._data_version = None
+        self._checked_at = None
+        self.data_version_changes = 0
+
+    def __repr__(self):
+        return f"<ResultCache {len(self.entries)}/{self.entries.maxsize}>"
+
+    def _check_data_version(self):
+        now = self._clock()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            path = current_db_path()
+            if path != self._monitor_path:
+                self._close_monitor()
+                self._monitor = _connect(path, readonly=True)
+                self._monitor_path = path
+                self.entries.clear()
+            version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+            changed = self._data_version is not None and version != self._data_version
+            self._data_version = version
+            self._checked_at = now
+        if changed:
+            self.data_version_changes += 1
+            invalidate()
+
+    def get_or_compute(self, key, tables, compute):
+        self._check_data_version()
+        # generations are read before computing: a write that commits while
+        # the query runs leaves its result under an already dead key
+        with _generations_lock:
+            key = (key, tuple(_generations[t] for t in tables))
+        value = self.entries.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.entries.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        return {**self.entries.stats(), "data_version_changes": self.data_version_changes}
+
+    def _close_monitor(self):
+        if self._monitor is not None:
+            self._monitor.close()
+            self._monitor = None
+            self._monitor_path = None
+
+    def close(self):
+        with self._lock:
+            self._close_monitor()
+
+
+_cache = ResultCache(CACHE_SIZE) if CACHE_SIZE > 0 else None
+
+
+def configure(maxsize: int = 1024, check_interval: float = CHECK_INTERVAL) -> ResultCache:
+    """
+    Enables the process-wide result cache, replacing any existing one.
+    """
+    global _cache
+    disable()
+    _cache = ResultCache(maxsize=maxsize, check_interval=check_interval)
+    return _cache
+
+
+def disable():
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
+
+def current():
+    return _cache
+
+
+def cached(*tables):
+    """
+    Caches a model method's result while `tables` are unchanged. The first
+    argument (cls or self) is keyed by class or by id; unsaved instances
+    bypass the cache. Lists are returned as copies, so callers may modify
+    them.
+    """
+    unknown = set(tables) - set(TABLES)
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(sorted(unknown))}")
+
+    def decorate(fn):
+        name = fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(owner, *args, **kwargs):
+            cache = _cache
+            ident = owner if isinstance(owner, type) else owner.id
+            if cache is None or ident is None:
+                return fn(owner, *args, **kwargs)
+            key = (name, ident, args, tuple(sorted(kwargs.items())))
+            value = cache.get_or_compute(key, tables, lambda: fn(owner, *args, **kwargs))
+            return list(value) if isinstance(value, list) else value
+        return wrapper
+    return decorate
@@ -24,5 +24,160 @@ CREATE TABLE IF NOT EXISTS articles (
 );
 
 -- Optional indexes for performance
-CREATE INDEX IF NOT EXISTS idx_articles_author ON articles(author_id);
-CREATE INDEX IF NOT EXISTS idx_articles_magazine ON articles(magazine_id);
+-- (fk, id) composites serve plain fk lookups as well as keyset pagination
+-- (WHERE fk = ? AND id > ? ORDER BY id), and replace the single-column ones.
+DROP INDEX IF EXISTS idx_articles_author;
+DROP INDEX IF EXISTS idx_articles_magazine;
+CREATE INDEX IF NOT EXISTS idx_articles_author_id ON articles(author_id, id);
+CREATE INDEX IF NOT EXISTS idx_articles_magazine_id ON articles(magazine_id, id);
+
+-- Article counters, kept current by the triggers below so leaderboard and
+-- threshold queries read an index instead of aggregating `articles`.
+-- An existing database is backfilled once by migration 6
+-- (lib/db/migrations.py); rebuild them by hand with:
+--   python -m lib.db.maintenance rebuild-counters
+CREATE TABLE IF NOT EXISTS author_stats (
+    author_id INTEGER PRIMARY KEY,
+    article_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS magazine_stats (
+    magazine_id INTEGER PRIMARY KEY,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    author_count INTEGER NOT NULL DEFAULT 0  -- distinct authors
+);
+
+CREATE TABLE IF NOT EXISTS author_magazine_stats (
+    author_id INTEGER NOT NULL,
+    magazine_id INTEGER NOT NULL,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (author_id, magazine_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_author_stats_count ON author_stats(article_count);
+CREATE INDEX IF NOT EXISTS idx_magazine_stats_count ON magazine_stats(article_count);
+CREATE INDEX IF NOT EXISTS idx_magazine_stats_authors ON magazine_stats(author_count);
+CREATE INDEX IF NOT EXISTS idx_author_magazine_stats_magazine
+    ON author_magazine_stats(magazine_id, article_count);
+
+CREATE TRIGGER IF NOT EXISTS trg_authors_stats_insert AFTER INSERT ON authors BEGIN
+    INSERT OR IGNORE INTO author_stats (author_id, article_count) VALUES (NEW.id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_authors_stats_delete AFTER DELETE ON authors BEGIN
+    DELETE FROM author_stats WHERE author_id = OLD.id;
+    DELETE FROM author_magazine_stats WHERE author_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_magazines_stats_insert AFTER INSERT ON magazines BEGIN
+    INSERT OR IGNORE INTO magazine_stats (magazine_id, article_count, author_count) VALUES (NEW.id, 0, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_magazines_stats_delete AFTER DELETE ON magazines BEGIN
+    DELETE FROM magazine_stats WHERE magazine_id = OLD.id;
+    DELETE FROM author_magazine_stats WHERE magazine_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_articles_stats_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO author_magazine_stats (author_id, magazine_id, article_count)
+        VALUES (NEW.author_id, NEW.magazine_id, 1)
+        ON CONFLICT(author_id, magazine_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO magazine_stats (magazine_id, article_count, author_count)
+        VALUES (NEW.magazine_id, 1, 1)
+        ON CONFLICT(magazine_id) DO UPDATE SET
+            article_count = article_count + 1,
+            author_count = author_count + ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = NEW.author_id AND magazine_id = NEW.magazine_id
+            ) = 1);
+    INSERT INTO author_stats (author_id, article_count) VALUES (NEW.author_id, 1)
+        ON CONFLICT(author_id) DO UPDATE SET article_count = article_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_articles_stats_delete AFTER DELETE ON articles BEGIN
+    UPDATE author_magazine_stats SET article_count = article_count - 1
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id;
+    UPDATE magazine_stats SET
+            article_count = article_count - 1,
+            author_count = author_count - ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id
+            ) = 0)
+        WHERE magazine_id = OLD.magazine_id;
+    DELETE FROM author_magazine_stats
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id AND article_count <= 0;
+    UPDATE author_stats SET article_count = article_count - 1 WHERE author_id = OLD.author_id;
+END;
+
+-- Moving an article between authors/magazines: the delete steps for OLD,
+-- then the insert steps for NEW.
+CREATE TRIGGER IF NOT EXISTS trg_articles_stats_update AFTER UPDATE OF author_id, magazine_id ON articles
+WHEN OLD.author_id IS NOT NEW.author_id OR OLD.magazine_id IS NOT NEW.magazine_id BEGIN
+    UPDATE author_magazine_stats SET article_count = article_count - 1
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id;
+    UPDATE magazine_stats SET
+            article_count = article_count - 1,
+            author_count = author_count - ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id
+            ) = 0)
+        WHERE magazine_id = OLD.magazine_id;
+    DELETE FROM author_magazine_stats
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id AND article_count <= 0;
+    UPDATE author_stats SET article_count = article_count - 1 WHERE author_id = OLD.author_id;
+
+    INSERT INTO author_magazine_stats (author_id, magazine_id, article_count)
+        VALUES (NEW.author_id, NEW.magazine_id, 1)
+        ON CONFLICT(author_id, magazine_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO magazine_stats (magazine_id, article_count, author_count)
+        VALUES (NEW.magazine_id, 1, 1)
+        ON CONFLICT(magazine_id) DO UPDATE SET
+            article_count = article_count + 1,
+            author_count = author_count + ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = NEW.author_id AND magazine_id = NEW.magazine_id
+            ) = 1);
+    INSERT INTO author_stats (author_id, article_count) VALUES (NEW.author_id, 1)
+        ON CONFLICT(author_id) DO UPDATE SET article_count = article_count + 1;
+END;
+
+-- Full-text index over article titles (external content: the text lives in
+-- `articles`, the FTS table only stores the index). An existing database
+-- is backfilled once by migration 6 (lib/db/migrations.py); rebuild it by
+-- hand with:
+--   python -m lib.db.maintenance rebuild-search
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title,
+    content='articles',
+    content_rowid='id',
+    prefix='2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title) VALUES (NEW.id, NEW.title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_articles_fts_update AFTER UPDATE OF title ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title) VALUES ('delete', OLD.id, OLD.title);
+    INSERT INTO articles_fts (rowid, title) VALUES (NEW.id, NEW.title);
+END;
+
+-- Progress of `python -m lib.db.seed` imports: the number of records of
+-- `source` already committed, written in the same transaction as the rows.
+CREATE TABLE IF NOT EXISTS import_checkpoints (
+    source TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    updated_at TEXT NOT NULL
+);
+
+-- Versions applied by lib/db/migrations.py.
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TEXT NOT NULL,
+    seconds REAL NOT NULL
+);
@@ -1,70 +1,466 @@
 # lib/db/seed.py
+"""
+Streaming import of authors, magazines and articles from CSV or JSONL dumps.
+
+    python -m lib.db.seed --authors authors.csv --magazines magazines.jsonl \
+        --articles articles.csv --workers 4 --defer-indexes
+    python -m lib.db.seed            # demo data
+
+Record fields:
+    authors:   name
+    magazines: name, category
+    articles:  title, and author (name) or author_id, and magazine (name,
+               optionally with category) or magazine_id
+
+Pipeline: the file is read in chunks of lines, parsed and validated in a
+process pool, names are resolved to ids through an in-memory cache, and rows
+are written with executemany in large transactions. The number of records
+consumed is checkpointed in `import_checkpoints` in the same transaction as
+the rows, so an interrupted import resumes exactly where it stopped. CSV
+records must not contain embedded newlines (chunks are split on lines).
+Articles are imported into an unsharded database only (lib/db/shards.py):
+import first, then run `shards init`.
+"""
+import argparse
+import csv
+import json
 import os
-import sys
+import time
+from collections import deque
+from typing import NamedTuple
 
-# If script is run directly, ensure project root is on sys.path
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
+from lib.db import leaderboard, resultcache, shards
+from lib.db.connection import write_connection
+from lib.db.eager import IN_IDS
 
-from lib.db.connection import get_connection
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "schema.sql")
+CHUNK_LINES = 20_000
+COMMIT_ROWS = 200_000
+KINDS = ("authors", "magazines", "articles")
+DEFERRED_MARKER = "deferred-indexes:articles"  # import_checkpoints row while dropped
 
-def seed():
-    conn = get_connection()
-    try:
-        cur = conn.cursor()
-
-        # ✅ Ensure schema exists before seeding
-        schema_path = os.path.join(PROJECT_ROOT, "lib", "db", "schema.sql")
-        with open(schema_path, "r") as f:
-            cur.executescript(f.read())
-
-        # Insert authors
-        authors = ["Alice Walker", "Bob Smith", "Carol Jones"]
-        for name in authors:
-            cur.execute("INSERT OR IGNORE INTO authors (name) VALUES (?)", (name,))
-        print(f"Inserted {len(authors)} authors (or ignored duplicates).")
-
-        # Insert magazines
-        mags = [
-            ("Tech Monthly", "Technology"),
-            ("Health Weekly", "Health"),
-            ("Travel Today", "Travel"),
-        ]
-        for name, cat in mags:
-            cur.execute(
-                "INSERT OR IGNORE INTO magazines (name, category) VALUES (?, ?)",
-                (name, cat),
-            )
-        print(f"Inserted {len(mags)} magazines (or ignored duplicates).")
-
-        # Fetch IDs
-        cur.execute("SELECT id, name FROM authors")
-        authors_map = {row["name"]: row["id"] for row in cur.fetchall()}
-        cur.execute("SELECT id, name FROM magazines")
-        mags_map = {row["name"]: row["id"] for row in cur.fetchall()}
-
-        # Insert articles
-        articles = [
-            ("AI and You", authors_map["Alice Walker"], mags_map["Tech Monthly"]),
-            ("Healthy Eating", authors_map["Bob Smith"], mags_map["Health Weekly"]),
-            ("The Nairobi Guide", authors_map["Carol Jones"], mags_map["Travel Today"]),
-            ("Deep Learning", authors_map["Alice Walker"], mags_map["Tech Monthly"]),
-            ("Remote Work Trends", authors_map["Bob Smith"], mags_map["Tech Monthly"]),
-            ("Travel on Budget", authors_map["Alice Walker"], mags_map["Travel Today"]),
-            ("Wellness Tips", authors_map["Carol Jones"], mags_map["Health Weekly"]),
-        ]
-        for title, author_id, magazine_id in articles:
-            cur.execute(
-                "INSERT OR IGNORE INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
-                (title, author_id, magazine_id),
+
+class ImportStats(NamedTuple):
+    kind: str
+    rows: int
+    errors: int
+    seconds: float
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.kind}: {self.rows} rows, {self.errors} rejected, "
+                f"{self.seconds:.2f}s ({self.rows_per_sec:,.0f} rows/s)")
+
+
+# -- parsing (runs in worker processes) ------------------------------------
+
+def _text(record, field):
+    value = record[field]
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"{field} required")
+    return value.strip()
+
+
+def _ref(record, id_field, name_field):
+    if record.get(id_field) not in (None, ""):
+        return int(record[id_field])
+    return _text(record, name_field)
+
+
+def _validate_author(record):
+    return (_text(record, "name"),)
+
+
+def _validate_magazine(record):
+    return (_text(record, "name"), _text(record, "category"))
+
+
+def _validate_article(record):
+    magazine = _ref(record, "magazine_id", "magazine")
+    if isinstance(magazine, str) and record.get("category"):
+        magazine = (magazine, record["category"].strip())
+    return (_text(record, "title"), _ref(record, "author_id", "author"), magazine)
+
+
+VALIDATORS = {
+    "authors": _validate_author,
+    "magazines": _validate_magazine,
+    "articles": _validate_article,
+}
+
+
+def parse_chunk(kind, fmt, fieldnames, lines):
+    """
+    Returns (validated row tuples, number of rejected records) for a chunk.
+    """
+    validate = VALIDATORS[kind]
+    records = csv.DictReader(lines, fieldnames=fieldnames) if fmt == "csv" else lines
+    rows, errors = [], 0
+    for record in records:
+        try:
+            if fmt == "jsonl":
+                if not record.strip():
+                    continue
+                record = json.loads(record)
+            rows.append(validate(record))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            errors += 1
+    return rows, errors
+
+
+# -- reading -----------------------------------------------------------------
+
+def _format(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported import format: {path} (expected .csv or .jsonl)")
+
+
+def read_chunks(path, skip: int = 0, chunk_lines: int = CHUNK_LINES):
+    """
+    Yields (fieldnames, records consumed after this chunk, lines), skipping
+    the first `skip` records.
+    """
+    fmt = _format(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        fieldnames = next(csv.reader([f.readline()])) if fmt == "csv" else None
+        position = 0
+        for _ in range(skip):
+            if not f.readline():
+                return
+            position += 1
+        while True:
+            lines = [line for _, line in zip(range(chunk_lines), f)]
+            if not lines:
+                return
+            position += len(lines)
+            yield fieldnames, position, lines
+
+
+# -- writing -----------------------------------------------------------------
+
+class NameCache:
+    """
+    name -> id maps for authors and magazines, and the sets of explicit ids
+    known to exist, filled on demand with one query per batch of unknown
+    names or ids.
+    """
+
+    def __init__(self):
+        self.authors = {}
+        self.magazines = {}     # name -> lowest id, like Magazine.find_by_name
+        self.magazine_pairs = {}  # (name, category) -> id
+        self.author_ids = set()
+        self.magazine_ids = set()
+
+    @staticmethod
+    def _existing(conn, table, ids, known):
+        missing = ids - known
+        if missing:
+            known.update(r[0] for r in conn.execute(
+                f"SELECT id FROM {table} WHERE id {IN_IDS}", (json.dumps(list(missing)),)))
+
+    def resolve_author_ids(self, conn, ids):
+        self._existing(conn, "authors", ids, self.author_ids)
+
+    def resolve_magazine_ids(self, conn, ids):
+        self._existing(conn, "magazines", ids, self.magazine_ids)
+
+    def resolve_authors(self, conn, names):
+        missing = {n for n in names if n not in self.authors}
+        if missing:
+            for r in conn.execute(f"SELECT id, name FROM authors WHERE name {IN_IDS}", (json.dumps(list(missing)),)):
+                self.authors[r["name"]] = r["id"]
+
+    def resolve_magazines(self, conn, names):
+        missing = {n for n in names if n not in self.magazines}
+        if missing:
+            rows = conn.execute(
+                f"SELECT id, name, category FROM magazines WHERE name {IN_IDS} ORDER BY id",
+                (json.dumps(list(missing)),),
             )
-        print(f"Inserted {len(articles)} articles (or ignored duplicates).")
+            for r in rows:
+                self.magazines.setdefault(r["name"], r["id"])
+                self.magazine_pairs[(r["name"], r["category"])] = r["id"]
+
+
+class Importer:
+    def __init__(self, workers: int = None, chunk_lines: int = CHUNK_LINES,
+                 commit_rows: int = COMMIT_ROWS, defer_indexes: bool = False):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_lines = chunk_lines
+        self.commit_rows = commit_rows
+        self.defer_indexes = defer_indexes
+        self.names = NameCache()
+
+    # public API
+
+    def import_file(self, path: str, kind: str, restart: bool = False) -> ImportStats:
+        if kind not in KINDS:
+            raise ValueError(f"Unknown import kind: {kind}")
+        if kind == "articles":
+            shards.require_unsharded("The article import")
+        source = f"{kind}:{os.path.abspath(path)}"
+        fmt = _format(path)
+        start = time.perf_counter()
+        with write_connection() as conn:
+            if restart:
+                conn.execute("DELETE FROM import_checkpoints WHERE source = ?", (source,))
+                conn.commit()
+            row = conn.execute("SELECT position FROM import_checkpoints WHERE source = ?", (source,)).fetchone()
+            skip = row["position"] if row else 0
+            restore_interrupted_load(conn)
+            deferred = self.defer_indexes and kind == "articles"
+            if deferred:
+                drop_article_indexes(conn)
+            try:
+                chunks = read_chunks(path, skip, self.chunk_lines)
+                rows, errors = self._write_all(conn, kind, source, self._parse(kind, fmt, chunks))
+            finally:
+                if deferred:
+                    # executescript() in the restore would commit the rows
+                    # written since the last checkpoint, and a resume would
+                    # then import them again
+                    if conn.in_transaction:
+                        conn.rollback()
+                    restore_article_indexes(conn)
+        resultcache.bump(kind)
+        leaderboard.invalidate()
+        return ImportStats(kind, rows, errors, time.perf_counter() - start)
+
+    def import_rows(self, kind: str, records) -> ImportStats:
+        """
+        Imports already-loaded records (dicts) without checkpointing.
+        """
+        if kind == "articles":
+            shards.require_unsharded("The article import")
+        start = time.perf_counter()
+        validate = VALIDATORS[kind]
+        with write_connection() as conn:
+            rows, errors = self._write_all(conn, kind, None, [(None, [validate(r) for r in records], 0)])
+        resultcache.bump(kind)
+        leaderboard.invalidate()
+        return ImportStats(kind, rows, errors, time.perf_counter() - start)
+
+    # pipeline stages
+
+    def _parse(self, kind, fmt, chunks):
+        """
+        Yields (position, rows, errors) in file order. At most 2 * workers
+        chunks are in flight, so memory stays bounded for any file size.
+        """
+        if self.workers <= 1:
+            for fieldnames, position, lines in chunks:
+                yield (position, *parse_chunk(kind, fmt, fieldnames, lines))
+            return
+        from concurrent.futures import ProcessPoolExecutor  # spawns processes; only needed here
 
+        with ProcessPoolExecutor(self.workers) as pool:
+            pending = deque()
+            for fieldnames, position, lines in chunks:
+                pending.append((position, pool.submit(parse_chunk, kind, fmt, fieldnames, lines)))
+                if len(pending) >= 2 * self.workers:
+                    position, future = pending.popleft()
+                    yield (position, *future.result())
+            while pending:
+                position, future = pending.popleft()
+                yield (position, *future.result())
+
+    def _write_all(self, conn, kind, source, parsed):
+        total = errors = uncommitted = 0
+        position = None
+        for position, rows, rejected in parsed:
+            errors += rejected
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            written, unresolved = self._write(conn, kind, rows)
+            total += written
+            errors += unresolved
+            uncommitted += written
+            if uncommitted >= self.commit_rows:
+                self._commit(conn, source, position)
+                uncommitted = 0
+        if conn.in_transaction or position is not None:
+            self._commit(conn, source, position)
+        return total, errors
+
+    def _commit(self, conn, source, position):
+        if source is not None and position is not None:
+            conn.execute("""
+                INSERT INTO import_checkpoints (source, position, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(source) DO UPDATE SET position = excluded.position, updated_at = excluded.updated_at
+            """, (source, position))
         conn.commit()
-        print("✅ Database seeded successfully.")
-    finally:
-        conn.close()
+
+    def _write(self, conn, kind, rows):
+        """
+        Returns (rows written, rows rejected because a reference didn't resolve).
+        """
+        if kind == "authors":
+            conn.executemany("INSERT OR IGNORE INTO authors (name) VALUES (?)", rows)
+            return len(rows), 0
+        if kind == "magazines":
+            conn.executemany("INSERT OR IGNORE INTO magazines (name, category) VALUES (?, ?)", rows)
+            return len(rows), 0
+
+        names = self.names
+        names.resolve_authors(conn, {a for _, a, _ in rows if isinstance(a, str)})
+        names.resolve_magazines(conn, {m if isinstance(m, str) else m[0]
+                                       for _, _, m in rows if not isinstance(m, int)})
+        # explicit ids are checked too: with foreign keys on, one dangling id
+        # would fail the whole transaction, and every resume after it
+        names.resolve_author_ids(conn, {a for _, a, _ in rows if isinstance(a, int)})
+        names.resolve_magazine_ids(conn, {m for _, _, m in rows if isinstance(m, int)})
+        params, unresolved = [], 0
+        for title, author, magazine in rows:
+            if isinstance(author, int):
+                author_id = author if author in names.author_ids else None
+            else:
+                author_id = names.authors.get(author)
+            if isinstance(magazine, int):
+                magazine_id = magazine if magazine in names.magazine_ids else None
+            elif isinstance(magazine, tuple):
+                magazine_id = names.magazine_pairs.get(magazine)
+            else:
+                magazine_id = names.magazines.get(magazine)
+            if author_id is None or magazine_id is None:
+                unresolved += 1
+                continue
+            params.append((title, author_id, magazine_id))
+        conn.executemany("INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)", params)
+        return len(params), unresolved
+
+
+def drop_article_indexes(conn):
+    """
+    Drops the secondary indexes and the counter/search triggers on
+    `articles` ahead of a large load; restore_article_indexes() rebuilds them
+    in one pass at the end.
+
+    The drop is recorded in `import_checkpoints` in the same transaction, so
+    a load killed before the restore is repaired by
+    restore_interrupted_load() on the next import or apply_schema().
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    objects = conn.execute("""
+        SELECT type, name FROM sqlite_master
+        WHERE tbl_name = 'articles' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    """).fetchall()
+    for obj in objects:
+        conn.execute(f'DROP {obj["type"].upper()} IF EXISTS "{obj["name"]}"')
+    conn.execute("""
+        INSERT OR REPLACE INTO import_checkpoints (source, position, updated_at)
+        VALUES (?, 0, CURRENT_TIMESTAMP)
+    """, (DEFERRED_MARKER,))
+    conn.commit()
+
+
+def restore_article_indexes(conn):
+    from lib.db.maintenance import REBUILD_COUNTERS
+    from lib.db.migrations import restore_indexes
+
+    with open(SCHEMA_PATH) as f:
+        conn.executescript(f.read())
+    restore_indexes(conn)
+    conn.execute("BEGIN IMMEDIATE")
+    for sql in REBUILD_COUNTERS:
+        conn.execute(sql)
+    conn.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+    conn.execute("DELETE FROM import_checkpoints WHERE source = ?", (DEFERRED_MARKER,))
+    conn.commit()
+
+
+def restore_interrupted_load(conn) -> bool:
+    """
+    Restores the article indexes and triggers if a --defer-indexes load
+    dropped them and never got to restore them (the process was killed).
+    Returns True if it did.
+    """
+    if not conn.execute("SELECT 1 FROM import_checkpoints WHERE source = ?", (DEFERRED_MARKER,)).fetchone():
+        return False
+    if conn.in_transaction:  # see Importer.import_file
+        conn.rollback()
+    restore_article_indexes(conn)
+    return True
+
+
+def apply_schema():
+    """
+    Brings the schema up to date: schema.sql plus any pending migrations,
+    and the article indexes/triggers of an interrupted deferred load.
+    """
+    from lib.db.migrations import migrate
+
+    migrate(show_plans=False, out=lambda line: None)
+    with write_connection() as conn:
+        restore_interrupted_load(conn)
+
+
+def seed():
+    # ✅ Ensure schema exists before seeding
+    apply_schema()
+    importer = Importer(workers=0)
+
+    # Insert authors
+    authors = ["Alice Walker", "Bob Smith", "Carol Jones"]
+    importer.import_rows("authors", ({"name": n} for n in authors))
+    print(f"Inserted {len(authors)} authors (or ignored duplicates).")
+
+    # Insert magazines
+    mags = [
+        ("Tech Monthly", "Technology"),
+        ("Health Weekly", "Health"),
+        ("Travel Today", "Travel"),
+    ]
+    importer.import_rows("magazines", ({"name": n, "category": c} for n, c in mags))
+    print(f"Inserted {len(mags)} magazines (or ignored duplicates).")
+
+    # Insert articles; author/magazine names are resolved by the importer
+    articles = [
+        ("AI and You", "Alice Walker", "Tech Monthly"),
+        ("Healthy Eating", "Bob Smith", "Health Weekly"),
+        ("The Nairobi Guide", "Carol Jones", "Travel Today"),
+        ("Deep Learning", "Alice Walker", "Tech Monthly"),
+        ("Remote Work Trends", "Bob Smith", "Tech Monthly"),
+        ("Travel on Budget", "Alice Walker", "Travel Today"),
+        ("Wellness Tips", "Carol Jones", "Health Weekly"),
+    ]
+    importer.import_rows("articles", ({"title": t, "author": a, "magazine": m} for t, a, m in articles))
+    print(f"Inserted {len(articles)} articles.")
+
+    print("✅ Database seeded successfully.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import authors, magazines and articles (CSV or JSONL).")
+    for kind in KINDS:
+        parser.add_argument(f"--{kind}", metavar="PATH", help=f"{kind} dump (.csv or .jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--chunk-lines", type=int, default=CHUNK_LINES)
+    parser.add_argument("--commit-rows", type=int, default=COMMIT_ROWS)
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="drop article indexes/triggers during the load and rebuild them at the end")
+    parser.add_argument("--restart", action="store_true", help="ignore saved checkpoints")
+    args = parser.parse_args(argv)
+
+    if not any(getattr(args, kind) for kind in KINDS):
+        seed()
+        return
+    apply_schema()
+    importer = Importer(workers=args.workers, chunk_lines=args.chunk_lines,
+                        commit_rows=args.commit_rows, defer_indexes=args.defer_indexes)
+    for kind in KINDS:  # order matters: articles reference the other two
+        path = getattr(args, kind)
+        if path:
+            print(importer.import_file(path, kind, restart=args.restart))
+
 
 if __name__ == "__main__":
-    seed()
+    main()
@@ -0,0 +1,210 @@
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe LRU mapping with an optional time-to-live (seconds).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, clock=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f"<LRUCache {len(self._data)}/{self.maxsize} ttl={self.ttl}>"
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires = entry
+            if expires is not None and expires <= self._clock():
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return None if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+_current_session = ContextVar("current_session", default=None)
+_shared_cache = None
+
+
+class Session:
+    """
+    Unit of work with an identity map keyed by (model class, id).
+
+        with Session():
+            a = Author.find_by_id(1)
+            assert Author.find_by_id(1) is a   # no second query
+
+    Sessions nest; the innermost one is active for the current thread/task.
+    """
+
+    def __init__(self):
+        self.identity_map = {}
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_current_session.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_session.reset(self._tokens.pop())
+        return False
+
+    def __contains__(self, key):
+        return key in self.identity_map
+
+    def get(self, cls, id):
+        """
+        Shortcut for cls.find_by_id(id) inside this session.
+        """
+        with self:
+            return cls.find_by_id(id)
+
+    def clear(self):
+        self.identity_map.clear()
+
+
+def current_session():
+    return _current_session.get()
+
+
+def configure_cache(maxsize: int = 1024, ttl: float = None):
+    """
+    Enables a process-wide LRU cache of model instances, shared by all
+    sessions (and by lookups made outside any session).
+    """
+    global _shared_cache
+    _shared_cache = LRUCache(maxsize=maxsize, ttl=ttl)
+    return _shared_cache
+
+
+def disable_cache():
+    global _shared_cache
+    _shared_cache = None
+
+
+def shared_cache():
+    return _shared_cache
+
+
+def _key(cls, id):
+    # Subclasses that only add methods (lib/models/aio.py) name the model
+    # they extend in `_model`, so both share one entry per row.
+    return (getattr(cls, "_model", cls), id)
+
+
+def _as(obj, cls):
+    # An instance cached by the base model, asked for through such a
+    # subclass, is copied into an instance of it (same __slots__, same
+    # state). The cached object is shared, so its type must not change
+    # under other holders.
+    if isinstance(obj, cls):
+        return obj
+    view = cls.__new__(cls)
+    for klass in type(obj).__mro__:
+        for name in getattr(klass, "__slots__", ()):
+            if hasattr(obj, name):
+                setattr(view, name, getattr(obj, name))
+    return view
+
+
+def lookup(cls, id):
+    """
+    Returns the cached instance for (cls, id), or None.
+    """
+    key = _key(cls, id)
+    session = _current_session.get()
+    if session is not None:
+        obj = session.identity_map.get(key)
+        if obj is not None:
+            return _as(obj, cls)
+    if _shared_cache is not None:
+        obj = _shared_cache.get(key)
+        if obj is not None:
+            if session is not None:
+                session.identity_map[key] = obj
+            return _as(obj, cls)
+    return None
+
+
+def remember(obj):
+    """
+    Registers a freshly loaded instance and returns the canonical one.
+    """
+    if obj is None or obj.id is None:
+        return obj
+    cls = type(obj)
+    key = _key(cls, obj.id)
+    session = _current_session.get()
+    if session is not None:
+        obj = session.identity_map.setdefault(key, obj)
+    if _shared_cache is not None:
+        _shared_cache.set(key, obj)
+    return _as(obj, cls)
+
+
+def saved(obj):
+    """
+    Called by model save(): drops stale shared-cache entries for the row and
+    makes the saved instance the one the active session hands out.
+    """
+    key = _key(type(obj), obj.id)
+    if _shared_cache is not None:
+        _shared_cache.pop(key)
+    session = _current_session.get()
+    if session is not None:
+        session.identity_map[key] = obj
+
+
+def forget(cls, id):
+    key = _key(cls, id)
+    if _shared_cache is not None:
+        _shared_cache.pop(key)
+    session = _current_session.get()
+    if session is not None:
+        session.identity_map.pop(key, None)
@@ -0,0 +1,107 @@
+-- lib/db/shard_schema.sql
+-- Schema of one shard file (see lib/db/shards.py). A shard holds the articles
+-- of the magazines assigned to it, plus counter tables kept by the same
+-- triggers as in schema.sql, so every shard counts only its own articles.
+-- authors and magazines live in the catalog database (DB_PATH), which is
+-- attached to shard connections as `catalog`. Unqualified names resolve to
+-- the shard first, so the queries in lib/db/queries.py run unchanged.
+
+-- ids are allocated from the catalog (id_sequences) so they are unique
+-- across shards, and an article keeps its id when its magazine moves.
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    author_id INTEGER NOT NULL,
+    magazine_id INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_articles_author_id ON articles(author_id, id);
+CREATE INDEX IF NOT EXISTS idx_articles_magazine_id ON articles(magazine_id, id);
+CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title);
+
+CREATE TABLE IF NOT EXISTS author_stats (
+    author_id INTEGER PRIMARY KEY,
+    article_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS magazine_stats (
+    magazine_id INTEGER PRIMARY KEY,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    author_count INTEGER NOT NULL DEFAULT 0  -- distinct authors
+);
+
+CREATE TABLE IF NOT EXISTS author_magazine_stats (
+    author_id INTEGER NOT NULL,
+    magazine_id INTEGER NOT NULL,
+    article_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (author_id, magazine_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_author_stats_count ON author_stats(article_count);
+CREATE INDEX IF NOT EXISTS idx_magazine_stats_count ON magazine_stats(article_count);
+CREATE INDEX IF NOT EXISTS idx_magazine_stats_authors ON magazine_stats(author_count);
+CREATE INDEX IF NOT EXISTS idx_author_magazine_stats_magazine
+    ON author_magazine_stats(magazine_id, article_count);
+
+CREATE TRIGGER IF NOT EXISTS trg_articles_stats_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO author_magazine_stats (author_id, magazine_id, article_count)
+        VALUES (NEW.author_id, NEW.magazine_id, 1)
+        ON CONFLICT(author_id, magazine_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO magazine_stats (magazine_id, article_count, author_count)
+        VALUES (NEW.magazine_id, 1, 1)
+        ON CONFLICT(magazine_id) DO UPDATE SET
+            article_count = article_count + 1,
+            author_count = author_count + ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = NEW.author_id AND magazine_id = NEW.magazine_id
+            ) = 1);
+    INSERT INTO author_stats (author_id, article_count) VALUES (NEW.author_id, 1)
+        ON CONFLICT(author_id) DO UPDATE SET article_count = article_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_articles_stats_delete AFTER DELETE ON articles BEGIN
+    UPDATE author_magazine_stats SET article_count = article_count - 1
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id;
+    UPDATE magazine_stats SET
+            article_count = article_count - 1,
+            author_count = author_count - ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id
+            ) = 0)
+        WHERE magazine_id = OLD.magazine_id;
+    DELETE FROM author_magazine_stats
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id AND article_count <= 0;
+    UPDATE author_stats SET article_count = article_count - 1 WHERE author_id = OLD.author_id;
+END;
+
+-- Moving an article between authors/magazines: the delete steps for OLD,
+-- then the insert steps for NEW.
+CREATE TRIGGER IF NOT EXISTS trg_articles_stats_update AFTER UPDATE OF author_id, magazine_id ON articles
+WHEN OLD.author_id IS NOT NEW.author_id OR OLD.magazine_id IS NOT NEW.magazine_id BEGIN
+    UPDATE author_magazine_stats SET article_count = article_count - 1
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id;
+    UPDATE magazine_stats SET
+            article_count = article_count - 1,
+            author_count = author_count - ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id
+            ) = 0)
+        WHERE magazine_id = OLD.magazine_id;
+    DELETE FROM author_magazine_stats
+        WHERE author_id = OLD.author_id AND magazine_id = OLD.magazine_id AND article_count <= 0;
+    UPDATE author_stats SET article_count = article_count - 1 WHERE author_id = OLD.author_id;
+
+    INSERT INTO author_magazine_stats (author_id, magazine_id, article_count)
+        VALUES (NEW.author_id, NEW.magazine_id, 1)
+        ON CONFLICT(author_id, magazine_id) DO UPDATE SET article_count = article_count + 1;
+    INSERT INTO magazine_stats (magazine_id, article_count, author_count)
+        VALUES (NEW.magazine_id, 1, 1)
+        ON CONFLICT(magazine_id) DO UPDATE SET
+            article_count = article_count + 1,
+            author_count = author_count + ((
+                SELECT article_count FROM author_magazine_stats
+                WHERE author_id = NEW.author_id AND magazine_id = NEW.magazine_id
+            ) = 1);
+    INSERT INTO author_stats (author_id, article_count) VALUES (NEW.author_id, 1)
+        ON CONFLICT(author_id) DO UPDATE SET article_count = article_count + 1;
+END;
@@ -0,0 +1,593 @@
+"""
+Optional sharded storage: articles spread over several SQLite files by
+magazine.
+
+    articles-cli shards init 4            # split an unsharded database
+    DB_SHARDS=4 articles-cli shards status
+    DB_SHARDS=4 articles-cli shards move 17 2
+    DB_SHARDS=4 articles-cli shards rebalance --shards 6    # add two shards
+
+DB_PATH stays the catalog: authors, magazines and the shard directory
+(`magazine_shards`, migration 5). Shard i is articles.shard{i}.db next to it
+(connection.shard_path) with the schema in shard_schema.sql; its
+connections have the catalog attached read-only as `catalog`. All articles
+of a magazine live on one shard, so the per-magazine reads
+(Magazine.articles, Magazine.contributors, Article.find_by_magazine) open
+one file, and writes to different shards commit in parallel, each through
+its own writer. Per-author reads (Author.articles, Article.find_by_author,
+Article.find_by_id, Author.most_prolific) are scatter-gathered: the query
+runs on every shard from a thread pool (sqlite3 releases the GIL while
+SQLite works) and the results are merged; so are the global aggregates
+over the counter tables (Author.most_prolific, Magazine.top_publisher,
+Magazine.magazines_with_at_least_two_authors) and Author.magazines and
+Author.topic_areas.
+
+A magazine is placed on shard `magazine_id % DB_SHARDS` by its first write,
+unless the directory already names a shard. move() copies a magazine's
+rows to the target shard, switches the directory and deletes the source
+rows while holding the source shard's writer, so concurrent writes wait
+and then follow the directory. Readers check the directory against the
+shard they read (read_for_magazine) and scatter queries only count rows of
+magazines the directory assigns to that shard, so a moving magazine is
+never seen twice. Run one move/rebalance at a time.
+
+Article ids are reserved from the catalog's id_sequences, ID_BLOCK at a
+time, so they are unique across shards and survive moves; they are not in
+insertion order across processes.
+
+Not shard-aware, and raising ValueError with DB_SHARDS set
+(require_unsharded): search, leaderboards, prefetch, pagination and
+streaming, lookups of articles by title or by many ids, the columnar
+export, WriteQueue writes, and the bulk article inserts
+(Article.bulk_create, Author.add_author_with_articles and the seed import
+of articles), whose catalog ids could collide with id_sequences. Import
+unsharded and run `shards init` afterwards.
+"""
+import argparse
+import heapq
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from lib.db import queries
+from lib.db.connection import (configure, current_db_path, get_config, read_connection,
+                               shard_path, write_connection)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "shard_schema.sql")
+ID_BLOCK = int(os.getenv("DB_SHARD_ID_BLOCK", "1000"))
+
+# catalog side
+DIRECTORY_LOOKUP = "SELECT shard FROM magazine_shards WHERE magazine_id = ?"
+DIRECTORY_ASSIGN = "INSERT OR IGNORE INTO magazine_shards (magazine_id, shard) VALUES (?, ?)"
+DIRECTORY_MOVE = "UPDATE magazine_shards SET shard = ? WHERE magazine_id = ?"
+# past the catalog's own article ids ("WHERE true": see SQLite's upsert parsing note)
+SEQUENCE_START = """
+    INSERT INTO id_sequences (name, next)
+    SELECT 'articles', COALESCE(MAX(id), 0) + 1 FROM articles WHERE true
+    ON CONFLICT(name) DO UPDATE SET next = MAX(next, excluded.next)
+"""
+SEQUENCE_RESERVE = "UPDATE id_sequences SET next = next + ? WHERE name = 'articles' RETURNING next"
+
+# shard side
+MAGAZINE_ROWS = "SELECT id, title, author_id, magazine_id FROM articles WHERE magazine_id = ?"
+MAGAZINE_DELETE = "DELETE FROM articles WHERE magazine_id = ?"
+ORPHANS_DELETE = """
+    DELETE FROM articles WHERE magazine_id IN (
+        SELECT magazine_id FROM catalog.magazine_shards WHERE shard != ?)
+"""
+COPY_FROM_CATALOG = """
+    INSERT INTO articles (id, title, author_id, magazine_id)
+    SELECT a.id, a.title, a.author_id, a.magazine_id FROM catalog.articles a
+    JOIN catalog.magazine_shards d ON d.magazine_id = a.magazine_id AND d.shard = ?
+"""
+
+
+def count() -> int:
+    return get_config().shards
+
+
+def enabled() -> bool:
+    return get_config().shards > 0
+
+
+def require_unsharded(feature: str):
+    """
+    Raises ValueError if DB_SHARDS is set: `feature` reads or writes the
+    catalog's articles, counters or search index, which sharding empties.
+    """
+    if enabled():
+        raise ValueError(f"{feature} is not supported with DB_SHARDS")
+
+
+_created = set()  # shard files whose schema this process has applied
+_created_lock = threading.Lock()
+
+
+def create(shard: int):
+    """
+    Creates shard number `shard` (or brings its schema up to date).
+    """
+    path = os.path.abspath(shard_path(shard))
+    if path in _created:
+        return
+    with _created_lock:
+        if path not in _created:
+            with write_connection(shard) as conn, open(SCHEMA_PATH) as f:
+                conn.executescript(f.read())
+            _created.add(path)
+
+
+# -- directory -------------------------------------------------------------
+
+def _directory(conn, magazine_id: int, sql: str = DIRECTORY_LOOKUP):
+    row = conn.execute(sql, (magazine_id,)).fetchone()
+    return row[0] if row else magazine_id % count()
+
+
+def shard_of(magazine_id: int) -> int:
+    with read_connection() as conn:
+        return _directory(conn, magazine_id)
+
+
+def place(magazine_id: int) -> int:
+    """
+    shard_of, recording the placement in the directory if there was none.
+    """
+    with read_connection() as conn:
+        row = conn.execute(DIRECTORY_LOOKUP, (magazine_id,)).fetchone()
+    if row:
+        return row[0]
+    with write_connection() as conn:
+        conn.execute(DIRECTORY_ASSIGN, (magazine_id, magazine_id % count()))
+        conn.commit()
+        return _directory(conn, magazine_id)
+
+
+@contextmanager
+def read_for_magazine(magazine_id: int):
+    """
+    A reader of the shard holding the magazine's articles. The shard
+    snapshot is taken before the directory is checked: if the directory
+    still names the shard, a move of the magazine has not deleted its rows
+    there yet. (Unsharded: a catalog reader.)
+    """
+    if not enabled():
+        with read_connection() as conn:
+            yield conn
+        return
+    shard = shard_of(magazine_id)
+    while True:
+        create(shard)
+        with read_connection(shard) as conn:
+            conn.execute("BEGIN")
+            conn.execute("SELECT 1 FROM articles LIMIT 1").fetchall()
+            current = _directory(conn, magazine_id, queries.MAGAZINE_SHARD)
+            if current == shard:
+                yield conn  # the pool rolls the read transaction back
+                return
+            conn.rollback()
+        shard = current
+
+
+@contextmanager
+def write_for_magazine(magazine_id: int):
+    """
+    The writer of the magazine's shard, inside BEGIN IMMEDIATE once the
+    directory is known to still name that shard. The caller commits.
+    (Unsharded: the catalog writer.)
+    """
+    if not enabled():
+        with write_connection() as conn:
+            yield conn
+        return
+    shard = place(magazine_id)
+    while True:
+        create(shard)
+        with write_connection(shard) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = _directory(conn, magazine_id, queries.MAGAZINE_SHARD)
+            if current == shard:
+                yield conn
+                return
+            conn.rollback()
+        shard = current
+
+
+# -- ids -------------------------------------------------------------------
+
+_ids = {}  # catalog path -> iterator over the reserved ids left
+_ids_lock = threading.Lock()
+
+
+def next_id() -> int:
+    """
+    A new article id, unique across shards; costs a catalog write once
+    every ID_BLOCK ids.
+    """
+    catalog = os.path.abspath(current_db_path())
+    with _ids_lock:
+        new_id = next(_ids.get(catalog, iter(())), None)
+        if new_id is None:
+            with write_connection() as conn:
+                conn.execute(SEQUENCE_START)
+                end = conn.execute(SEQUENCE_RESERVE, (ID_BLOCK,)).fetchone()[0]
+                conn.commit()
+            _ids[catalog] = iter(range(end - ID_BLOCK + 1, end))
+            new_id = end - ID_BLOCK
+        return new_id
+
+
+# -- scatter-gather --------------------------------------------------------
+
+_executor = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+
+def scatter(fn, shards=None):
+    """
+    Runs fn(conn, shard) on a reader of every shard (or of the shard
+    numbers in `shards`) in parallel; returns the results in shard order.
+    """
+    global _executor, _executor_size
+    shards = list(range(count()) if shards is None else shards)
+    for shard in shards:
+        create(shard)
+
+    def run(shard):
+        with read_connection(shard) as conn:
+            return fn(conn, shard)
+
+    if len(shards) == 1:
+        return [run(shards[0])]
+    with _executor_lock:
+        if _executor_size < len(shards):
+            from concurrent.futures import ThreadPoolExecutor
+
+            if _executor is not None:
+                # lets the work already submitted finish, then stops its threads
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(len(shards), thread_name_prefix="shards")
+            _executor_size = len(shards)
+        # map() submits everything now, before another call can replace the pool
+        results = _executor.map(run, shards)
+    return list(results)
+
+
+def _gather_by_id(sql: str, *params):
+    parts = scatter(lambda conn, shard: conn.execute(sql, (shard, *params)).fetchall())
+    return list(heapq.merge(*parts, key=lambda r: r["id"]))
+
+
+def author_articles(author_id: int):
+    """
+    The author's article rows from all shards, in id order.
+    """
+    return _gather_by_id(queries.SHARD_ARTICLES_BY_AUTHOR, author_id)
+
+
+def find_article(article_id: int):
+    """
+    The article's row from whichever shard holds it, or None.
+    """
+    for row in scatter(lambda conn, shard: conn.execute(
+            queries.SHARD_ARTICLE_BY_ID, (shard, article_id)).fetchone()):
+        if row is not None:
+            return row
+    return None
+
+
+def author_counts() -> Counter:
+    """
+    Article count per author id, summed over the shards' counter tables.
+    """
+    counts = Counter()
+    for part in scatter(lambda conn, shard: conn.execute(queries.SHARD_AUTHOR_COUNTS, (shard,)).fetchall()):
+        counts.update(dict(part))
+    return counts
+
+
+def magazine_counts() -> Counter:
+    """
+    Article count per magazine id, from the shards' counter tables.
+    """
+    counts = Counter()
+    for part in scatter(lambda conn, shard: conn.execute(queries.SHARD_MAGAZINE_COUNTS, (shard,)).fetchall()):
+        counts.update(dict(part))
+    return counts
+
+
+def _top(counts: Counter):
+    # highest count, lowest id on ties; None without articles
+    counts = {key: n for key, n in counts.items() if n > 0}
+    if not counts:
+        return None
+    return min(counts.items(), key=lambda item: (-item[1], item[0]))[0]
+
+
+def most_prolific_id():
+    """
+    Id of the author with the most articles (lowest id on ties), or None.
+    """
+    return _top(author_counts())
+
+
+def top_magazine_id():
+    """
+    Id of the magazine with the most articles (lowest id on ties), or None.
+    """
+    return _top(magazine_counts())
+
+
+def author_magazines(author_id: int):
+    """
+    Catalog rows of the magazines the author has articles in, in id order.
+    """
+    return _gather_by_id(queries.SHARD_AUTHOR_MAGAZINES, author_id)
+
+
+def magazines_with_two_authors():
+    """
+    Catalog rows of the magazines with articles by at least two authors, in
+    id order. All of a magazine's articles are on one shard, so its
+    author_count there is the total.
+    """
+    return _gather_by_id(queries.SHARD_MAGAZINES_WITH_TWO_AUTHORS)
+
+
+# -- writes ----------------------------------------------------------------
+
+def insert_article(title: str, author_id: int, magazine_id: int) -> int:
+    article_id = next_id()
+    with write_for_magazine(magazine_id) as conn:
+        conn.execute(queries.ARTICLE_INSERT_WITH_ID, (article_id, title, author_id, magazine_id))
+        conn.commit()
+    return article_id
+
+
+def save_article(article) -> Counter:
+    """
+    Sharded Article._write: inserts or updates `article` on the shard of
+    its magazine and returns the counter deltas. Moving an article to
+    a magazine on another shard inserts it there (same id), then deletes it
+    from the old one.
+    """
+    deltas = Counter()
+    new = (article.author_id, article.magazine_id)
+    if not article.id:
+        article.id = insert_article(article.title, *new)
+        deltas[new] += 1
+        return deltas
+    old = find_article(article.id)
+    if old is None:
+        return deltas
+    with write_for_magazine(article.magazine_id) as conn:
+        params = (article.title, article.author_id, article.magazine_id, article.id)
+        if conn.execute(queries.ARTICLE_FKS_BY_ID, (article.id,)).fetchone():
+            conn.execute(queries.ARTICLE_UPDATE, params)
+            moved = False
+        else:
+            conn.execute(queries.ARTICLE_INSERT_WITH_ID, (article.id, *params[:3]))
+            moved = True
+        conn.commit()
+    if moved:
+        with write_for_magazine(old["magazine_id"]) as conn:
+            conn.execute(queries.ARTICLE_DELETE, (article.id,))
+            conn.commit()
+    if (old["author_id"], old["magazine_id"]) != new:
+        deltas[(old["author_id"], old["magazine_id"])] -= 1
+        deltas[new] += 1
+    return deltas
+
+
+# -- administration --------------------------------------------------------
+
+_moving = threading.Lock()
+
+
+def move(magazine_id: int, target: int) -> int:
+    """
+    Moves a magazine's articles to shard `target`; returns how many.
+    """
+    with _moving:
+        source = place(magazine_id)
+        if source == target:
+            return 0
+        create(target)
+        with write_connection(source) as src:
+            src.execute("BEGIN IMMEDIATE")
+            rows = [tuple(r) for r in src.execute(MAGAZINE_ROWS, (magazine_id,))]
+            with write_connection(target) as dst:
+                dst.execute("BEGIN IMMEDIATE")
+                # leftovers of an interrupted move
+                dst.execute(MAGAZINE_DELETE, (magazine_id,))
+                dst.executemany(queries.ARTICLE_INSERT_WITH_ID, rows)
+                dst.commit()
+            with write_connection() as conn:
+                conn.execute(DIRECTORY_MOVE, (target, magazine_id))
+                conn.commit()
+            src.execute(MAGAZINE_DELETE, (magazine_id,))
+            src.commit()
+        return len(rows)
+
+
+def _directory_shards():
+    with read_connection() as conn:
+        return {r[0] for r in conn.execute("SELECT DISTINCT shard FROM magazine_shards")}
+
+
+def magazine_loads(shards=None) -> dict:
+    """
+    {shard: {magazine_id: articles}} for the magazines the directory
+    assigns to each shard (default: configured and assigned ones).
+    """
+    if shards is None:
+        shards = sorted(set(range(count())) | _directory_shards())
+    parts = scatter(lambda conn, shard: dict(conn.execute(
+        queries.SHARD_MAGAZINE_COUNTS, (shard,)).fetchall()), shards)
+    return dict(zip(shards, parts))
+
+
+def spread(sizes: dict, n: int) -> dict:
+    """
+    {magazine_id: shard}: largest magazine first onto the least loaded of
+    `n` shards.
+    """
+    heap = [(0, shard) for shard in range(n)]
+    placement = {}
+    for magazine_id, size in sorted(sizes.items(), key=lambda item: (-item[1], item[0])):
+        load, shard = heapq.heappop(heap)
+        placement[magazine_id] = shard
+        heapq.heappush(heap, (load + size, shard))
+    return placement
+
+
+def plan(loads: dict, n: int):
+    """
+    Moves [(magazine_id, from, to)] that spread `loads` (see
+    magazine_loads) over shards 0..n-1: magazines on shards >= n go to the
+    least loaded shard, then, while a magazine on the fullest shard is
+    smaller than the gap to the emptiest one, the one closest to half that
+    gap moves there. Every step lowers the sum of squared loads, so this
+    ends.
+    """
+    sizes, origin = {}, {}
+    for shard, magazines in loads.items():
+        for magazine_id, size in magazines.items():
+            sizes[magazine_id], origin[magazine_id] = size, shard
+    placement = {m: s for m, s in origin.items() if s < n}
+    totals = [0] * n
+    for magazine_id, shard in placement.items():
+        totals[shard] += sizes[magazine_id]
+    for magazine_id in sorted(set(origin) - set(placement), key=lambda m: (-sizes[m], m)):
+        shard = min(range(n), key=totals.__getitem__)
+        placement[magazine_id] = shard
+        totals[shard] += sizes[magazine_id]
+    while True:
+        heavy = max(range(n), key=totals.__getitem__)
+        light = min(range(n), key=totals.__getitem__)
+        gap = totals[heavy] - totals[light]
+        candidates = [m for m, s in placement.items() if s == heavy and 0 < sizes[m] < gap]
+        if not candidates:
+            break
+        magazine_id = min(candidates, key=lambda m: (abs(gap - 2 * sizes[m]), m))
+        placement[magazine_id] = light
+        totals[heavy] -= sizes[magazine_id]
+        totals[light] += sizes[magazine_id]
+    return sorted((m, origin[m], s) for m, s in placement.items() if s != origin[m])
+
+
+def clean_orphans(shards=None) -> int:
+    """
+    Deletes rows of magazines the directory assigns to another shard (what
+    an interrupted move leaves behind). Returns the number deleted.
+    """
+    deleted = 0
+    with _moving:
+        for shard in (range(count()) if shards is None else shards):
+            create(shard)
+            with write_connection(shard) as conn:
+                deleted += conn.execute(ORPHANS_DELETE, (shard,)).rowcount
+                conn.commit()
+    return deleted
+
+
+def rebalance(n: int = None, dry_run: bool = False, out=print):
+    """
+    Spreads the magazines over `n` shards (default: DB_SHARDS), adding new
+    shard files or emptying the ones >= n. Returns the planned moves.
+    """
+    previous = count()
+    n = n or previous
+    if n < 1:
+        raise ValueError("Number of shards must be at least 1")
+    configure(shards=max(n, previous))
+    loads = magazine_loads()
+    moves = plan(loads, n)
+    for magazine_id, source, target in moves:
+        size = loads[source][magazine_id]
+        if dry_run:
+            out(f"magazine {magazine_id}: shard {source} -> {target} ({size} articles)")
+        else:
+            move(magazine_id, target)
+            out(f"moved magazine {magazine_id}: shard {source} -> {target} ({size} articles)")
+    if not dry_run:
+        deleted = clean_orphans(sorted(loads))
+        if deleted:
+            out(f"deleted {deleted} orphaned rows")
+    configure(shards=previous if dry_run else n)
+    return moves
+
+
+def init(n: int, out=print):
+    """
+    Shards an unsharded database: places magazines with spread(), fills each
+    shard from the catalog's articles, then deletes those.
+    """
+    from lib.db.migrations import migrate
+
+    if n < 1:
+        raise ValueError("Number of shards must be at least 1")
+    migrate(show_plans=False, out=lambda line: None)
+    with read_connection() as conn:
+        if conn.execute("SELECT 1 FROM magazine_shards LIMIT 1").fetchone():
+            raise ValueError("Database is already sharded (see: shards status)")
+        sizes = dict(conn.execute("SELECT magazine_id, COUNT(*) FROM articles GROUP BY magazine_id").fetchall())
+    configure(shards=n)
+    with write_connection() as conn:
+        conn.executemany(DIRECTORY_ASSIGN, spread(sizes, n).items())
+        conn.execute(SEQUENCE_START)
+        conn.commit()
+    for shard in range(n):
+        create(shard)
+        with write_connection(shard) as conn:
+            copied = conn.execute(COPY_FROM_CATALOG, (shard,)).rowcount
+            conn.commit()
+        out(f"shard {shard}: {copied} articles -> {shard_path(shard)}")
+    with write_connection() as conn:
+        conn.execute("DELETE FROM articles")
+        conn.commit()
+
+
+def status(out=print):
+    for shard, magazines in magazine_loads().items():
+        note = "" if shard < count() else "  (beyond DB_SHARDS)"
+        out(f"{shard:>3}  {shard_path(shard)}  {len(magazines)} magazines, "
+            f"{sum(magazines.values())} articles{note}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sharded article storage")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("init", help="split an unsharded database into N shards")
+    p.add_argument("shards", type=int)
+    sub.add_parser("status", help="magazines and articles per shard")
+    p = sub.add_parser("move", help="move a magazine's articles to another shard")
+    p.add_argument("magazine_id", type=int)
+    p.add_argument("shard", type=int)
+    p = sub.add_parser("rebalance", help="even out shard sizes, or change the number of shards")
+    p.add_argument("--shards", type=int, default=None, help="new number of shards (default: DB_SHARDS)")
+    p.add_argument("--dry-run", action="store_true", help="only print the moves")
+    args = parser.parse_args(argv)
+
+    if args.command == "init":
+        init(args.shards)
+        print(f"Set DB_SHARDS={args.shards}.")
+        return
+    if not enabled():
+        parser.error("the database is not sharded: set DB_SHARDS (or run: shards init N)")
+    if args.command == "status":
+        status()
+    elif args.command == "move":
+        print(f"{move(args.magazine_id, args.shard)} articles moved")
+    else:
+        resize = args.shards is not None and args.shards != count()
+        if not rebalance(args.shards, dry_run=args.dry_run):
+            print("Balanced.")
+        if resize and not args.dry_run:
+            print(f"Set DB_SHARDS={args.shards}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import base64
+import binascii
+import json
+import os
+from typing import List, NamedTuple, Optional
+
+from lib.db import queries
+from lib.db.connection import read_connection
+
+DEFAULT_BATCH_SIZE = int(os.getenv("DB_STREAM_BATCH_SIZE", "1000"))
+
+
+def fetch_after(conn, sql: str, params, after_id, limit: int):
+    """
+    One keyset page: rows of `sql` (a SELECT whose WHERE clause is already
+    open, no ORDER BY) with id > after_id, in id order.
+    """
+    cur = conn.execute(queries.keyset(sql), (*params, after_id, limit))
+    return cur.fetchmany(limit)
+
+
+def iter_keyset(sql: str, params=(), batch_size: int = DEFAULT_BATCH_SIZE, after_id: int = 0):
+    """
+    Streams the rows of `sql` in id order, `batch_size` rows at a time.
+
+    Each batch is a separate `WHERE ... AND id > last_id` query on a pooled
+    connection that is released before any row is yielded, so memory stays
+    flat and a slow consumer never pins a connection or a read transaction.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    while True:
+        with read_connection() as conn:
+            rows = fetch_after(conn, sql, params, after_id, batch_size)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after_id = rows[-1]["id"]
+
+
+class Page(NamedTuple):
+    items: List
+    next_cursor: Optional[str]
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"after": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    """
+    Returns the id to continue after; a missing cursor means the first page.
+    """
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return int(json.loads(raw)["after"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid page cursor: {cursor!r}") from None
+
+
+def fetch_page(sql: str, params, cursor: Optional[str], limit: int, build=None) -> Page:
+    """
+    Keyset page of `sql` (see fetch_after). One extra row is read to decide
+    whether there is a next page, so the last page has next_cursor=None.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    with read_connection() as conn:
+        rows = fetch_after(conn, sql, params, decode_cursor(cursor), limit + 1)
+    more = len(rows) > limit
+    rows = rows[:limit]
+    items = [build(r) for r in rows] if build else rows
+    return Page(items, encode_cursor(rows[-1]["id"]) if more else None)
@@ -0,0 +1,171 @@
+"""
+Background single-writer queue with group commit.
+
+    with WriteQueue() as writer:
+        futures = [author.add_article(mag, title, writer=writer) for title in titles]
+    ids = [f.result() for f in futures]
+
+Producers submit writes from any thread and get a Future back. One writer
+thread drains the queue and commits up to `max_batch` writes per
+transaction, waiting at most `max_delay_ms` for a batch to fill, so N
+concurrent inserts cost one fsync instead of N and never see "database is
+locked". Each write runs in its own SAVEPOINT: a failing write fails only
+its own future. The queue is bounded; submit() blocks when it is full.
+"""
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from lib.db import leaderboard, resultcache
+from lib.db.connection import write_connection
+
+MAX_BATCH = int(os.getenv("DB_WRITE_MAX_BATCH", "500"))
+MAX_DELAY_MS = float(os.getenv("DB_WRITE_MAX_DELAY_MS", "5"))
+MAX_PENDING = int(os.getenv("DB_WRITE_MAX_PENDING", "10000"))
+
+
+class WriteQueueClosed(Exception):
+    pass
+
+
+class _Write:
+    __slots__ = ("work", "on_commit", "future", "result")
+
+    def __init__(self, work, on_commit):
+        self.work = work
+        self.on_commit = on_commit
+        self.future = Future()
+        self.result = None
+
+
+_STOP = object()
+
+
+class WriteQueue:
+    def __init__(self, max_batch: int = MAX_BATCH, max_delay_ms: float = MAX_DELAY_MS,
+                 max_pending: int = MAX_PENDING):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        self.batches = 0
+        self.writes = 0
+
+    def __repr__(self):
+        return f"<WriteQueue pending={self._queue.qsize()} batches={self.batches} writes={self.writes}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def submit(self, work, on_commit=None, timeout: float = None) -> Future:
+        """
+        work: callable(conn) run inside the batch transaction; its return
+          value is the future's result.
+        on_commit: optional callable(result) run after the batch commits (e.g.
+          cache/leaderboard updates); its return value replaces the result.
+        Blocks while the queue is full; raises queue.Full after `timeout`.
+        """
+        if self._closed:
+            raise WriteQueueClosed("WriteQueue is closed")
+        write = _Write(work, on_commit)
+        self._queue.put(write, timeout=timeout)
+        return write.future
+
+    def execute(self, sql: str, params=(), timeout: float = None) -> Future:
+        """
+        Queues a single statement. The future resolves to lastrowid for
+        INSERTs and to the affected row count otherwise.
+        """
+        def work(conn):
+            cur = conn.execute(sql, params)
+            return cur.lastrowid if sql.lstrip()[:6].upper() == "INSERT" else cur.rowcount
+
+        def committed(result):
+            # arbitrary SQL: any table may have changed
+            resultcache.invalidate()
+            leaderboard.invalidate()
+            return result
+        return self.submit(work, on_commit=committed, timeout=timeout)
+
+    def flush(self, timeout: float = None):
+        """
+        Blocks until everything submitted before this call is committed.
+        """
+        self.submit(lambda conn: None, timeout=timeout).result(timeout)
+
+    def close(self, timeout: float = None):
+        """
+        Stops accepting writes, commits what is queued and stops the thread.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        while True:
+            batch, stop = self._next_batch()
+            if batch:
+                self._commit(batch)
+            if stop:
+                return
+
+    def _commit(self, batch):
+        done = []
+        try:
+            with write_connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for write in batch:
+                    conn.execute("SAVEPOINT queued_write")
+                    try:
+                        write.result = write.work(conn)
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO queued_write")
+                        conn.execute("RELEASE queued_write")
+                        write.future.set_exception(e)
+                        continue
+                    conn.execute("RELEASE queued_write")
+                    done.append(write)
+                conn.commit()
+        except Exception as e:
+            for write in batch:
+                if not write.future.done():
+                    write.future.set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(done)
+        for write in done:
+            try:
+                result = write.on_commit(write.result) if write.on_commit else write.result
+            except Exception as e:
+                write.future.set_exception(e)
+            else:
+                write.future.set_result(result)
@@ -0,0 +1,231 @@
+"""
+Async counterparts of the models for asyncio services.
+
+    from lib.models import aio
+
+    author = await aio.Author.afind_by_id(1)
+    async for row in author.aiter_articles():
+        ...
+
+Every call runs the synchronous model method on a small dedicated thread
+pool, so SQLite I/O never blocks the event loop. At most `max_workers`
+calls run at once (each borrows one pooled connection); further calls wait
+on an asyncio semaphore and can be cancelled while waiting. A call that is
+already executing finishes in its thread and its result is discarded.
+"""
+import asyncio
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from lib.db.connection import POOL_SIZE
+from lib.db.streaming import DEFAULT_BATCH_SIZE
+from lib.models.article import Article as _Article
+from lib.models.author import Author as _Author
+from lib.models.magazine import Magazine as _Magazine
+
+MAX_WORKERS = int(os.getenv("DB_AIO_WORKERS", str(POOL_SIZE)))
+
+
+class AsyncExecutor:
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="db-aio")
+        return self._pool
+
+    def _semaphore(self, loop):
+        # asyncio primitives belong to one event loop
+        sem = self._semaphores.get(loop)
+        if sem is None:
+            sem = self._semaphores[loop] = asyncio.Semaphore(self.max_workers)
+        return sem
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # run in a copy of the caller's context (as asyncio.to_thread does),
+        # so the active Session is the same in the worker thread
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        async with self._semaphore(loop):
+            return await loop.run_in_executor(self._executor(), call)
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait, cancel_futures=True)
+                self._pool = None
+            self._semaphores.clear()
+
+
+executor = AsyncExecutor()
+
+
+async def run(fn, *args, **kwargs):
+    """
+    Runs any blocking callable (e.g. a model method) on the database executor.
+    """
+    return await executor.run(fn, *args, **kwargs)
+
+
+async def _aiter(iterator, batch_size: int):
+    # Pulls `batch_size` items per executor call so each await covers a
+    # whole keyset batch rather than a single row.
+    while True:
+        batch = await run(lambda: list(itertools.islice(iterator, batch_size)))
+        for item in batch:
+            yield item
+        if len(batch) < batch_size:
+            return
+
+
+class Author(_Author):
+    __slots__ = ()
+    _model = _Author  # shares session/cache entries with lib.models
+
+    @classmethod
+    async def afind_by_id(cls, author_id: int):
+        return await run(cls.find_by_id, author_id)
+
+    @classmethod
+    async def afind_by_name(cls, name: str):
+        return await run(cls.find_by_name, name)
+
+    @classmethod
+    async def afind_many(cls, ids):
+        return await run(cls.find_many, list(ids))
+
+    @classmethod
+    async def afind_many_by_name(cls, names):
+        return await run(cls.find_many_by_name, list(names))
+
+    @classmethod
+    async def amost_prolific(cls):
+        return await run(cls.most_prolific)
+
+    @classmethod
+    async def aleaderboard(cls, n: int = 100, category=None):
+        return await run(cls.leaderboard, n, category)
+
+    async def asave(self):
+        return await run(self.save)
+
+    async def aarticles(self):
+        return await run(self.articles)
+
+    async def amagazines(self):
+        return await run(self.magazines)
+
+    async def atopic_areas(self):
+        return await run(self.topic_areas)
+
+    async def aadd_article(self, magazine, title: str):
+        return await run(self.add_article, magazine, title)
+
+    def aiter_articles(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        return _aiter(self.iter_articles(batch_size), batch_size)
+
+
+class Magazine(_Magazine):
+    __slots__ = ()
+    _model = _Magazine  # shares session/cache entries with lib.models
+
+    @classmethod
+    async def afind_by_id(cls, mid: int):
+        return await run(cls.find_by_id, mid)
+
+    @classmethod
+    async def afind_by_name(cls, name: str):
+        return await run(cls.find_by_name, name)
+
+    @classmethod
+    async def afind_many(cls, ids):
+        return await run(cls.find_many, list(ids))
+
+    @classmethod
+    async def afind_many_by_name(cls, names):
+        return await run(cls.find_many_by_name, list(names))
+
+    @classmethod
+    async def afind_by_category(cls, category: str):
+        return await run(cls.find_by_category, category)
+
+    @classmethod
+    async def atop_publisher(cls):
+        return await run(cls.top_publisher)
+
+    @classmethod
+    async def aleaderboard(cls, n: int = 100):
+        return await run(cls.leaderboard, n)
+
+    async def asave(self):
+        return await run(self.save)
+
+    async def aarticles(self):
+        return await run(self.articles)
+
+    async def acontributors(self):
+        return await run(self.contributors)
+
+    async def aarticle_titles(self):
+        return await run(self.article_titles)
+
+    async def acontributing_authors(self, threshold=2):
+        return await run(self.contributing_authors, threshold)
+
+    def aiter_articles(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        return _aiter(self.iter_articles(batch_size), batch_size)
+
+
+class Article(_Article):
+    __slots__ = ()
+    _model = _Article  # shares session/cache entries with lib.models
+
+    @classmethod
+    async def afind_by_id(cls, aid: int):
+        return await run(cls.find_by_id, aid)
+
+    @classmethod
+    async def afind_many(cls, ids):
+        return await run(cls.find_many, list(ids))
+
+    @classmethod
+    async def afind_many_by_title(cls, titles):
+        return await run(cls.find_many_by_title, list(titles))
+
+    @classmethod
+    async def afind_by_author(cls, author_id: int):
+        return await run(cls.find_by_author, author_id)
+
+    @classmethod
+    async def afind_by_magazine(cls, magazine_id: int):
+        return await run(cls.find_by_magazine, magazine_id)
+
+    @classmethod
+    async def asearch(cls, query: str, limit: int = 20, magazine_id=None):
+        return await run(cls.search, query, limit, magazine_id)
+
+    @classmethod
+    async def apage(cls, magazine_id=None, author_id=None, after=None, limit: int = 50):
+        return await run(cls.page, magazine_id, author_id, after, limit)
+
+    async def asave(self):
+        return await run(self.save)
+
+    @classmethod
+    def aiter_by_author(cls, author_id: int, batch_size: int = DEFAULT_BATCH_SIZE):
+        return _aiter(cls.iter_by_author(author_id, batch_size), batch_size)
+
+    @classmethod
+    def aiter_by_magazine(cls, magazine_id: int, batch_size: int = DEFAULT_BATCH_SIZE):
+        return _aiter(cls.iter_by_magazine(magazine_id, batch_size), batch_size)
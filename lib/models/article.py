@@ -1,17 +1,18 @@
 # lib/models/article.py
-import os
-import sys
+import re
+from collections import Counter
 from typing import Optional
 
-# ✅ Ensure project root is on sys.path (like seed.py)
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
-from lib.db.connection import get_connection
+from lib.db import leaderboard, queries, resultcache, session, shards
+from lib.db.bulk import DEFAULT_CHUNK_SIZE, bulk_insert
+from lib.db.connection import read_connection, write_connection
+from lib.db.eager import Found, fetch_in, group_by, load_many
+from lib.db.streaming import DEFAULT_BATCH_SIZE, Page, fetch_page, iter_keyset
 
 
 class Article:
+    __slots__ = ("id", "title", "author_id", "magazine_id")
+
     def __init__(self, title: str, author_id: int, magazine_id: int, id: Optional[int] = None):
         if not title or not title.strip():
             raise ValueError("Article title required")
@@ -20,69 +21,236 @@ class Article:
         self.author_id = author_id
         self.magazine_id = magazine_id
 
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds an Article from a trusted database row (id, title, author_id,
+        magazine_id) without re-validating or re-stripping the title.
+        """
+        obj = cls.__new__(cls)
+        obj.id, obj.title = row["id"], row["title"]
+        obj.author_id, obj.magazine_id = row["author_id"], row["magazine_id"]
+        return obj
+
     def __repr__(self):
         return f"<Article {self.id}: {self.title} (author {self.author_id}, mag {self.magazine_id})>"
 
-    def save(self):
-        conn = get_connection()
-        try:
-            cur = conn.cursor()
-            if self.id:
-                cur.execute(
-                    "UPDATE articles SET title = ?, author_id = ?, magazine_id = ? WHERE id = ?",
-                    (self.title, self.author_id, self.magazine_id, self.id),
-                )
-            else:
-                cur.execute(
-                    "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
-                    (self.title, self.author_id, self.magazine_id),
-                )
-                self.id = cur.lastrowid
-            conn.commit()
-            return self
-        finally:
-            conn.close()
+    def save(self, writer=None):
+        """
+        Inserts or updates the article. With `writer` (a lib.db.writer.WriteQueue)
+        the write is group-committed in the background and a Future resolving
+        to this article is returned instead (not with DB_SHARDS).
+        """
+        if shards.enabled():
+            if writer is not None:
+                shards.require_unsharded("WriteQueue writes")
+            return self._saved((None, shards.save_article(self)))
+        if writer is not None:
+            return leaderboard.submit(writer, self._write, on_commit=self._saved)
+        with leaderboard.writing():
+            with write_connection() as conn:
+                written = self._write(conn)
+                conn.commit()
+            return self._saved(written)
+
+    def _write(self, conn):
+        """
+        Runs the INSERT/UPDATE; returns (new id or None, counter deltas).
+        The id is only set on the article by _saved(), after the commit: a
+        WriteQueue batch can still fail and roll the row back.
+        """
+        cur = conn.cursor()
+        deltas = Counter()
+        if self.id:
+            cur.execute(queries.ARTICLE_FKS_BY_ID, (self.id,))
+            old = cur.fetchone()
+            cur.execute(queries.ARTICLE_UPDATE, (self.title, self.author_id, self.magazine_id, self.id))
+            if old and tuple(old) != (self.author_id, self.magazine_id):
+                deltas[tuple(old)] -= 1
+                deltas[(self.author_id, self.magazine_id)] += 1
+        else:
+            cur.execute(queries.ARTICLE_INSERT, (self.title, self.author_id, self.magazine_id))
+            deltas[(self.author_id, self.magazine_id)] += 1
+            return cur.lastrowid, deltas
+        return None, deltas
+
+    def _saved(self, written):
+        # after commit
+        new_id, deltas = written
+        if new_id is not None:
+            self.id = new_id
+        session.saved(self)
+        resultcache.bump("articles")
+        if deltas:
+            leaderboard.record_articles(deltas)
+        return self
 
     @classmethod
     def find_by_id(cls, aid: int):
-        conn = get_connection()
-        try:
+        cached = session.lookup(cls, aid)
+        if cached is not None:
+            return cached
+        if shards.enabled():
+            row = shards.find_article(aid)
+            return session.remember(cls.from_row(row)) if row else None
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM articles WHERE id = ?", (aid,))
+            cur.execute(queries.ARTICLE_BY_ID, (aid,))
             row = cur.fetchone()
-            return cls(row["title"], row["author_id"], row["magazine_id"], row["id"]) if row else None
-        finally:
-            conn.close()
+            return session.remember(cls.from_row(row)) if row else None
 
     @classmethod
     def find_by_title(cls, title: str):
-        conn = get_connection()
-        try:
+        shards.require_unsharded("Article.find_by_title")
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM articles WHERE title = ?", (title.strip(),))
+            cur.execute(queries.ARTICLES_BY_TITLE, (title.strip(),))
             rows = cur.fetchall()
-            return [cls(r["title"], r["author_id"], r["magazine_id"], r["id"]) for r in rows]
-        finally:
-            conn.close()
+            return [cls.from_row(r) for r in rows]
+
+    @classmethod
+    def find_many(cls, ids) -> Found:
+        """
+        find_by_id for many ids in at most one query, whatever their number.
+        Returns Found(items, missing) with items in the order of `ids`.
+        """
+        shards.require_unsharded("Article.find_many")
+        return load_many(cls, queries.ARTICLES_BY_IDS, ids)
+
+    @classmethod
+    def find_many_by_title(cls, titles) -> Found:
+        """
+        find_by_title for many titles in one query. Titles aren't unique:
+        items holds every match, grouped in the order of `titles` and by id
+        within a title; missing lists the titles with no article.
+        """
+        shards.require_unsharded("Article.find_many_by_title")
+        titles = [t.strip() for t in titles]
+        if not titles:
+            return Found([], [])
+        with read_connection() as conn:
+            by_title = group_by(fetch_in(conn, queries.ARTICLES_BY_TITLES, set(titles)), "title")
+        items = [cls.from_row(r) for t in dict.fromkeys(titles) for r in by_title.get(t, [])]
+        return Found(items, [t for t in dict.fromkeys(titles) if t not in by_title])
+
+    @staticmethod
+    def _match_expression(query: str) -> str:
+        # Every word becomes a quoted prefix term ("deep"* "lea"*), so user
+        # input can't inject FTS5 operators and partial words still match.
+        return " ".join(f'"{term}"*' for term in re.findall(r"\w+", query))
+
+    @classmethod
+    def search(cls, query: str, limit: int = 20, magazine_id: Optional[int] = None):
+        """
+        Keyword/prefix search over article titles using the articles_fts
+        index, best matches (bm25) first. All words must match.
+        """
+        shards.require_unsharded("Article.search")
+        match = cls._match_expression(query)
+        if not match:
+            return []
+        params = [match]
+        if magazine_id is not None:
+            params.append(magazine_id)
+        params.append(limit)
+        with read_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(queries.article_search(magazine_id is not None), params)
+            return [cls.from_row(r) for r in cur.fetchall()]
 
     @classmethod
     def find_by_author(cls, author_id: int):
-        conn = get_connection()
-        try:
+        if shards.enabled():
+            return [cls.from_row(r) for r in shards.author_articles(author_id)]
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM articles WHERE author_id = ?", (author_id,))
+            cur.execute(queries.ARTICLES_BY_AUTHOR, (author_id,))
             rows = cur.fetchall()
-            return [cls(r["title"], r["author_id"], r["magazine_id"], r["id"]) for r in rows]
-        finally:
-            conn.close()
+            return [cls.from_row(r) for r in rows]
 
     @classmethod
     def find_by_magazine(cls, magazine_id: int):
-        conn = get_connection()
-        try:
+        with shards.read_for_magazine(magazine_id) as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM articles WHERE magazine_id = ?", (magazine_id,))
+            cur.execute(queries.ARTICLES_BY_MAGAZINE, (magazine_id,))
             rows = cur.fetchall()
-            return [cls(r["title"], r["author_id"], r["magazine_id"], r["id"]) for r in rows]
-        finally:
-            conn.close()
+            return [cls.from_row(r) for r in rows]
+
+    @classmethod
+    def iter_by_author(cls, author_id: int, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Generator counterpart of find_by_author: yields articles in id order,
+        fetching `batch_size` rows per query.
+        """
+        shards.require_unsharded("Article.iter_by_author")  # now, not on the first next()
+        return (cls.from_row(r) for r in iter_keyset(queries.ARTICLES_BY_AUTHOR, (author_id,), batch_size))
+
+    @classmethod
+    def iter_by_magazine(cls, magazine_id: int, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Generator counterpart of find_by_magazine.
+        """
+        shards.require_unsharded("Article.iter_by_magazine")
+        return (cls.from_row(r) for r in iter_keyset(queries.ARTICLES_BY_MAGAZINE, (magazine_id,), batch_size))
+
+    @classmethod
+    def page(cls, magazine_id: Optional[int] = None, author_id: Optional[int] = None,
+             after: Optional[str] = None, limit: int = 50) -> Page:
+        """
+        Cursor-based pagination over articles, optionally filtered by magazine
+        and/or author. Pass the returned `next_cursor` as `after` to get the
+        next page; it is None on the last page. Every page is an index range
+        scan on (fk, id), so deep pages cost the same as the first one.
+        """
+        shards.require_unsharded("Article.page")
+        params = [p for p in (magazine_id, author_id) if p is not None]
+        return fetch_page(
+            queries.article_filter(magazine_id is not None, author_id is not None), params, after, limit,
+            build=cls.from_row,
+        )
+
+    @staticmethod
+    def _bulk_params(item):
+        if isinstance(item, Article):
+            return (item.title, item.author_id, item.magazine_id)
+        if isinstance(item, dict):
+            title, author_id, magazine_id = item["title"], item["author_id"], item["magazine_id"]
+        else:
+            title, author_id, magazine_id = item
+        if not title or not title.strip():
+            raise ValueError("Article title required")
+        return (title.strip(), author_id, magazine_id)
+
+    @classmethod
+    def bulk_create(cls, articles, chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False):
+        """
+        Inserts many articles in a single transaction using executemany.
+        articles: iterable of Article instances, dicts {'title', 'author_id',
+        'magazine_id'} or (title, author_id, magazine_id) tuples. It is read
+        in chunks of `chunk_size`, so generators are never fully materialised.
+        Article instances get their new id set.
+        Returns the number of rows inserted, or the new ids if return_ids=True.
+        Not with DB_SHARDS.
+        """
+        shards.require_unsharded("Article.bulk_create")
+        deltas = Counter()
+
+        def to_params(item):
+            params = cls._bulk_params(item)
+            deltas[params[1:]] += 1
+            return params
+
+        with leaderboard.writing():
+            result = bulk_insert(
+                queries.ARTICLE_INSERT,
+                articles, to_params, chunk_size=chunk_size, return_ids=return_ids,
+                on_insert=_set_id,
+            )
+            resultcache.bump("articles")
+            leaderboard.record_articles(deltas)
+        return result
+
+
+def _set_id(item, new_id):
+    if isinstance(item, Article):
+        item.id = new_id
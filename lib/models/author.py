@@ -1,174 +1,298 @@
 # lib/models/author.py
-import os
-import sys
-from typing import List, Optional
+from collections import Counter
+from typing import Optional
 
-# ✅ Ensure project root is on sys.path
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
-from lib.db.connection import get_connection
-
-# lib/models/author.py
-from typing import List, Optional
-from lib.db.connection import get_connection
+from lib.db import leaderboard, queries, resultcache, session, shards
+from lib.db.bulk import DEFAULT_CHUNK_SIZE, bulk_insert
+from lib.db.connection import read_connection, write_connection
+from lib.db.eager import Found, check_relations, collect, fetch_in, group_by, load_many
+from lib.db.streaming import DEFAULT_BATCH_SIZE, iter_keyset
 
 class Author:
+    __slots__ = ("id", "name", "_prefetched")
+
     def __init__(self, name: str, id: Optional[int] = None):
         if not name or not name.strip():
             raise ValueError("Author name must be provided")
         self.id = id
         self.name = name.strip()
+        self._prefetched = None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds an Author from a trusted database row without re-validating.
+        """
+        obj = cls.__new__(cls)
+        obj.id, obj.name, obj._prefetched = row["id"], row["name"], None
+        return obj
 
     def __repr__(self):
         return f"<Author {self.id}: {self.name}>"
 
     def save(self):
-        conn = get_connection()
-        try:
+        with write_connection() as conn:
             cur = conn.cursor()
             if self.id:
-                cur.execute("UPDATE authors SET name = ? WHERE id = ?", (self.name, self.id))
+                cur.execute(queries.AUTHOR_UPDATE, (self.name, self.id))
             else:
-                cur.execute("INSERT INTO authors (name) VALUES (?)", (self.name,))
+                cur.execute(queries.AUTHOR_INSERT, (self.name,))
                 self.id = cur.lastrowid
             conn.commit()
+            session.saved(self)
+            resultcache.bump("authors")
+            leaderboard.author_added(self.id)
             return self
-        finally:
-            conn.close()
 
     @classmethod
     def find_by_id(cls, author_id: int):
-        conn = get_connection()
-        try:
+        cached = session.lookup(cls, author_id)
+        if cached is not None:
+            return cached
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM authors WHERE id = ?", (author_id,))
+            cur.execute(queries.AUTHOR_BY_ID, (author_id,))
             row = cur.fetchone()
-            return cls(row["name"], row["id"]) if row else None
-        finally:
-            conn.close()
+            return session.remember(cls.from_row(row)) if row else None
 
     @classmethod
     def find_by_name(cls, name: str):
-        conn = get_connection()
-        try:
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM authors WHERE name = ?", (name.strip(),))
+            cur.execute(queries.AUTHOR_BY_NAME, (name.strip(),))
             row = cur.fetchone()
-            return cls(row["name"], row["id"]) if row else None
-        finally:
-            conn.close()
+            return session.remember(cls.from_row(row)) if row else None
+
+    @classmethod
+    def find_many(cls, ids) -> Found:
+        """
+        find_by_id for many ids in at most one query, whatever their number.
+        Returns Found(items, missing) with items in the order of `ids`.
+        """
+        return load_many(cls, queries.AUTHORS_BY_IDS, ids)
+
+    @classmethod
+    def find_many_by_name(cls, names) -> Found:
+        """
+        find_by_name for many names in one query. Returns Found(items,
+        missing) with items in the order of `names`.
+        """
+        names = [n.strip() for n in names]
+        if not names:
+            return Found([], [])
+        with read_connection() as conn:
+            index = {r["name"]: session.remember(cls.from_row(r))
+                     for r in fetch_in(conn, queries.AUTHORS_BY_NAMES, set(names))}
+        return collect(names, index)
 
     def articles(self):
         """
         Returns list of sqlite3.Row for articles written by this author.
         """
-        conn = get_connection()
-        try:
+        if self._prefetched and "articles" in self._prefetched:
+            return self._prefetched["articles"]
+        if shards.enabled():
+            return shards.author_articles(self.id)
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM articles WHERE author_id = ?", (self.id,))
+            cur.execute(queries.ARTICLES_BY_AUTHOR, (self.id,))
             return cur.fetchall()
-        finally:
-            conn.close()
+
+    def iter_articles(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Streams this author's articles (sqlite3.Row) in id order, `batch_size`
+        rows per query, without loading the full list.
+        """
+        shards.require_unsharded("Author.iter_articles")
+        return iter_keyset(queries.ARTICLES_BY_AUTHOR, (self.id,), batch_size)
 
     def magazines(self):
         """
         Returns distinct magazines (rows) this author has contributed to.
         """
-        conn = get_connection()
-        try:
+        if self._prefetched and "magazines" in self._prefetched:
+            return self._prefetched["magazines"]
+        if shards.enabled():
+            return shards.author_magazines(self.id)
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT DISTINCT m.* FROM magazines m
-                JOIN articles a ON m.id = a.magazine_id
-                WHERE a.author_id = ?
-            """, (self.id,))
+            cur.execute(queries.AUTHOR_MAGAZINES, (self.id,))
             return cur.fetchall()
-        finally:
-            conn.close()
 
+    @resultcache.cached("articles", "magazines")
     def topic_areas(self):
         """
         Unique categories of magazines this author has contributed to.
         """
-        conn = get_connection()
-        try:
+        if shards.enabled():
+            return list(dict.fromkeys(r["category"] for r in shards.author_magazines(self.id)))
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT DISTINCT m.category FROM magazines m
-                JOIN articles a ON m.id = a.magazine_id
-                WHERE a.author_id = ?
-            """, (self.id,))
+            cur.execute(queries.AUTHOR_TOPIC_AREAS, (self.id,))
             return [r["category"] for r in cur.fetchall()]
-        finally:
-            conn.close()
 
-    def add_article(self, magazine, title: str):
+    def add_article(self, magazine, title: str, writer=None):
         """
         magazine: either a Magazine instance or an integer magazine_id
+        writer: optional lib.db.writer.WriteQueue; the insert is then
+        group-committed in the background and a Future of the new article id
+        is returned (not with DB_SHARDS).
         """
         if not title or not title.strip():
             raise ValueError("Article title must be provided")
         mag_id = magazine.id if hasattr(magazine, "id") else magazine
-        conn = get_connection()
-        try:
-            cur = conn.cursor()
-            cur.execute(
-                "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
-                (title.strip(), self.id, mag_id)
-            )
-            conn.commit()
-            return cur.lastrowid
-        finally:
-            conn.close()
+        self._prefetched = None
+
+        def insert(conn):
+            return conn.execute(queries.ARTICLE_INSERT, (title.strip(), self.id, mag_id)).lastrowid
+
+        def inserted(article_id):
+            resultcache.bump("articles")
+            leaderboard.article_added(self.id, mag_id)
+            return article_id
+
+        if shards.enabled():
+            if writer is not None:
+                shards.require_unsharded("WriteQueue writes")
+            return inserted(shards.insert_article(title.strip(), self.id, mag_id))
+        if writer is not None:
+            return leaderboard.submit(writer, insert, on_commit=inserted)
+        with leaderboard.writing():
+            with write_connection() as conn:
+                article_id = insert(conn)
+                conn.commit()
+            return inserted(article_id)
+
+    def _prefetch_cache(self) -> dict:
+        if self._prefetched is None:
+            self._prefetched = {}
+        return self._prefetched
+
+    @classmethod
+    def prefetch(cls, authors, *relations):
+        """
+        Eager-loads relationships for a collection of authors so that
+        author.articles() / author.magazines() are answered from memory.
+        relations: any of "articles" (1 query) and "magazines" (2 queries),
+        independent of how many authors are passed. Returns the authors list.
+        """
+        check_relations(relations, ("articles", "magazines"))
+        shards.require_unsharded("Author.prefetch")
+        authors = list(authors)
+        ids = [a.id for a in authors]
+        with read_connection() as conn:
+            if "articles" in relations:
+                by_author = group_by(
+                    fetch_in(conn, queries.ARTICLES_BY_AUTHORS, ids),
+                    "author_id",
+                )
+                for a in authors:
+                    a._prefetch_cache()["articles"] = by_author.get(a.id, [])
+            if "magazines" in relations:
+                pairs = fetch_in(conn, queries.AUTHORS_MAGAZINE_PAIRS, ids)
+                mags = {r["id"]: r for r in fetch_in(
+                    conn, queries.MAGAZINES_BY_IDS_ORDERED,
+                    {p["magazine_id"] for p in pairs},
+                )}
+                by_author = group_by(pairs, "author_id")
+                for a in authors:
+                    a._prefetch_cache()["magazines"] = sorted(
+                        (mags[p["magazine_id"]] for p in by_author.get(a.id, [])),
+                        key=lambda m: m["id"],
+                    )
+        return authors
 
     @classmethod
     def add_author_with_articles(cls, author_name: str, articles_data: list):
         """
         Transaction: add author and their articles atomically.
         articles_data: list of dicts {'title': str, 'magazine_id': int}
-        Returns Author instance on success, raises on failure.
+        Returns Author instance on success, raises on failure (and with
+        DB_SHARDS, where the articles cannot share the author's transaction).
         """
-        conn = get_connection()
-        try:
-            cur = conn.cursor()
-            conn.execute("BEGIN")
-            cur.execute("INSERT INTO authors (name) VALUES (?)", (author_name.strip(),))
-            author_id = cur.lastrowid
-
-            for a in articles_data:
-                if "title" not in a or "magazine_id" not in a:
-                    raise ValueError("Each article must have 'title' and 'magazine_id'")
-                cur.execute(
-                    "INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
-                    (a["title"].strip(), author_id, a["magazine_id"])
-                )
-            conn.commit()
-            return cls(author_name, author_id)
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+        shards.require_unsharded("Author.add_author_with_articles")
+        with leaderboard.writing(), write_connection() as conn:
+            try:
+                cur = conn.cursor()
+                conn.execute("BEGIN")
+                cur.execute(queries.AUTHOR_INSERT, (author_name.strip(),))
+                author_id = cur.lastrowid
+
+                for a in articles_data:
+                    if "title" not in a or "magazine_id" not in a:
+                        raise ValueError("Each article must have 'title' and 'magazine_id'")
+                    cur.execute(queries.ARTICLE_INSERT, (a["title"].strip(), author_id, a["magazine_id"]))
+                conn.commit()
+                resultcache.bump("authors", "articles")
+                leaderboard.author_added(author_id)
+                leaderboard.record_articles(Counter((author_id, a["magazine_id"]) for a in articles_data))
+                return cls(author_name, author_id)
+            except Exception:
+                conn.rollback()
+                raise
+
+    @staticmethod
+    def _bulk_params(item):
+        if isinstance(item, Author):
+            return (item.name,)
+        name = item["name"] if isinstance(item, dict) else item
+        if not name or not name.strip():
+            raise ValueError("Author name must be provided")
+        return (name.strip(),)
+
+    @classmethod
+    def bulk_create(cls, authors, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    return_ids: bool = False, ignore_conflicts: bool = False):
+        """
+        Inserts many authors in a single transaction using executemany.
+        authors: iterable of Author instances, names, or dicts {'name'}.
+        ignore_conflicts: skip names that already exist (INSERT OR IGNORE);
+        ids cannot be returned in that mode.
+        Returns the number of rows processed, or the new ids if return_ids=True.
+        """
+        result = bulk_insert(
+            queries.AUTHOR_INSERT_OR_IGNORE if ignore_conflicts else queries.AUTHOR_INSERT,
+            authors, cls._bulk_params, chunk_size=chunk_size, return_ids=return_ids,
+            on_insert=None if ignore_conflicts else _set_id,
+        )
+        resultcache.bump("authors")
+        leaderboard.invalidate()
+        return result
+
+    @classmethod
+    def leaderboard(cls, n: int = 100, category: Optional[str] = None):
+        """
+        Top `n` authors by article count as (Author, count) pairs, best first.
+        Authors tied with the n-th place are included, so more than n pairs
+        may be returned. With `category`, only articles in magazines of that
+        category count. Served from the in-memory rankings in
+        lib/db/leaderboard.py; costs one query for the returned authors.
+        """
+        shards.require_unsharded("Author.leaderboard")
+        ranked = leaderboard.boards.top_authors(n, category)
+        with read_connection() as conn:
+            rows = {r["id"]: r for r in fetch_in(
+                conn, queries.AUTHORS_BY_IDS, [aid for aid, _ in ranked])}
+        return [(cls.from_row(rows[aid]), cnt) for aid, cnt in ranked if aid in rows]
 
     @classmethod
     def most_prolific(cls):
         """
         Returns the author row with the most articles (if tie, returns one of them).
+        Reads the trigger-maintained author_stats counters (with DB_SHARDS,
+        the per-shard counters, summed).
         """
-        conn = get_connection()
-        try:
+        if shards.enabled():
+            author_id = shards.most_prolific_id()
+            if author_id is not None:
+                return cls.find_by_id(author_id)
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT au.*, COUNT(a.id) as cnt
-                FROM authors au
-                LEFT JOIN articles a ON au.id = a.author_id
-                GROUP BY au.id
-                ORDER BY cnt DESC
-                LIMIT 1
-            """)
+            cur.execute(queries.AUTHOR_MOST_PROLIFIC)
             row = cur.fetchone()
-            return cls(row["name"], row["id"]) if row else None
-        finally:
-            conn.close()
+            return cls.from_row(row) if row else None
+
+
+def _set_id(item, new_id):
+    if isinstance(item, Author):
+        item.id = new_id
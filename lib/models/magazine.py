@@ -1,20 +1,15 @@
-# lib/models/author.py
-import os
-import sys
-from typing import List, Optional
-
-# ✅ Ensure project root is on sys.path
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-if PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT)
-
-from lib.db.connection import get_connection
-
 # lib/models/magazine.py
-from typing import List, Optional
-from lib.db.connection import get_connection
+from typing import Optional
+
+from lib.db import leaderboard, queries, resultcache, session, shards
+from lib.db.bulk import DEFAULT_CHUNK_SIZE, bulk_insert
+from lib.db.connection import read_connection, write_connection
+from lib.db.eager import Found, check_relations, collect, fetch_in, group_by, load_many
+from lib.db.streaming import DEFAULT_BATCH_SIZE, iter_keyset
 
 class Magazine:
+    __slots__ = ("id", "name", "category", "_prefetched")
+
     def __init__(self, name: str, category: str, id: Optional[int] = None):
         if not name or not name.strip():
             raise ValueError("Magazine name required")
@@ -23,146 +18,262 @@ class Magazine:
         self.id = id
         self.name = name.strip()
         self.category = category.strip()
+        self._prefetched = None
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Builds a Magazine from a trusted database row without re-validating.
+        """
+        obj = cls.__new__(cls)
+        obj.id, obj.name, obj.category, obj._prefetched = row["id"], row["name"], row["category"], None
+        return obj
 
     def __repr__(self):
         return f"<Magazine {self.id}: {self.name} ({self.category})>"
 
     def save(self):
-        conn = get_connection()
-        try:
+        with write_connection() as conn:
             cur = conn.cursor()
             if self.id:
-                cur.execute("UPDATE magazines SET name = ?, category = ? WHERE id = ?", (self.name, self.category, self.id))
+                cur.execute(queries.MAGAZINE_UPDATE, (self.name, self.category, self.id))
+                conn.commit()
+                # the category may have changed, which reshuffles per-category rankings
+                leaderboard.invalidate()
             else:
-                cur.execute("INSERT INTO magazines (name, category) VALUES (?, ?)", (self.name, self.category))
+                cur.execute(queries.MAGAZINE_INSERT, (self.name, self.category))
                 self.id = cur.lastrowid
-            conn.commit()
+                conn.commit()
+                leaderboard.magazine_added(self.id, self.category)
+            session.saved(self)
+            resultcache.bump("magazines")
             return self
-        finally:
-            conn.close()
 
     @classmethod
     def find_by_id(cls, mid: int):
-        conn = get_connection()
-        try:
+        cached = session.lookup(cls, mid)
+        if cached is not None:
+            return cached
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM magazines WHERE id = ?", (mid,))
+            cur.execute(queries.MAGAZINE_BY_ID, (mid,))
             row = cur.fetchone()
-            return cls(row["name"], row["category"], row["id"]) if row else None
-        finally:
-            conn.close()
+            return session.remember(cls.from_row(row)) if row else None
 
     @classmethod
     def find_by_name(cls, name: str):
-        conn = get_connection()
-        try:
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM magazines WHERE name = ?", (name.strip(),))
+            cur.execute(queries.MAGAZINE_BY_NAME, (name.strip(),))
             row = cur.fetchone()
-            return cls(row["name"], row["category"], row["id"]) if row else None
-        finally:
-            conn.close()
+            return session.remember(cls.from_row(row)) if row else None
+
+    @classmethod
+    def find_many(cls, ids) -> Found:
+        """
+        find_by_id for many ids in at most one query, whatever their number.
+        Returns Found(items, missing) with items in the order of `ids`.
+        """
+        return load_many(cls, queries.MAGAZINES_BY_IDS, ids)
+
+    @classmethod
+    def find_many_by_name(cls, names) -> Found:
+        """
+        find_by_name for many names in one query. A name used in several
+        categories resolves to its oldest magazine. Returns Found(items,
+        missing) with items in the order of `names`.
+        """
+        names = [n.strip() for n in names]
+        if not names:
+            return Found([], [])
+        index = {}
+        with read_connection() as conn:
+            for r in fetch_in(conn, queries.MAGAZINES_BY_NAMES, set(names)):
+                if r["name"] not in index:
+                    index[r["name"]] = session.remember(cls.from_row(r))
+        return collect(names, index)
 
     @classmethod
     def find_by_category(cls, category: str):
-        conn = get_connection()
-        try:
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM magazines WHERE category = ?", (category.strip(),))
+            cur.execute(queries.MAGAZINES_BY_CATEGORY, (category.strip(),))
             rows = cur.fetchall()
-            return [cls(r["name"], r["category"], r["id"]) for r in rows]
-        finally:
-            conn.close()
+            return [cls.from_row(r) for r in rows]
+
+    @staticmethod
+    def _bulk_params(item):
+        if isinstance(item, Magazine):
+            return (item.name, item.category)
+        if isinstance(item, dict):
+            name, category = item["name"], item["category"]
+        else:
+            name, category = item
+        if not name or not name.strip():
+            raise ValueError("Magazine name required")
+        if not category or not category.strip():
+            raise ValueError("Magazine category required")
+        return (name.strip(), category.strip())
+
+    @classmethod
+    def bulk_create(cls, magazines, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    return_ids: bool = False, ignore_conflicts: bool = False):
+        """
+        Inserts many magazines in a single transaction using executemany.
+        magazines: iterable of Magazine instances, (name, category) tuples or
+        dicts {'name', 'category'}.
+        ignore_conflicts: skip existing (name, category) pairs; ids cannot be
+        returned in that mode.
+        Returns the number of rows processed, or the new ids if return_ids=True.
+        """
+        result = bulk_insert(
+            queries.MAGAZINE_INSERT_OR_IGNORE if ignore_conflicts else queries.MAGAZINE_INSERT,
+            magazines, cls._bulk_params, chunk_size=chunk_size, return_ids=return_ids,
+            on_insert=None if ignore_conflicts else _set_id,
+        )
+        resultcache.bump("magazines")
+        leaderboard.invalidate()
+        return result
 
     def articles(self):
-        conn = get_connection()
-        try:
+        if self._prefetched and "articles" in self._prefetched:
+            return self._prefetched["articles"]
+        with shards.read_for_magazine(self.id) as conn:
             cur = conn.cursor()
-            cur.execute("SELECT * FROM articles WHERE magazine_id = ?", (self.id,))
+            cur.execute(queries.ARTICLES_BY_MAGAZINE, (self.id,))
             return cur.fetchall()
-        finally:
-            conn.close()
+
+    def iter_articles(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Streams this magazine's articles (sqlite3.Row) in id order, `batch_size`
+        rows per query, without loading the full list.
+        """
+        shards.require_unsharded("Magazine.iter_articles")
+        return iter_keyset(queries.ARTICLES_BY_MAGAZINE, (self.id,), batch_size)
+
+    def _prefetch_cache(self) -> dict:
+        if self._prefetched is None:
+            self._prefetched = {}
+        return self._prefetched
+
+    @classmethod
+    def prefetch(cls, magazines, *relations):
+        """
+        Eager-loads relationships for a collection of magazines so that
+        magazine.articles() / magazine.contributors() are answered from memory.
+        relations: any of "articles" (1 query) and "contributors" (2 queries),
+        independent of how many magazines are passed. Returns the magazines list.
+        """
+        check_relations(relations, ("articles", "contributors"))
+        shards.require_unsharded("Magazine.prefetch")
+        magazines = list(magazines)
+        ids = [m.id for m in magazines]
+        with read_connection() as conn:
+            if "articles" in relations:
+                by_mag = group_by(
+                    fetch_in(conn, queries.ARTICLES_BY_MAGAZINES, ids),
+                    "magazine_id",
+                )
+                for m in magazines:
+                    m._prefetch_cache()["articles"] = by_mag.get(m.id, [])
+            if "contributors" in relations:
+                pairs = fetch_in(conn, queries.MAGAZINES_AUTHOR_PAIRS, ids)
+                authors = {r["id"]: r for r in fetch_in(
+                    conn, queries.AUTHORS_BY_IDS_ORDERED,
+                    {p["author_id"] for p in pairs},
+                )}
+                by_mag = group_by(pairs, "magazine_id")
+                for m in magazines:
+                    m._prefetch_cache()["contributors"] = sorted(
+                        (authors[p["author_id"]] for p in by_mag.get(m.id, [])),
+                        key=lambda a: a["id"],
+                    )
+        return magazines
+
+    @classmethod
+    def load_with_contributors(cls, ids):
+        """
+        Loads the magazines with the given ids (in that order, missing ids are
+        skipped) with contributors prefetched: 3 queries in total.
+        """
+        ids = list(ids)
+        with read_connection() as conn:
+            rows = {r["id"]: r for r in fetch_in(conn, queries.MAGAZINES_BY_IDS, ids)}
+        magazines = [cls.from_row(rows[i]) for i in ids if i in rows]
+        return cls.prefetch(magazines, "contributors")
 
     def contributors(self):
         """
         Unique list of authors (rows) who wrote for this magazine.
         """
-        conn = get_connection()
-        try:
+        if self._prefetched and "contributors" in self._prefetched:
+            return self._prefetched["contributors"]
+        with shards.read_for_magazine(self.id) as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT DISTINCT au.* FROM authors au
-                JOIN articles a ON au.id = a.author_id
-                WHERE a.magazine_id = ?
-            """, (self.id,))
+            cur.execute(queries.MAGAZINE_CONTRIBUTORS, (self.id,))
             return cur.fetchall()
-        finally:
-            conn.close()
 
+    @resultcache.cached("articles")
     def article_titles(self):
-        conn = get_connection()
-        try:
+        with shards.read_for_magazine(self.id) as conn:
             cur = conn.cursor()
-            cur.execute("SELECT title FROM articles WHERE magazine_id = ?", (self.id,))
+            cur.execute(queries.MAGAZINE_ARTICLE_TITLES, (self.id,))
             return [r["title"] for r in cur.fetchall()]
-        finally:
-            conn.close()
 
     def contributing_authors(self, threshold=2):
         """
         Returns authors who have more than `threshold` articles in this magazine.
         """
-        conn = get_connection()
-        try:
+        with shards.read_for_magazine(self.id) as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT au.*, COUNT(a.id) as cnt
-                FROM authors au
-                JOIN articles a ON au.id = a.author_id
-                WHERE a.magazine_id = ?
-                GROUP BY au.id
-                HAVING cnt > ?
-            """, (self.id, threshold))
+            cur.execute(queries.MAGAZINE_CONTRIBUTING_AUTHORS, (self.id, threshold))
             return cur.fetchall()
-        finally:
-            conn.close()
 
     @classmethod
+    def leaderboard(cls, n: int = 100):
+        """
+        Top `n` magazines by article count as (Magazine, count) pairs, best
+        first, including any magazines tied with the n-th place.
+        """
+        shards.require_unsharded("Magazine.leaderboard")
+        ranked = leaderboard.boards.top_magazines(n)
+        with read_connection() as conn:
+            rows = {r["id"]: r for r in fetch_in(
+                conn, queries.MAGAZINES_BY_IDS, [mid for mid, _ in ranked])}
+        return [(cls.from_row(rows[mid]), cnt) for mid, cnt in ranked if mid in rows]
+
+    @classmethod
+    @resultcache.cached("articles", "magazines")
     def top_publisher(cls):
         """
-        Magazine with the most articles.
+        Magazine with the most articles (with DB_SHARDS, from the per-shard
+        counters; lowest id on ties).
         """
-        conn = get_connection()
-        try:
+        if shards.enabled():
+            magazine_id = shards.top_magazine_id()
+            if magazine_id is not None:
+                return cls.find_by_id(magazine_id)
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT m.*, COUNT(a.id) as cnt
-                FROM magazines m
-                LEFT JOIN articles a ON m.id = a.magazine_id
-                GROUP BY m.id
-                ORDER BY cnt DESC
-                LIMIT 1
-            """)
+            cur.execute(queries.MAGAZINE_TOP_PUBLISHER)
             row = cur.fetchone()
-            return cls(row["name"], row["category"], row["id"]) if row else None
-        finally:
-            conn.close()
+            return cls.from_row(row) if row else None
 
     @classmethod
+    @resultcache.cached("articles", "magazines")
     def magazines_with_at_least_two_authors(cls):
         """
         Magazines that have articles by at least 2 different authors.
         """
-        conn = get_connection()
-        try:
+        if shards.enabled():
+            return [cls.from_row(r) for r in shards.magazines_with_two_authors()]
+        with read_connection() as conn:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT m.* FROM magazines m
-                JOIN articles a ON m.id = a.magazine_id
-                GROUP BY m.id
-                HAVING COUNT(DISTINCT a.author_id) >= 2
-            """)
+            cur.execute(queries.MAGAZINES_WITH_TWO_AUTHORS)
             rows = cur.fetchall()
-            return [cls(r["name"], r["category"], r["id"]) for r in rows]
-        finally:
-            conn.close()
+            return [cls.from_row(r) for r in rows]
+
+
+def _set_id(item, new_id):
+    if isinstance(item, Magazine):
+        item.id = new_id
@@ -0,0 +1,233 @@
+"""
+Per-author and per-magazine reports for the whole database, as JSONL.
+
+    articles-cli report reports.jsonl --workers 8
+    articles-cli report - --kind magazines --shard-size 200 | gzip > mags.jsonl.gz
+
+Each line is one report:
+    {"kind": "author", "id", "name", "articles": [titles],
+     "magazines": [{"id", "name", "category"}], "topic_areas": [categories]}
+    {"kind": "magazine", "id", "name", "category", "articles": [titles],
+     "contributors": [{"id", "name"}]}
+
+Each table is split into shards: contiguous id ranges of at most
+`shard_size` rows and about `shard_articles` articles (see shards()). A
+shard is loaded with one range query plus the prefetch queries of the
+models, so the number of queries does not grow with the rows in it, and is
+rendered to JSONL inside the worker. Shards run in a process pool; every
+worker opens its own read-only connection, so workers only share the
+database file and throughput grows with the number of cores.
+Output is written in id order, with at most 4 * workers shards in flight.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from typing import NamedTuple
+
+from lib.db import queries
+from lib.db.connection import configure, current_db_path, read_connection
+
+SHARD_SIZE = 1000
+SHARD_ARTICLES = 50_000
+KINDS = ("authors", "magazines")
+
+
+class ReportStats(NamedTuple):
+    kind: str
+    reports: int
+    shards: int
+    seconds: float
+
+    @property
+    def reports_per_sec(self) -> float:
+        return self.reports / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.kind}: {self.reports} reports in {self.shards} shards, "
+                f"{self.seconds:.2f}s ({self.reports_per_sec:,.0f} reports/s)")
+
+
+def shards(kind: str, shard_size: int = SHARD_SIZE, shard_articles: int = SHARD_ARTICLES):
+    """
+    Inclusive (first_id, last_id) ranges of at most `shard_size` rows. A
+    shard also closes once its rows have `shard_articles` articles between
+    them (from the counter tables), so a few prolific authors or big
+    magazines do not end up in one oversized shard.
+    """
+    if shard_size < 1:
+        raise ValueError("shard_size must be at least 1")
+    sql = queries.AUTHOR_IDS_WEIGHTED if kind == "authors" else queries.MAGAZINE_IDS_WEIGHTED
+    ranges = []
+    first_id = None
+    with read_connection() as conn:
+        cur = conn.cursor()
+        cur.row_factory = None
+        for row_id, articles in cur.execute(sql):
+            if first_id is None:
+                first_id, rows, weight = row_id, 0, 0
+            rows += 1
+            weight += articles
+            if rows >= shard_size or weight >= shard_articles:
+                ranges.append((first_id, row_id))
+                first_id = None
+    if first_id is not None:
+        ranges.append((first_id, row_id))
+    return ranges
+
+
+# -- report building (runs in worker processes) ----------------------------
+
+def author_reports(first_id: int, last_id: int):
+    from lib.models.author import Author
+
+    with read_connection() as conn:
+        authors = [Author.from_row(r) for r in conn.execute(queries.AUTHORS_BY_ID_RANGE, (first_id, last_id))]
+    Author.prefetch(authors, "articles", "magazines")
+    for a in authors:
+        magazines = a.magazines()
+        yield {
+            "kind": "author", "id": a.id, "name": a.name,
+            "articles": [r["title"] for r in a.articles()],
+            "magazines": [{"id": m["id"], "name": m["name"], "category": m["category"]} for m in magazines],
+            "topic_areas": sorted({m["category"] for m in magazines}),
+        }
+
+
+def magazine_reports(first_id: int, last_id: int):
+    from lib.models.magazine import Magazine
+
+    with read_connection() as conn:
+        magazines = [Magazine.from_row(r) for r in conn.execute(queries.MAGAZINES_BY_ID_RANGE, (first_id, last_id))]
+    Magazine.prefetch(magazines, "articles", "contributors")
+    for m in magazines:
+        yield {
+            "kind": "magazine", "id": m.id, "name": m.name, "category": m.category,
+            "articles": [r["title"] for r in m.articles()],
+            "contributors": [{"id": a["id"], "name": a["name"]} for a in m.contributors()],
+        }
+
+
+BUILDERS = {"authors": author_reports, "magazines": magazine_reports}
+
+
+def render_shard(kind: str, first_id: int, last_id: int):
+    """
+    Returns (number of reports, their JSONL text) for one shard.
+    """
+    lines = [json.dumps(r, ensure_ascii=False, separators=(",", ":"))
+             for r in BUILDERS[kind](first_id, last_id)]
+    return len(lines), "".join(line + "\n" for line in lines)
+
+
+def _init_worker(db_path: str):
+    os.environ["DB_PATH"] = db_path
+    # one read-only connection per worker process
+    configure(read_pool_size=1, read_only_readers=True)
+
+
+# -- driver ---------------------------------------------------------------
+
+class Progress:
+    """
+    Shard/report counts and rate on one stderr line, at most every `interval`
+    seconds.
+    """
+
+    def __init__(self, kind: str, total: int, stream=sys.stderr, interval: float = 0.5):
+        self.kind, self.total, self.stream, self.interval = kind, total, stream, interval
+        self.start = self._shown = time.perf_counter()
+
+    def update(self, shards: int, reports: int, force: bool = False):
+        now = time.perf_counter()
+        if not force and now - self._shown < self.interval:
+            return
+        self._shown = now
+        rate = reports / (now - self.start) if now > self.start else 0.0
+        print(f"\r{self.kind}: {shards}/{self.total} shards, {reports} reports, {rate:,.0f}/s",
+              end="\n" if force else "", file=self.stream, flush=True)
+
+
+class ReportGenerator:
+    def __init__(self, workers: int = None, shard_size: int = SHARD_SIZE,
+                 shard_articles: int = SHARD_ARTICLES, progress: bool = True):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.shard_size = shard_size
+        self.shard_articles = shard_articles
+        self.progress = progress
+
+    def write(self, out, kinds=KINDS):
+        """
+        Writes the reports of each kind to the text stream `out`; returns a
+        ReportStats per kind.
+        """
+        return [self._write_kind(out, kind) for kind in kinds]
+
+    def _write_kind(self, out, kind):
+        start = time.perf_counter()
+        ranges = shards(kind, self.shard_size, self.shard_articles)
+        progress = Progress(kind, len(ranges)) if self.progress else None
+        done = reports = 0
+        for count, text in self._render(kind, ranges):
+            out.write(text)
+            done += 1
+            reports += count
+            if progress:
+                progress.update(done, reports)
+        if progress:
+            progress.update(done, reports, force=True)
+        return ReportStats(kind, reports, len(ranges), time.perf_counter() - start)
+
+    def _render(self, kind, ranges):
+        """
+        Yields render_shard results in shard order.
+        """
+        if self.workers <= 1:
+            for first_id, last_id in ranges:
+                yield render_shard(kind, first_id, last_id)
+            return
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # spawn, not fork: a forked child would inherit the parent's open
+        # SQLite connections, which SQLite does not allow to be used or
+        # closed across fork()
+        with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(os.path.abspath(current_db_path()),)) as pool:
+            pending = deque()
+            for first_id, last_id in ranges:
+                pending.append(pool.submit(render_shard, kind, first_id, last_id))
+                if len(pending) >= 4 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write per-author and per-magazine reports as JSONL.")
+    parser.add_argument("out", help="output file, or - for stdout")
+    parser.add_argument("--kind", choices=KINDS, action="append", help="report kind (default: both)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="max rows per shard")
+    parser.add_argument("--shard-articles", type=int, default=SHARD_ARTICLES,
+                        help="close a shard once its rows have this many articles")
+    parser.add_argument("--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+
+    generator = ReportGenerator(workers=args.workers, shard_size=args.shard_size,
+                                shard_articles=args.shard_articles, progress=not args.quiet)
+    kinds = args.kind or KINDS
+    if args.out == "-":
+        stats = generator.write(sys.stdout, kinds)
+    else:
+        with open(args.out, "w", encoding="utf-8") as out:
+            stats = generator.write(out, kinds)
+    for s in stats:
+        print(s, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
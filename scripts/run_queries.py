@@ -1,11 +1,8 @@
 
-import sys, os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 # scripts/run_queries.py
+# Reports for every author and magazine at once: `articles-cli report` (lib/reports.py).
 from lib.models.author import Author
 from lib.models.magazine import Magazine
-from lib.models.article import Article
-from lib.db.connection import get_connection
 
 
 def example():
@@ -1,24 +1,11 @@
 # scripts/setup_db.py
-import os
-from lib.db.connection import get_connection
+from lib.db.migrations import migrate
 
-def run_schema():
-    # Compute absolute path to schema.sql (always from project root)
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-    schema_path = os.path.join(project_root, "lib", "db", "schema.sql")
-
-    if not os.path.exists(schema_path):
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
 
-    conn = get_connection()
-    try:
-        with open(schema_path, "r") as f:
-            sql = f.read()
-        conn.executescript(sql)
-        conn.commit()
-        print(f"Schema applied from {schema_path}")
-    finally:
-        conn.close()
+def run_schema():
+    # schema.sql plus any pending migrations, recorded in schema_migrations;
+    # the counter/search backfill for older databases is one of them
+    migrate()
 
 if __name__ == "__main__":
     run_schema()
@@ -22,5 +22,8 @@ def prepare_test_db():
     finally:
         conn.close()
     yield
-    if os.path.exists(TEST_DB):
-        os.remove(TEST_DB)
+    from lib.db.connection import close_pools
+    close_pools()
+    for path in (TEST_DB, TEST_DB + "-wal", TEST_DB + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from lib.models import aio
+
+
+def test_async_lookups_and_relationships():
+    async def scenario():
+        m = await aio.Magazine("Async Mag", "Async").asave()
+        a = await aio.Author("Async Author").asave()
+        for i in range(5):
+            await a.aadd_article(m, f"Async {i}")
+
+        found = await aio.Author.afind_by_id(a.id)
+        assert isinstance(found, aio.Author) and found.name == "Async Author"
+        results = await asyncio.gather(*(aio.Magazine.afind_by_id(m.id) for _ in range(20)))
+        assert {r.name for r in results} == {"Async Mag"}
+
+        titles = [r["title"] async for r in a.aiter_articles(batch_size=2)]
+        assert titles == [f"Async {i}" for i in range(5)]
+        arts = [x async for x in aio.Article.aiter_by_magazine(m.id, batch_size=3)]
+        assert len(arts) == 5
+        assert [c["name"] for c in await m.acontributors()] == ["Async Author"]
+
+    asyncio.run(scenario())
+
+
+def test_waiting_calls_can_be_cancelled():
+    executor = aio.AsyncExecutor(max_workers=1)
+
+    async def scenario():
+        release = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+
+        def blocking():
+            loop.call_soon_threadsafe(started.set_result, None)
+            asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+
+        first = asyncio.create_task(executor.run(blocking))
+        await started
+        second = asyncio.create_task(executor.run(lambda: "never"))
+        await asyncio.sleep(0)
+        second.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await second
+        release.set()
+        await first
+
+    asyncio.run(scenario())
+    executor.shutdown()
+
+
+def test_async_calls_share_the_session_and_cache_with_sync_models():
+    from lib.db import session
+    from lib.models.author import Author
+
+    async def lookups(author_id):
+        return await aio.Author.afind_by_id(author_id), await aio.Author.afind_by_id(author_id)
+
+    a = Author("Async Session"); a.save()
+    with session.Session() as s:
+        first, second = asyncio.run(lookups(a.id))
+        assert first is second and isinstance(first, aio.Author)
+        assert Author.find_by_id(a.id) is first
+        assert len(s.identity_map) == 1
+
+    with session.Session():
+        sync = Author.find_by_id(a.id)
+        async_view = asyncio.run(aio.Author.afind_by_id(a.id))
+        assert type(sync) is Author and isinstance(async_view, aio.Author)
+        assert (async_view.id, async_view.name) == (sync.id, sync.name)
+        assert Author.find_by_id(a.id) is sync
+
+    session.configure_cache()
+    try:
+        assert Author.find_by_id(a.id).name == "Async Session"
+        renamed = aio.Author("Async Renamed", a.id)
+        asyncio.run(renamed.asave())
+        assert Author.find_by_id(a.id).name == "Async Renamed"
+    finally:
+        session.disable_cache()
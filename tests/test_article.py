@@ -1,7 +1,9 @@
 # tests/test_article.py
+import pytest
 from lib.models.article import Article
 from lib.models.author import Author
 from lib.models.magazine import Magazine
+from lib.db.querycount import assert_num_queries
 
 def test_article_crud():
     a = Author("ArtAuthor"); a.save()
@@ -19,3 +21,103 @@ def test_article_crud():
 
     by_mag = Article.find_by_magazine(m.id)
     assert any(x.title == "Art Title" for x in by_mag)
+
+def test_article_bulk_create():
+    a = Author("BulkArtAuthor"); a.save()
+    m = Magazine("BulkArtMag", "Bulk"); m.save()
+
+    rows = ((f"Bulk {i}", a.id, m.id) for i in range(25))
+    ids = Article.bulk_create(rows, chunk_size=10, return_ids=True)
+    assert len(ids) == 25
+    assert [Article.find_by_id(i).title for i in ids[:3]] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+
+    art = Article("Bulk Instance", a.id, m.id)
+    assert Article.bulk_create([art, {"title": "Bulk Dict", "author_id": a.id, "magazine_id": m.id}]) == 2
+    assert Article.find_by_id(art.id).title == "Bulk Instance"
+
+def test_article_bulk_create_failure_leaves_instances_unsaved():
+    a = Author("BulkFailAuthor"); a.save()
+    m = Magazine("BulkFailMag", "Bulk"); m.save()
+
+    arts = [Article(f"Bulk Fail {i}", a.id, m.id) for i in range(5)]
+    blank = {"title": " ", "author_id": a.id, "magazine_id": m.id}
+    with pytest.raises(ValueError):
+        Article.bulk_create(arts + [blank], chunk_size=2)
+    assert [x.id for x in arts] == [None] * 5
+    assert Article.find_by_author(a.id) == []
+
+def test_iter_by_author_and_magazine_stream_in_batches():
+    a = Author("StreamAuthor"); a.save()
+    m = Magazine("StreamMag", "Stream"); m.save()
+    Article.bulk_create((f"Stream {i}", a.id, m.id) for i in range(7))
+
+    with assert_num_queries(3):
+        titles = [x.title for x in Article.iter_by_author(a.id, batch_size=3)]
+    assert titles == [f"Stream {i}" for i in range(7)]
+
+    it = Article.iter_by_magazine(m.id, batch_size=2)
+    assert next(it).title == "Stream 0"
+    assert len(list(it)) == 6
+    assert [r["title"] for r in m.iter_articles(batch_size=4)] == titles
+
+def test_page_walks_all_articles_with_cursor():
+    a = Author("PageAuthor"); a.save()
+    m = Magazine("PageMag", "Page"); m.save()
+    Article.bulk_create((f"Page {i}", a.id, m.id) for i in range(5))
+
+    seen, cursor = [], None
+    while True:
+        page = Article.page(magazine_id=m.id, after=cursor, limit=2)
+        seen.extend(x.title for x in page.items)
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert seen == [f"Page {i}" for i in range(5)]
+    assert len(Article.page(author_id=a.id, magazine_id=m.id, limit=5).items) == 5
+    assert Article.page(author_id=a.id, limit=5).next_cursor is None
+
+    with pytest.raises(ValueError):
+        Article.page(magazine_id=m.id, after="not-a-cursor")
+
+def test_from_row_builds_slotted_articles():
+    row = {"id": 1, "title": "  Raw  ", "author_id": 2, "magazine_id": 3}
+    art = Article.from_row(row)
+    assert art.title == "  Raw  "  # trusted rows are not re-stripped
+    assert (art.id, art.author_id, art.magazine_id) == (1, 2, 3)
+    assert not hasattr(art, "__dict__")
+
+def test_search_ranks_keyword_and_prefix_matches():
+    a = Author("SearchAuthor"); a.save()
+    m1 = Magazine("SearchMag1", "Search"); m1.save()
+    m2 = Magazine("SearchMag2", "Search"); m2.save()
+    a.add_article(m1, "Zebras of the Serengeti")
+    a.add_article(m2, "Zebras zebras everywhere")
+    renamed = Article("Temporary zebroid", a.id, m1.id).save()
+
+    titles = [x.title for x in Article.search("zebras")]
+    assert titles[0] == "Zebras zebras everywhere"
+    assert "Zebras of the Serengeti" in titles
+    assert [x.title for x in Article.search("serengeti zeb")] == ["Zebras of the Serengeti"]
+    in_m1 = {x.title for x in Article.search("zebr", magazine_id=m1.id)}
+    assert in_m1 == {"Zebras of the Serengeti", "Temporary zebroid"}
+    assert len(Article.search("zebr", magazine_id=m1.id, limit=1)) == 1
+
+    renamed.title = "Renamed quagga"
+    renamed.save()
+    assert [x.id for x in Article.search("zebroid")] == []
+    assert [x.id for x in Article.search("quag")] == [renamed.id]
+    assert [x.title for x in Article.search('zebras" (serengeti')] == ["Zebras of the Serengeti"]
+    assert Article.search("  ") == []
+
+def test_find_many():
+    a = Author("Many Articles Author"); a.save()
+    m = Magazine("Many Articles Mag", "Many"); m.save()
+    arts = [Article(t, a.id, m.id).save() for t in ("Dup", "Solo", "Dup")]
+    with assert_num_queries(1):
+        found = Article.find_many_by_title(["Solo", "Dup", "None Such"])
+    assert [x.id for x in found.items] == [arts[1].id, arts[0].id, arts[2].id]
+    assert found.missing == ["None Such"]
+    with assert_num_queries(1):
+        found = Article.find_many(x.id for x in reversed(arts))
+    assert [x.id for x in found.items] == [x.id for x in reversed(arts)]
+    assert found.missing == []
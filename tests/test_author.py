@@ -3,6 +3,8 @@ import pytest
 from lib.models.author import Author
 from lib.models.magazine import Magazine
 from lib.models.article import Article
+from lib.db.querycount import assert_num_queries
+from lib.db.session import Session
 
 def test_author_create_and_find():
     a = Author("Tester")
@@ -43,3 +45,43 @@ def test_most_prolific():
     # ensure function runs (seeded data might make Alice most prolific)
     top = Author.most_prolific()
     assert top is not None
+
+def test_bulk_create_is_atomic():
+    Author.bulk_create(["Bulk A", "Bulk B"])
+    with pytest.raises(Exception):
+        Author.bulk_create(["Bulk C", "Bulk A"])
+    assert Author.find_by_name("Bulk C") is None
+    assert Author.bulk_create(["Bulk A", "Bulk D"], ignore_conflicts=True) == 2
+    assert Author.find_by_name("Bulk D") is not None
+
+def test_prefetch_articles_and_magazines():
+    m1 = Magazine("Prefetch Mag 1", "Pre"); m1.save()
+    m2 = Magazine("Prefetch Mag 2", "Pre"); m2.save()
+    authors = [Author(f"Prefetcher {i}").save() for i in range(3)]
+    for a in authors:
+        a.add_article(m1, "P1")
+        a.add_article(m2, "P2")
+
+    with assert_num_queries(3):
+        Author.prefetch(authors, "articles", "magazines")
+        for a in authors:
+            assert [r["title"] for r in a.articles()] == ["P1", "P2"]
+            assert [r["id"] for r in a.magazines()] == [m1.id, m2.id]
+
+def test_find_many_preserves_order_and_reports_misses():
+    authors = [Author(f"Many {i}").save() for i in range(5)]
+    ids = [authors[3].id, authors[0].id, 10**9, authors[3].id]
+    with assert_num_queries(1):
+        found = Author.find_many(ids)
+    assert [a.id for a in found.items] == [authors[3].id, authors[0].id, authors[3].id]
+    assert found.missing == [10**9]
+
+    with assert_num_queries(1):
+        found = Author.find_many_by_name(["Many 4", " Many 1", "Nobody Many"])
+    assert [a.name for a in found.items] == ["Many 4", "Many 1"]
+    assert found.missing == ["Nobody Many"]
+
+    with Session():
+        Author.find_many(ids)
+        with assert_num_queries(0):
+            assert Author.find_many(ids[:2]).items[0] is Author.find_by_id(authors[3].id)
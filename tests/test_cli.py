@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+import pytest
+
+from lib import cli
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def test_author_and_search_commands(capsys):
+    a = Author("Cli Writer"); a.save()
+    m = Magazine("Cli Weekly", "Terminals"); m.save()
+    a.add_article(m, "Shell pipelines explained")
+
+    cli.main(["author", "Cli Writer"])
+    out = capsys.readouterr().out
+    assert "Shell pipelines explained" in out
+    assert "Cli Weekly (Terminals)" in out
+
+    cli.main(["search", "pipelines", "-n", "5"])
+    assert "Shell pipelines explained" in capsys.readouterr().out
+
+    with pytest.raises(SystemExit):
+        cli.main(["author", "Nobody At All"])
+
+
+def test_help_does_not_import_models():
+    code = (
+        "import sys\n"
+        "from lib import cli\n"
+        "try:\n"
+        "    cli.main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "print(sorted(m for m in sys.modules if m.startswith('lib.')))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip().endswith("['lib.cli']")
@@ -0,0 +1,64 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from lib.db import columnar
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+@pytest.fixture(scope="module")
+def graph():
+    m1 = Magazine("Columnar One", "Columns"); m1.save()
+    m2 = Magazine("Columnar Two", "Rows"); m2.save()
+    a1 = Author("Columnar A1"); a1.save()
+    a2 = Author("Columnar A2"); a2.save()
+    for i in range(4):
+        a1.add_article(m1, f"Columnar {i}")
+    a2.add_article(m1, "Columnar other")
+    a2.add_article(m2, "Columnar elsewhere")
+    return m1, m2, a1, a2
+
+
+def test_aggregates_match_the_models(graph):
+    m1, m2, a1, a2 = graph
+    snap = columnar.snapshot()
+
+    # compared by count: ties may be broken differently
+    per_author = dict(zip(snap.author_id.tolist(), snap.articles_per_author().tolist()))
+    assert per_author[snap.most_prolific()] == per_author[Author.most_prolific().id]
+    per_magazine = dict(zip(snap.magazine_id.tolist(), snap.articles_per_magazine().tolist()))
+    assert per_magazine[snap.top_publisher()] == per_magazine[Magazine.top_publisher().id]
+    assert set(snap.magazines_with_at_least_two_authors().tolist()) == {
+        m.id for m in Magazine.magazines_with_at_least_two_authors()}
+
+    ids, counts = snap.contributing_authors(m1.id)
+    assert (ids.tolist(), counts.tolist()) == ([a1.id], [4])
+    assert [r["id"] for r in m1.contributing_authors()] == ids.tolist()
+    assert snap.contributing_authors(m2.id, threshold=0)[0].tolist() == [a2.id]
+    assert snap.contributing_authors(10 ** 9)[0].tolist() == []
+
+    pos = np.searchsorted(snap.magazine_id, [m1.id, m2.id])
+    assert snap.authors_per_magazine()[pos].tolist() == [2, 1]
+    per_category = snap.articles_per_category()
+    assert per_category["Columns"] >= 5 and per_category["Rows"] >= 1
+
+
+def test_npy_snapshot_reloads_memory_mapped(graph, tmp_path):
+    snap = columnar.snapshot()
+    snap.save(tmp_path)
+    loaded = columnar.Snapshot.load(tmp_path)
+    assert isinstance(loaded.article_id, np.memmap)
+    assert loaded.article_author.dtype == np.int32
+    assert loaded.top_publisher() == snap.top_publisher()
+    assert loaded.categories.tolist() == snap.categories.tolist()
+
+
+def test_parquet_round_trip(graph, tmp_path):
+    pytest.importorskip("pyarrow")
+    snap = columnar.snapshot()
+    snap.write_parquet(tmp_path)
+    loaded = columnar.Snapshot.read_parquet(tmp_path)
+    assert loaded.articles_per_category() == snap.articles_per_category()
+    assert loaded.author_name.tolist() == snap.author_name.tolist()
+    assert (loaded.authors_per_magazine() == snap.authors_per_magazine()).all()
@@ -0,0 +1,80 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from lib.db.connection import (
+    ConnectionPool, DBConfig, PoolTimeout, current_db_path, get_config, read_connection, write_connection,
+)
+
+
+def test_pool_reuses_connections():
+    pool = ConnectionPool(current_db_path(), max_size=2)
+    with pool.connection() as c1:
+        pass
+    with pool.connection() as c2:
+        assert c2 is c1
+    pool.close()
+
+
+def test_pool_is_bounded():
+    pool = ConnectionPool(current_db_path(), max_size=1, timeout=0.05)
+    with pool.connection():
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+    pool.close()
+
+
+def test_pool_rolls_back_and_replaces_broken_connections():
+    pool = ConnectionPool(current_db_path(), max_size=1)
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO authors (name) VALUES ('Pool Rollback')")
+        assert conn.in_transaction
+    with pool.connection() as conn:
+        assert not conn.in_transaction
+        row = conn.execute("SELECT * FROM authors WHERE name = 'Pool Rollback'").fetchone()
+        assert row is None
+        conn.close()  # simulate a dead connection
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    pool.close()
+
+
+def test_reader_and_writer_connections_are_configured():
+    with write_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == get_config().busy_timeout
+    with read_connection() as conn:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO authors (name) VALUES ('Read Only')")
+
+
+def test_config_from_env(monkeypatch):
+    monkeypatch.setenv("DB_SYNCHRONOUS", "full")
+    monkeypatch.setenv("DB_READ_POOL_SIZE", "2")
+    monkeypatch.setenv("DB_FOREIGN_KEYS", "off")
+    config = DBConfig.from_env()
+    assert (config.synchronous, config.read_pool_size, config.foreign_keys) == ("full", 2, False)
+
+
+def test_pool_hands_connections_to_waiters_in_order():
+    pool = ConnectionPool(current_db_path(), max_size=1, timeout=5)
+    order = []
+    conn = pool.acquire()
+
+    def waiter(name):
+        with pool.connection():
+            order.append(name)
+
+    threads = [threading.Thread(target=waiter, args=(i,)) for i in range(3)]
+    for i, t in enumerate(threads):
+        t.start()
+        while len(pool._waiters) <= i:
+            time.sleep(0.001)
+    pool.release(conn)
+    for t in threads:
+        t.join()
+    assert order == [0, 1, 2]
+    pool.close()
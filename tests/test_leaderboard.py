@@ -0,0 +1,87 @@
+import threading
+
+from lib.db import leaderboard, queries
+from lib.db.connection import get_connection, write_connection
+from lib.db.leaderboard import Ranking
+from lib.db.querycount import assert_num_queries
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def test_ranking_top_includes_ties():
+    r = Ranking({"a": 5, "b": 3, "c": 3, "d": 1})
+    assert r.top(2) == [("a", 5), ("b", 3), ("c", 3)]
+    r.add("d", 4)
+    assert r.top(1) == [("a", 5), ("d", 5)]
+    assert r.top(0) == []
+
+
+def test_leaderboards_follow_writes_incrementally():
+    leaderboard.invalidate()
+    m = Magazine("Board Mag", "Boards"); m.save()
+    top = Author("Board Top"); top.save()
+    runner_up = Author("Board Runner Up"); runner_up.save()
+    Article.bulk_create((f"Board {i}", top.id, m.id) for i in range(60))
+    Article.bulk_create((f"Board R {i}", runner_up.id, m.id) for i in range(59))
+
+    board = Author.leaderboard(2)
+    assert [(a.name, n) for a, n in board[:2]] == [("Board Top", 60), ("Board Runner Up", 59)]
+
+    # Both now have 61; served from memory, plus one query for the authors.
+    runner_up.add_article(m, "Board R 59")
+    art = Article("Board R 60", top.id, m.id).save()
+    art.author_id = runner_up.id
+    art.save()
+    top.add_article(m, "Board 60")
+    with assert_num_queries(1):
+        board = Author.leaderboard(1)
+    assert {(a.name, n) for a, n in board} == {("Board Top", 61), ("Board Runner Up", 61)}
+
+    assert [(a.name, n) for a, n in Author.leaderboard(1, category="Boards")][0][1] == 61
+    assert Author.leaderboard(5, category="No Such Category") == []
+    assert Magazine.leaderboard(1)[0][0].id == m.id
+
+    leaderboard.invalidate()
+    assert {(a.name, n) for a, n in Author.leaderboard(1)} == {("Board Top", 61), ("Board Runner Up", 61)}
+
+
+def test_ranking_top_does_not_extend_ties_at_zero():
+    r = Ranking({"a": 1, **{f"z{i}": 0 for i in range(1000)}})
+    assert r.top(2) == [("a", 1), ("z0", 0)]
+    assert len(r.top(1)) == 1
+
+
+def test_load_waits_for_write_in_flight():
+    m = Magazine("Board Race", "Races"); m.save()
+    a = Author("Board Racer"); a.save()
+    boards = leaderboard.Leaderboards(check_interval=3600)
+    boards.load()
+    before = boards.authors.score(a.id)
+
+    boards.begin_write()
+    with write_connection() as conn:
+        conn.execute(queries.ARTICLE_INSERT, ("Race", a.id, m.id))
+        conn.commit()
+    loader = threading.Thread(target=boards.load)
+    loader.start()
+    loader.join(0.2)
+    assert loader.is_alive()
+    boards.record_articles({(a.id, m.id): 1})
+    boards.end_write()
+    loader.join(5)
+    assert boards.authors.score(a.id) == before + 1
+
+
+def test_writes_from_other_connections_are_noticed(monkeypatch):
+    monkeypatch.setattr(leaderboard.boards, "check_interval", 0)
+    m = Magazine("Board Outside", "Outside"); m.save()
+    a = Author("Board Outsider"); a.save()
+    assert Magazine.leaderboard(1)  # loaded
+    conn = get_connection()
+    try:
+        conn.executemany(queries.ARTICLE_INSERT, [(f"Outside {i}", a.id, m.id) for i in range(3)])
+        conn.commit()
+    finally:
+        conn.close()
+    assert [(x.id, n) for x, n in Author.leaderboard(1, category="Outside")] == [(a.id, 3)]
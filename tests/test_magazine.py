@@ -2,6 +2,7 @@
 from lib.models.magazine import Magazine
 from lib.models.author import Author
 from lib.models.article import Article
+from lib.db.querycount import assert_num_queries
 
 def test_magazine_create_and_find():
     m = Magazine("MTest", "Cat")
@@ -27,3 +28,32 @@ def test_contributors_and_titles_and_contributing_authors():
     assert any(c["name"] == "C1" for c in contributors)
     contributing_authors = m.contributing_authors(threshold=2)
     assert any(c["name"] == "C1" for c in contributing_authors)
+
+def test_load_with_contributors():
+    mags = [Magazine(f"Eager Mag {i}", "Eager").save() for i in range(4)]
+    a1 = Author("Eager A1"); a1.save()
+    a2 = Author("Eager A2"); a2.save()
+    for m in mags:
+        a1.add_article(m, "E1")
+        a2.add_article(m, "E2")
+
+    with assert_num_queries(3):
+        loaded = Magazine.load_with_contributors([m.id for m in reversed(mags)] + [-1])
+        assert [m.id for m in loaded] == [m.id for m in reversed(mags)]
+        for m in loaded:
+            assert {c["name"] for c in m.contributors()} == {"Eager A1", "Eager A2"}
+
+    with assert_num_queries(1):
+        Magazine.prefetch(mags, "articles")
+    assert [r["title"] for r in mags[0].articles()] == ["E1", "E2"]
+
+def test_find_many():
+    older = Magazine("Many Mag", "First"); older.save()
+    Magazine("Many Mag", "Second").save()
+    other = Magazine("Many Other", "First"); other.save()
+    with assert_num_queries(1):
+        found = Magazine.find_many_by_name(["Many Other", "Many Mag", "Many Missing"])
+    assert [m.id for m in found.items] == [other.id, older.id]
+    assert found.missing == ["Many Missing"]
+    with assert_num_queries(1):
+        assert [m.id for m in Magazine.find_many([other.id, older.id, -1]).items] == [other.id, older.id]
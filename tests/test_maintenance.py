@@ -0,0 +1,62 @@
+from lib.db.connection import connection
+from lib.db.maintenance import check_counters, rebuild_counters
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def counters():
+    with connection() as conn:
+        return (
+            conn.execute("SELECT * FROM author_stats ORDER BY author_id").fetchall(),
+            conn.execute("SELECT * FROM magazine_stats ORDER BY magazine_id").fetchall(),
+            conn.execute("SELECT * FROM author_magazine_stats ORDER BY author_id, magazine_id").fetchall(),
+        )
+
+
+def as_tuples(tables):
+    return [[tuple(r) for r in rows] for rows in tables]
+
+
+def test_counters_follow_writes_and_match_rebuild():
+    a1 = Author("Counter A1"); a1.save()
+    a2 = Author("Counter A2"); a2.save()
+    m1 = Magazine("Counter M1", "Count"); m1.save()
+    m2 = Magazine("Counter M2", "Count"); m2.save()
+
+    art = Article("Counted", a1.id, m1.id).save()
+    a1.add_article(m1, "Counted 2")
+    a2.add_article(m1, "Counted 3")
+    with connection() as conn:
+        row = conn.execute("SELECT * FROM magazine_stats WHERE magazine_id = ?", (m1.id,)).fetchone()
+    assert (row["article_count"], row["author_count"]) == (3, 2)
+    assert m1.id in [m.id for m in Magazine.magazines_with_at_least_two_authors()]
+
+    art.author_id, art.magazine_id = a2.id, m2.id
+    art.save()
+    with connection() as conn:
+        conn.execute("DELETE FROM articles WHERE title = 'Counted 3'")
+        conn.commit()
+    assert m1.id not in [m.id for m in Magazine.magazines_with_at_least_two_authors()]
+
+    maintained = as_tuples(counters())
+    rebuild_counters()
+    assert as_tuples(counters()) == maintained
+
+
+def test_check_counters_finds_drift():
+    a = Author("Checked Author"); a.save()
+    m = Magazine("Checked Mag", "Check"); m.save()
+    a.add_article(m, "Checked 1")
+    a.add_article(m, "Checked 2")
+    assert check_counters() == []
+    assert [r["id"] for r in a.magazines()] == [m.id]
+    assert a.topic_areas() == ["Check"]
+    assert [r["id"] for r in m.contributors()] == [a.id]
+
+    with connection() as conn:
+        conn.execute("UPDATE author_magazine_stats SET article_count = 5 WHERE author_id = ?", (a.id,))
+        conn.commit()
+    assert ("author_magazine_stats", f"{a.id}:{m.id}", 2, 5) in check_counters()
+    rebuild_counters()
+    assert check_counters() == []
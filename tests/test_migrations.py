@@ -0,0 +1,83 @@
+from lib.db import leaderboard, migrations, resultcache
+from lib.db.connection import close_pools, get_connection, write_connection
+from lib.db.maintenance import check_counters
+from lib.db.seed import drop_article_indexes, restore_article_indexes
+from lib.models.article import Article
+
+
+def index_names(conn):
+    return {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def test_migrate_applies_pending_versions_once():
+    lines = []
+    migrations.migrate(out=lines.append)
+    assert migrations.pending() == []
+    assert migrations.migrate(out=lines.append) == []
+    with write_connection() as conn:
+        assert migrations.applied_versions(conn) == {m.version for m in migrations.MIGRATIONS}
+        assert {"idx_articles_title", "idx_articles_magazine_author", "idx_magazines_category"} <= index_names(conn)
+
+    # conftest applies schema.sql only, so the first call did the work
+    text = "\n".join(lines)
+    assert "[1] baseline schema.sql" in text
+    assert "SEARCH magazines USING INDEX idx_magazines_category" in text
+    assert text.index("before Magazine.find_by_category") < text.index("after  Magazine.find_by_category")
+
+
+def test_migration_indexes_survive_deferred_index_loads():
+    migrations.migrate(out=lambda line: None)
+    with write_connection() as conn:
+        drop_article_indexes(conn)
+        assert "idx_articles_title" not in index_names(conn)
+        restore_article_indexes(conn)
+        assert {"idx_articles_title", "idx_articles_magazine_author"} <= index_names(conn)
+    assert "SEARCH articles USING INDEX idx_articles_title (title=?)" in migrations.query_plan(
+        "SELECT * FROM articles WHERE title = ?", ("x",))
+
+
+def test_backfill_migration_fills_counters_once():
+    migrations.migrate(out=lambda line: None)
+    with write_connection() as conn:
+        conn.execute("DELETE FROM magazine_stats")
+        conn.execute("DELETE FROM schema_migrations WHERE version = 6")
+        conn.commit()
+    assert check_counters()
+    assert migrations.migrate(out=lambda line: None) == [6]
+    assert check_counters() == []
+    assert migrations.migrate(out=lambda line: None) == []
+
+
+def test_upgrading_a_populated_database_fills_counters_and_search(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "old.db"))
+    close_pools()
+    conn = get_connection()
+    try:
+        # the schema before migrations, counters and search existed
+        conn.executescript("""
+            CREATE TABLE authors (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE);
+            CREATE TABLE magazines (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                                    category TEXT NOT NULL, UNIQUE(name, category));
+            CREATE TABLE articles (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL,
+                                   author_id INTEGER NOT NULL, magazine_id INTEGER NOT NULL);
+            CREATE INDEX idx_articles_author ON articles(author_id);
+            INSERT INTO authors (name) VALUES ('Old A'), ('Old B');
+            INSERT INTO magazines (name, category) VALUES ('Old Mag', 'Old'), ('Older Mag', 'Old');
+        """)
+        conn.executemany("INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+                         [(f"Legacy heron {i}", 1 + i % 2, 1 + i % 3 // 2) for i in range(50)])
+        conn.commit()
+    finally:
+        conn.close()
+    try:
+        lines = []
+        assert migrations.migrate(show_plans=False, out=lines.append) == [m.version for m in migrations.MIGRATIONS]
+        assert "  ran in" in "\n".join(lines)
+        assert check_counters() == []
+        with write_connection() as conn:
+            assert conn.execute("SELECT SUM(article_count) FROM author_stats").fetchone()[0] == 50
+        assert len(Article.search("heron", limit=100)) == 50
+    finally:
+        close_pools()
+        leaderboard.invalidate()
+        resultcache.invalidate()
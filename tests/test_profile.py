@@ -0,0 +1,46 @@
+import sqlite3
+
+from lib.db import profile
+from lib.db.connection import read_connection
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def test_connections_are_plain_when_disabled():
+    with read_connection() as conn:
+        assert type(conn) is sqlite3.Connection
+
+
+def test_profiles_statements_by_model_method():
+    m = Magazine("Profiled Mag", "Profile"); m.save()
+    a = Author("Profiled Author"); a.save()
+    for i in range(3):
+        a.add_article(m, f"Profiled {i}")
+
+    with profile.profiling(slow_ms=0) as prof:
+        for _ in range(2):
+            assert len(a.articles()) == 3
+        Author.find_by_name("Profiled Author")
+
+    stats = {r["caller"]: r for r in prof.report()}
+    articles = stats["lib.models.author:Author.articles"]
+    assert (articles["count"], articles["rows"]) == (2, 6)
+    assert 0 < articles["p50_ms"] <= articles["p99_ms"]
+    assert "lib.models.author:Author.find_by_name" in prof.by_caller()
+    assert "Author.articles" in prof.format_report()
+
+    explained = {entry.caller: plan for entry, plan in prof.explain_slow()}
+    assert any("articles" in line for line in explained["lib.models.author:Author.articles"])
+
+    with read_connection() as conn:
+        assert type(conn) is sqlite3.Connection
+
+
+def test_reports_statement_cache_hits():
+    a = Author("Cached Statements"); a.save()
+    with profile.profiling() as prof:
+        for _ in range(10):
+            Author.find_by_name("Cached Statements")
+    cache = prof.statement_cache()
+    assert cache["hits"] >= 9
+    assert cache["hit_rate"] > 0.5
@@ -0,0 +1,50 @@
+import io
+import json
+
+from lib import reports
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def write(**kwargs):
+    out = io.StringIO()
+    stats = reports.ReportGenerator(progress=False, **kwargs).write(out)
+    return [json.loads(line) for line in out.getvalue().splitlines()], stats
+
+
+def test_reports_cover_every_row_in_id_order():
+    m = Magazine("Report Weekly", "Reports"); m.save()
+    a = Author("Report Writer"); a.save()
+    a.add_article(m, "Report one")
+    a.add_article(m, "Report two")
+
+    lines, stats = write(workers=0, shard_size=3)
+    authors = [r for r in lines if r["kind"] == "author"]
+    magazines = [r for r in lines if r["kind"] == "magazine"]
+    assert [s.reports for s in stats] == [len(authors), len(magazines)]
+    assert [r["id"] for r in authors] == sorted(r["id"] for r in authors)
+
+    mine = next(r for r in authors if r["id"] == a.id)
+    assert mine["articles"] == ["Report one", "Report two"]
+    assert mine["magazines"] == [{"id": m.id, "name": "Report Weekly", "category": "Reports"}]
+    assert mine["topic_areas"] == ["Reports"]
+    theirs = next(r for r in magazines if r["id"] == m.id)
+    assert theirs["contributors"] == [{"id": a.id, "name": "Report Writer"}]
+
+
+def test_shards_split_on_article_weight():
+    m = Magazine("Report Heavy", "Reports"); m.save()
+    heavy = Author("Report Heavy Author"); heavy.save()
+    for i in range(5):
+        heavy.add_article(m, f"Heavy {i}")
+    after = Author("Report After Heavy"); after.save()
+    ranges = reports.shards("authors", shard_size=1000, shard_articles=5)
+    assert (after.id, after.id) == ranges[-1]
+    assert ranges[-2][1] == heavy.id
+    assert ranges == sorted(ranges)
+
+
+def test_process_pool_matches_serial_output():
+    serial, _ = write(workers=0, shard_size=2)
+    pooled, _ = write(workers=2, shard_size=2)
+    assert pooled == serial
@@ -0,0 +1,66 @@
+from lib.db import resultcache
+from lib.db.connection import get_connection
+from lib.db.querycount import assert_num_queries
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def test_results_cached_until_a_relevant_write():
+    cache = resultcache.configure(maxsize=100, check_interval=3600)
+    try:
+        m = Magazine("Result Cache Mag", "Caching"); m.save()
+        a = Author("Result Cache Author"); a.save()
+        a.add_article(m, "Cached title 1")
+
+        assert m.article_titles() == ["Cached title 1"]
+        with assert_num_queries(0):
+            titles = m.article_titles()
+        titles.append("caller's own copy")
+        with assert_num_queries(0):
+            assert m.article_titles() == ["Cached title 1"]
+
+        # authors changed: the titles still come from the cache
+        Author("Result Cache Other").save()
+        with assert_num_queries(0):
+            m.article_titles()
+
+        a.add_article(m, "Cached title 2")
+        with assert_num_queries(1):
+            assert m.article_titles() == ["Cached title 1", "Cached title 2"]
+        assert cache.stats()["hits"] >= 3
+    finally:
+        resultcache.disable()
+
+
+def test_writes_from_other_connections_are_detected():
+    cache = resultcache.configure(maxsize=100, check_interval=0)
+    try:
+        m = Magazine("Result Cache External", "External"); m.save()
+        a = Author("Result Cache External Author"); a.save()
+        assert a.topic_areas() == []
+        with assert_num_queries(0):
+            assert a.topic_areas() == []
+
+        conn = get_connection()
+        try:
+            conn.execute("INSERT INTO articles (title, author_id, magazine_id) VALUES (?, ?, ?)",
+                         ("Written elsewhere", a.id, m.id))
+            conn.commit()
+        finally:
+            conn.close()
+        assert a.topic_areas() == ["External"]
+        assert cache.stats()["data_version_changes"] >= 1
+    finally:
+        resultcache.disable()
+
+
+def test_eviction_stats():
+    cache = resultcache.configure(maxsize=2, check_interval=3600)
+    try:
+        mags = [Magazine(f"Evict {i}", "Evict").save() for i in range(3)]
+        for mag in mags:
+            mag.article_titles()
+        stats = cache.stats()
+        assert stats["size"] == 2 and stats["evictions"] == 1 and stats["misses"] == 3
+    finally:
+        resultcache.disable()
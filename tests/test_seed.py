@@ -0,0 +1,153 @@
+import json
+
+from lib.db.connection import read_connection, write_connection
+from lib.db.seed import Importer, drop_article_indexes, read_chunks
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_import_resolves_names_and_rejects_bad_rows(tmp_path):
+    authors = write_lines(tmp_path / "authors.csv", ["name", "Import A1", "Import A2", " "])
+    mags = write_lines(tmp_path / "magazines.jsonl", [
+        json.dumps({"name": "Import Mag", "category": "Imports"}),
+        "{not json",
+    ])
+    articles = write_lines(tmp_path / "articles.csv", [
+        "title,author,magazine,category",
+        "Imported 1,Import A1,Import Mag,Imports",
+        "Imported 2,Import A2,Import Mag,",
+        "Orphan,Nobody,Import Mag,",
+        ",Import A1,Import Mag,",
+    ])
+    importer = Importer(workers=2, chunk_lines=2)
+    assert importer.import_file(authors, "authors")[1:3] == (2, 1)
+    assert importer.import_file(mags, "magazines")[1:3] == (1, 1)
+    stats = importer.import_file(articles, "articles")
+    assert (stats.rows, stats.errors) == (2, 2)
+
+    mag = Magazine.find_by_name("Import Mag")
+    assert sorted(a["title"] for a in mag.articles()) == ["Imported 1", "Imported 2"]
+    assert sorted(a["name"] for a in mag.contributors()) == ["Import A1", "Import A2"]
+
+
+def test_import_resumes_from_checkpoint(tmp_path):
+    Author("Resume Author").save()
+    Magazine("Resume Mag", "Resume").save()
+    path = write_lines(tmp_path / "resume.jsonl", [
+        json.dumps({"title": f"Resumed {i}", "author": "Resume Author", "magazine": "Resume Mag"})
+        for i in range(10)
+    ])
+    importer = Importer(workers=0, chunk_lines=3, commit_rows=3)
+    parsed = importer._parse("articles", "jsonl", read_chunks(path, 0, 3))
+
+    def interrupted():
+        for i, chunk in enumerate(parsed):
+            if i == 2:
+                raise KeyboardInterrupt
+            yield chunk
+
+    try:
+        importer._parse = lambda *args: interrupted()
+        importer.import_file(path, "articles")
+    except KeyboardInterrupt:
+        pass
+    del importer._parse
+    assert len(Article.find_by_author(Author.find_by_name("Resume Author").id)) == 6
+
+    stats = importer.import_file(path, "articles")
+    assert stats.rows == 4
+    titles = sorted(a.title for a in Article.find_by_author(Author.find_by_name("Resume Author").id))
+    assert titles == sorted(f"Resumed {i}" for i in range(10))
+    assert importer.import_file(path, "articles").rows == 0
+
+
+def test_deferred_indexes_are_rebuilt(tmp_path):
+    Author("Deferred Author").save()
+    Magazine("Deferred Mag", "Deferred").save()
+    path = write_lines(tmp_path / "deferred.csv", ["title,author,magazine"] + [
+        f"Deferred zebra {i},Deferred Author,Deferred Mag" for i in range(5)
+    ])
+    with read_connection() as conn:
+        before = conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'articles' ORDER BY name").fetchall()
+    Importer(workers=0, defer_indexes=True).import_file(path, "articles")
+    with read_connection() as conn:
+        after = conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'articles' ORDER BY name").fetchall()
+        count = conn.execute(
+            "SELECT article_count FROM magazine_stats s JOIN magazines m ON m.id = s.magazine_id WHERE m.name = ?",
+            ("Deferred Mag",),
+        ).fetchone()[0]
+    assert [tuple(r) for r in after] == [tuple(r) for r in before]
+    assert count == 5
+    assert {a.title for a in Article.search("zebra")} >= {f"Deferred zebra {i}" for i in range(5)}
+
+
+def test_dangling_ids_are_rejected(tmp_path):
+    author = Author("Dangling Author"); author.save()
+    mag = Magazine("Dangling Mag", "Dangling"); mag.save()
+    path = write_lines(tmp_path / "dangling.csv", [
+        "title,author_id,magazine_id",
+        f"Dangling ok,{author.id},{mag.id}",
+        f"Dangling author,999999,{mag.id}",
+        f"Dangling magazine,{author.id},999999",
+    ])
+    stats = Importer(workers=0).import_file(path, "articles")
+    assert (stats.rows, stats.errors) == (1, 2)
+    assert [a.title for a in Article.find_by_author(author.id)] == ["Dangling ok"]
+
+
+def test_interrupted_deferred_load_is_restored(tmp_path):
+    Author("Killed Author").save()
+    Magazine("Killed Mag", "Killed").save()
+    path = write_lines(tmp_path / "killed.csv", ["title,author,magazine"] + [
+        f"Killed walrus {i},Killed Author,Killed Mag" for i in range(3)
+    ])
+    with read_connection() as conn:
+        before = conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'articles' ORDER BY name").fetchall()
+    with write_connection() as conn:
+        drop_article_indexes(conn)  # a --defer-indexes load killed before its restore
+
+    Importer(workers=0).import_file(path, "articles")
+    with read_connection() as conn:
+        after = conn.execute("SELECT name FROM sqlite_master WHERE tbl_name = 'articles' ORDER BY name").fetchall()
+        count = conn.execute(
+            "SELECT article_count FROM magazine_stats s JOIN magazines m ON m.id = s.magazine_id WHERE m.name = ?",
+            ("Killed Mag",),
+        ).fetchone()[0]
+    assert [tuple(r) for r in after] == [tuple(r) for r in before]
+    assert count == 3
+    assert {a.title for a in Article.search("walrus")} >= {f"Killed walrus {i}" for i in range(3)}
+
+
+def test_interrupted_deferred_import_resumes_without_duplicates(tmp_path):
+    Author("Deferred Resume Author").save()
+    Magazine("Deferred Resume Mag", "Deferred").save()
+    path = write_lines(tmp_path / "deferred_resume.csv", ["title,author,magazine"] + [
+        f"Deferred resumed {i},Deferred Resume Author,Deferred Resume Mag" for i in range(15)
+    ])
+    importer = Importer(workers=0, chunk_lines=3, commit_rows=6, defer_indexes=True)
+    parsed = importer._parse("articles", "csv", read_chunks(path, 0, 3))
+
+    def interrupted():
+        for i, chunk in enumerate(parsed):
+            if i == 3:  # 9 rows written, 6 checkpointed
+                raise KeyboardInterrupt
+            yield chunk
+
+    try:
+        importer._parse = lambda *args: interrupted()
+        importer.import_file(path, "articles")
+    except KeyboardInterrupt:
+        pass
+    del importer._parse
+    author_id = Author.find_by_name("Deferred Resume Author").id
+    assert len(Article.find_by_author(author_id)) == 6
+
+    importer.import_file(path, "articles")
+    titles = [a.title for a in Article.find_by_author(author_id)]
+    assert len(titles) == len(set(titles)) == 15
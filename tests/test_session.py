@@ -0,0 +1,58 @@
+from lib.db import session
+from lib.db.session import LRUCache, Session
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def test_identity_map_returns_same_instance():
+    a = Author("Identity"); a.save()
+    with Session() as s:
+        first = Author.find_by_id(a.id)
+        assert Author.find_by_id(a.id) is first
+        assert s.get(Author, a.id) is first
+    assert Author.find_by_id(a.id) is not first
+
+
+def test_find_by_name_shares_the_identity_map():
+    a = Author("Identity Name"); a.save()
+    m = Magazine("Identity Name Mag", "Identity"); m.save()
+    with Session():
+        by_name = Author.find_by_name("Identity Name")
+        assert Author.find_by_id(a.id) is by_name
+        assert Author.find_many_by_name(["Identity Name"]).items[0] is by_name
+        mag = Magazine.find_by_id(m.id)
+        assert Magazine.find_by_name("Identity Name Mag") is mag
+
+
+def test_save_updates_identity_map():
+    a = Author("Identity Save"); a.save()
+    with Session():
+        loaded = Author.find_by_id(a.id)
+        loaded.name = "Identity Saved"
+        loaded.save()
+        assert Author.find_by_id(a.id) is loaded
+
+
+def test_shared_cache_invalidated_on_save():
+    session.configure_cache(maxsize=10)
+    try:
+        a = Author("Cached"); a.save()
+        assert Author.find_by_id(a.id) is Author.find_by_id(a.id)
+        other = Author("Cached Renamed", a.id)
+        other.save()
+        assert Author.find_by_id(a.id).name == "Cached Renamed"
+    finally:
+        session.disable_cache()
+
+
+def test_lru_cache_size_and_ttl():
+    now = [0.0]
+    cache = LRUCache(maxsize=2, ttl=5, clock=lambda: now[0])
+    cache.set("a", 1); cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    now[0] = 6
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 2
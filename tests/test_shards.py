@@ -0,0 +1,163 @@
+import os
+
+import pytest
+
+from lib.db import leaderboard, resultcache, shards
+from lib.db.connection import close_pools, configure, read_connection, shard_path
+from lib.db.seed import Importer, apply_schema
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PATH", str(tmp_path / "catalog.db"))
+    close_pools()
+    apply_schema()
+    yield
+    configure(shards=0)
+    leaderboard.invalidate()
+    resultcache.invalidate()
+
+
+def shard_titles(shard):
+    with read_connection(shard) as conn:
+        return sorted(r[0] for r in conn.execute("SELECT title FROM articles"))
+
+
+def test_init_routes_reads_and_writes_by_magazine(catalog):
+    alice, bob = Author("Alice"), Author("Bob")
+    alice.save(); bob.save()
+    big, small = Magazine("Big", "News"), Magazine("Small", "Arts")
+    big.save(); small.save()
+    for i in range(3):
+        alice.add_article(big, f"Big {i}")
+    first = bob.add_article(small, "Small 0")
+
+    shards.init(2, out=lambda line: None)
+    assert os.path.exists(shard_path(1))
+    assert shard_titles(shards.shard_of(big.id)) == ["Big 0", "Big 1", "Big 2"]
+    assert shard_titles(shards.shard_of(small.id)) == ["Small 0"]
+    with read_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 0
+
+    second = bob.add_article(big, "Big by Bob")
+    assert second > first
+    assert [a.title for a in Article.find_by_magazine(big.id)][-1] == "Big by Bob"
+    assert [r["name"] for r in big.contributors()] == ["Alice", "Bob"]
+    assert [r["title"] for r in bob.articles()] == ["Small 0", "Big by Bob"]
+    assert Article.find_by_id(second).magazine_id == big.id
+    assert Author.most_prolific().id == alice.id
+
+
+def test_move_and_article_save_across_shards(catalog):
+    author = Author("Mover"); author.save()
+    magazines = [Magazine(f"Mag {i}", "Moves") for i in range(2)]
+    for m in magazines:
+        m.save()
+    configure(shards=2)
+    home = shards.shard_of(magazines[0].id)
+    assert shards.shard_of(magazines[1].id) != home
+
+    article_id = author.add_article(magazines[0], "Travels")
+    assert shard_titles(home) == ["Travels"]
+    assert shards.move(magazines[0].id, 1 - home) == 1
+    assert shard_titles(home) == []
+    assert [a.title for a in Article.find_by_magazine(magazines[0].id)] == ["Travels"]
+
+    # magazine 1 is on the other shard as well now: update in place
+    article = Article.find_by_id(article_id)
+    article.magazine_id = magazines[1].id
+    article.title = "Travels on"
+    article.save()
+    assert [r["title"] for r in author.articles()] == ["Travels on"]
+    assert magazines[0].articles() == []
+
+    shards.move(magazines[1].id, home)
+    article.magazine_id = magazines[0].id
+    article.save()
+    assert article.id == article_id
+    assert [a.id for a in Article.find_by_author(author.id)] == [article_id]
+    assert shard_titles(home) == []
+
+
+def test_rebalance_splits_into_new_shards(catalog):
+    author = Author("Prolific"); author.save()
+    magazines = [Magazine(f"Weekly {i}", "Splits") for i in range(4)]
+    for m in magazines:
+        m.save()
+    for i, m in enumerate(magazines):
+        for j in range(i + 1):
+            author.add_article(m, f"{m.name} #{j}")
+    shards.init(1, out=lambda line: None)
+    assert shards.plan(shards.magazine_loads(), 1) == []
+
+    moves = shards.rebalance(3, dry_run=True, out=lambda line: None)
+    assert shards.count() == 1 and moves
+    shards.rebalance(3, out=lambda line: None)
+    loads = shards.magazine_loads()
+    assert sorted(sum(m.values()) for m in loads.values()) == [3, 3, 4]
+    assert len(author.articles()) == 10
+    assert Author.most_prolific().id == author.id
+    assert shards.clean_orphans() == 0
+
+
+def test_aggregates_read_the_shards(catalog):
+    alice, bob = Author("Alice"), Author("Bob")
+    alice.save(); bob.save()
+    news, arts = Magazine("News Daily", "News"), Magazine("Arts Weekly", "Arts")
+    news.save(); arts.save()
+    for i in range(3):
+        alice.add_article(news, f"News {i}")
+    bob.add_article(news, "News by Bob")
+    bob.add_article(arts, "Arts 0")
+    shards.init(2, out=lambda line: None)
+    assert shards.shard_of(news.id) != shards.shard_of(arts.id)
+    bob.add_article(arts, "Arts 1")
+    bob.add_article(arts, "Arts 2")
+
+    assert [r["id"] for r in bob.magazines()] == [news.id, arts.id]
+    assert sorted(bob.topic_areas()) == ["Arts", "News"]
+    assert sorted(news.article_titles()) == ["News 0", "News 1", "News 2", "News by Bob"]
+    assert [r["name"] for r in news.contributing_authors()] == ["Alice"]
+    assert Magazine.top_publisher().id == news.id
+    assert [m.id for m in Magazine.magazines_with_at_least_two_authors()] == [news.id]
+
+    with pytest.raises(ValueError, match="DB_SHARDS"):
+        Author.leaderboard(1)
+    with pytest.raises(ValueError, match="DB_SHARDS"):
+        Article.search("news")
+
+
+def test_bulk_article_inserts_are_refused(catalog):
+    author = Author("Bulk"); author.save()
+    mag = Magazine("Bulk Mag", "Bulk"); mag.save()
+    configure(shards=2)
+    with pytest.raises(ValueError, match="DB_SHARDS"):
+        Article.bulk_create([("Bulk 0", author.id, mag.id)])
+    with pytest.raises(ValueError, match="DB_SHARDS"):
+        Author.add_author_with_articles("Bulk Two", [{"title": "Bulk 1", "magazine_id": mag.id}])
+    with pytest.raises(ValueError, match="DB_SHARDS"):
+        Importer(workers=0).import_rows("articles", [{"title": "Bulk 2", "author_id": author.id,
+                                                      "magazine_id": mag.id}])
+    assert Importer(workers=0).import_rows("authors", [{"name": "Bulk Three"}]).rows == 1
+    with read_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM authors WHERE name = 'Bulk Two'").fetchone()[0] == 0
+
+
+def test_streaming_refused_on_call_and_scatter_pool_replaced_cleanly(catalog, monkeypatch):
+    configure(shards=3)
+    with pytest.raises(ValueError, match="DB_SHARDS"):
+        Article.iter_by_author(1)
+    with pytest.raises(ValueError, match="DB_SHARDS"):
+        Article.iter_by_magazine(1)
+
+    monkeypatch.setattr(shards, "_executor", None)
+    monkeypatch.setattr(shards, "_executor_size", 0)
+    assert shards.scatter(lambda conn, shard: shard, [0, 1]) == [0, 1]
+    old = shards._executor
+    assert shards.scatter(lambda conn, shard: shard) == [0, 1, 2]
+    assert shards._executor is not old and old._shutdown
+    shards._executor.shutdown()
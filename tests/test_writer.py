@@ -0,0 +1,83 @@
+import queue
+import threading
+
+import pytest
+
+from lib.db.writer import WriteQueue, WriteQueueClosed
+from lib.models.article import Article
+from lib.models.author import Author
+from lib.models.magazine import Magazine
+
+
+def test_concurrent_producers_are_group_committed():
+    m = Magazine("Queued Mag", "Queue"); m.save()
+    a = Author("Queued Author"); a.save()
+    with WriteQueue(max_batch=50, max_delay_ms=20) as writer:
+        futures = []
+        lock = threading.Lock()
+
+        def produce(n):
+            for i in range(25):
+                f = a.add_article(m, f"Queued {n}-{i}", writer=writer)
+                with lock:
+                    futures.append(f)
+
+        threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        art = Article("Queued Save", a.id, m.id)
+        saved = art.save(writer=writer)
+    ids = [f.result() for f in futures]
+    assert len(set(ids)) == 100
+    assert saved.result() is art and art.id is not None
+    assert writer.writes == 101
+    assert writer.batches < 101
+    assert len(Article.find_by_author(a.id)) == 101
+
+
+def test_failed_write_only_fails_its_own_future():
+    m = Magazine("Queued Fail Mag", "Queue"); m.save()
+    a = Author("Queued Fail Author"); a.save()
+    with WriteQueue(max_delay_ms=50) as writer:
+        good = a.add_article(m, "Queued ok", writer=writer)
+        bad = a.add_article(-1, "Queued bad fk", writer=writer)
+        also_good = writer.execute("UPDATE authors SET name = ? WHERE id = ?", ("Queued Renamed", a.id))
+    assert good.result()
+    with pytest.raises(Exception):
+        bad.result()
+    assert also_good.result() == 1
+    with pytest.raises(WriteQueueClosed):
+        writer.execute("SELECT 1")
+
+
+def test_submit_applies_backpressure():
+    release = threading.Event()
+    writer = WriteQueue(max_batch=1, max_pending=1)
+    writer.submit(lambda conn: release.wait())
+    writer.submit(lambda conn: None, timeout=1)  # fills the queue behind the blocked batch
+    with pytest.raises(queue.Full):
+        writer.submit(lambda conn: None, timeout=0.05)
+    release.set()
+    writer.close()
+
+
+def test_failed_commit_leaves_new_article_unsaved():
+    m = Magazine("Queued Commit Mag", "Queue"); m.save()
+    a = Author("Queued Commit Author"); a.save()
+
+    def dangling(conn):
+        # the foreign key is only checked by COMMIT, which then fails the batch
+        conn.execute("PRAGMA defer_foreign_keys = ON")
+        conn.execute("INSERT INTO articles (title, author_id, magazine_id) VALUES ('x', -1, ?)", (m.id,))
+
+    art = Article("Queued Rolled Back", a.id, m.id)
+    with WriteQueue(max_delay_ms=50) as writer:
+        saved = art.save(writer=writer)
+        writer.submit(dangling)
+    with pytest.raises(Exception):
+        saved.result()
+    assert art.id is None
+    assert art.save().id is not None
+    assert [x.title for x in Article.find_by_author(a.id)] == ["Queued Rolled Back"]